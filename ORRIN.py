@@ -51,8 +51,12 @@ from cognition.planning.reflection import record_decision
 # === Utils & I/O ===
 from utils.get_cycle_count import get_cycle_count
 from utils.load_utils import load_context
-from utils.json_utils import load_json, save_json
+from utils.json_utils import load_json, save_json, StateTransaction
 from utils.log import log_error, log_private, log_activity, log_model_issue
+from utils.durability import durability_stats
+from utils.embedder import embedding_stats, flush_embeddings, warm_up_embedder
+import memory.consolidation as consolidation
+from memory.snapshot import load_memory_snapshot, save_memory_snapshot
 from utils.emotion_utils import log_pain, log_uncertainty_spike
 
 # === Error routing + repair (FIXED import) ===
@@ -181,6 +185,14 @@ def _invoke_cognition(fn, name: str, ctx: Dict[str, Any], *, args=None, kwargs=N
     return fn(**built)
 # ------------------------------------------------------------------------------
 
+# --- Load the embedding model in the background; the first memory write waits only if it's not ready ---
+warm_up_embedder()
+
+# --- Warm memory from the last shutdown's snapshot (before anything opens the stores) ---
+_snap = load_memory_snapshot()
+if _snap.get("long") or _snap.get("working"):
+    log_activity(f"Memory restored from snapshot in {_snap.get('ms')} ms: {_snap}")
+
 # --- Load context and RESET at startup ---
 context = load_context()
 context.setdefault("committed_goal", None)
@@ -214,262 +226,280 @@ elif sum(emotional_state.get(k, 0.0) for k in ["frustration", "anger", "pain", "
 if __name__ == "__main__":
     while True:
         try:
-            print("thinking....")
-            timestamp = datetime.now(timezone.utc).isoformat()
-            log_activity(f"🫀 Starting cycle at {timestamp}")
-
-            # Emotion update tick
-            update_emotional_state()
-
-            # Reload context fresh each cycle
-            context = load_context()
-            context.setdefault("committed_goal", None)
-            context.setdefault("action_debt", 0)
-            context.setdefault("last_action_ts", 0.0)
-            context.setdefault("recent_picks", [])  # NEW: ensure present each loop
-
-            emotional_state = context.get("emotional_state", {})
-            emotional_state.setdefault("boredom", 0.0)  # NEW: ensure boredom exists each loop
-
-            # Subtle mood decay each cycle
-            for k in ["frustration", "pain", "anger", "fear", "boredom", "uncertainty"]:
-                if k in emotional_state:
-                    emotional_state[k] *= 0.92
-                    if emotional_state[k] < 0.05:
-                        emotional_state[k] = 0.0
-            context["emotional_state"] = emotional_state
-
-            # Reflex layer
-            if emotional_state.get("emotional_stability", 1.0) < 0.6:
-                reflect_on_emotions(context, context.get("self_model", {}), context.get("long_memory", []))
-
-            # Thalamus: signal processing
-            top_signals, attention_mode = process_inputs(context)
-            context["top_signals"] = top_signals
-            context["attention_mode"] = attention_mode
-
-            # Fire alarm (emergency interrupt)
-            if context.get("emergency_action"):
-                emergency = context["emergency_action"]
-                log_error(f"🔥 EMERGENCY ACTION TRIGGERED: {emergency.get('reason', str(emergency))}")
-                log_private(f"🔥 EMERGENCY ACTION: {emergency}")
-                print(f"🔥 EMERGENCY: {emergency.get('reason', str(emergency))}")
-                break
+            # One transaction per cycle: every state file saved in the body is buffered
+            # and committed together at the end, or rolled back if the cycle crashes
+            with StateTransaction():
+                print("thinking....")
+                timestamp = datetime.now(timezone.utc).isoformat()
+                log_activity(f"🫀 Starting cycle at {timestamp}")
+
+                # Emotion update tick
+                update_emotional_state()
+
+                # Reload context fresh each cycle
+                context = load_context()
+                context.setdefault("committed_goal", None)
+                context.setdefault("action_debt", 0)
+                context.setdefault("last_action_ts", 0.0)
+                context.setdefault("recent_picks", [])  # NEW: ensure present each loop
+
+                emotional_state = context.get("emotional_state", {})
+                emotional_state.setdefault("boredom", 0.0)  # NEW: ensure boredom exists each loop
+
+                # Subtle mood decay each cycle
+                for k in ["frustration", "pain", "anger", "fear", "boredom", "uncertainty"]:
+                    if k in emotional_state:
+                        emotional_state[k] *= 0.92
+                        if emotional_state[k] < 0.05:
+                            emotional_state[k] = 0.0
+                context["emotional_state"] = emotional_state
+
+                # Reflex layer
+                if emotional_state.get("emotional_stability", 1.0) < 0.6:
+                    reflect_on_emotions(context, context.get("self_model", {}), context.get("long_memory", []))
+
+                # Thalamus: signal processing
+                top_signals, attention_mode = process_inputs(context)
+                context["top_signals"] = top_signals
+                context["attention_mode"] = attention_mode
+
+                # Fire alarm (emergency interrupt)
+                if context.get("emergency_action"):
+                    emergency = context["emergency_action"]
+                    log_error(f"🔥 EMERGENCY ACTION TRIGGERED: {emergency.get('reason', str(emergency))}")
+                    log_private(f"🔥 EMERGENCY ACTION: {emergency}")
+                    print(f"🔥 EMERGENCY: {emergency.get('reason', str(emergency))}")
+                    break
+
+                acted_this_cycle = False
+                result = think(context)
+
+                # Path A: think() produced a behavior action
+                if isinstance(result, dict) and "action" in result:
+                    action = result["action"]
+                    speaker = context.get("speaker")
+                    action_type = action.get("type")
+
+                    if action_type not in BEH_NAMES:
+                        log_error(f"⚠️ Unknown action type: {action_type}. Skipping action.")
+                        log_model_issue(f"⚠️ Unknown action type attempted: {action_type}")
+                        # Route as a soft incident & try repair
+                        try:
+                            route_exception(RuntimeError(f"Unknown action {action_type}"),
+                                            phase="action", context=context, extra={"action": action_type})
+                        except Exception:
+                            pass
+                        _ = try_auto_repair({"type": "UnknownAction",
+                                             "msg": str(action_type),
+                                             "trace": "",
+                                             "phase": "action"}, context)
+                        reward = 0.0
+                        feats = bandit_learn(str(action_type or "unknown_action"), context, reward)
+                        record_decision(str(action_type or "unknown_action"),
+                                        reason_string({"error": "unknown_action"}, reward, feats, "think.action"))
+                    else:
+                        try:
+                            success = take_action(action, context, speaker)
+                            acted_this_cycle = bool(success)
+                            if success:
+                                context["last_action_ts"] = time.time()
+                                log_activity(f"🎤 Action Taken: {action_type}")
+                            else:
+                                log_error("⚠️ take_action returned False")
+                                log_pain(context, "frustration", increment=0.3)
+                            reward = 1.0 if success else 0.0
+                            feats = bandit_learn(action_type, context, reward)
+                            record_decision(action_type, reason_string({"success": success}, reward, feats, "think.action"))
+                        except Exception as e:
+                            route_exception(e, phase="action", context=context)
+                            _ = try_auto_repair({"type": e.__class__.__name__,
+                                                 "msg": str(e),
+                                                 "trace": "",
+                                                 "phase": "action"}, context)
+                            log_error(f"❌ Action execution failed: {e}")
+                            log_pain(context, "frustration", increment=0.3)
+                            reward = 0.0
+                            feats = bandit_learn(str(action_type or "unknown_action"), context, reward)
+                            record_decision(str(action_type or "unknown_action"),
+                                            reason_string({"error": str(e)}, reward, feats, "think.action"))
 
-            acted_this_cycle = False
-            result = think(context)
+                # Path B: think() produced a next_function (cognition function)
+                elif isinstance(result, dict) and "next_function" in result:
+                    fn_name = result["next_function"]
+                    check_emotion_drift(max_cycles=10)
 
-            # Path A: think() produced a behavior action
-            if isinstance(result, dict) and "action" in result:
-                action = result["action"]
-                speaker = context.get("speaker")
-                action_type = action.get("type")
+                    meta_or_fn = COGNITIVE_FUNCTIONS.get(fn_name)
+                    fn = (meta_or_fn.get("function") if isinstance(meta_or_fn, dict) else meta_or_fn)
 
-                if action_type not in BEH_NAMES:
-                    log_error(f"⚠️ Unknown action type: {action_type}. Skipping action.")
-                    log_model_issue(f"⚠️ Unknown action type attempted: {action_type}")
-                    # Route as a soft incident & try repair
                     try:
-                        route_exception(RuntimeError(f"Unknown action {action_type}"),
-                                        phase="action", context=context, extra={"action": action_type})
-                    except Exception:
-                        pass
-                    _ = try_auto_repair({"type": "UnknownAction",
-                                         "msg": str(action_type),
-                                         "trace": "",
-                                         "phase": "action"}, context)
-                    reward = 0.0
-                    feats = bandit_learn(str(action_type or "unknown_action"), context, reward)
-                    record_decision(str(action_type or "unknown_action"),
-                                    reason_string({"error": "unknown_action"}, reward, feats, "think.action"))
-                else:
-                    try:
-                        success = take_action(action, context, speaker)
-                        acted_this_cycle = bool(success)
-                        if success:
-                            context["last_action_ts"] = time.time()
-                            log_activity(f"🎤 Action Taken: {action_type}")
+                        if callable(fn):
+                            # NEW: invoke with args/kwargs if provided; else bind from context by signature
+                            _invoke_cognition(
+                                fn,
+                                fn_name,
+                                context,
+                                args=result.get("args") if isinstance(result, dict) else None,
+                                kwargs=result.get("kwargs") if isinstance(result, dict) else None,
+                            )
+                            log_activity(f"✅ Executed: {fn_name}")
+                            reward = 1.0
+                            feats = bandit_learn(fn_name, context, reward)
+                            record_decision(fn_name, reason_string({"status": "ok"}, reward, feats, "think.fn"))
                         else:
-                            log_error("⚠️ take_action returned False")
-                            log_pain(context, "frustration", increment=0.3)
-                        reward = 1.0 if success else 0.0
-                        feats = bandit_learn(action_type, context, reward)
-                        record_decision(action_type, reason_string({"success": success}, reward, feats, "think.action"))
+                            log_model_issue(f"⚠️ Unknown function requested: {fn_name}")
+                            try:
+                                route_exception(RuntimeError(f"Unknown function {fn_name}"),
+                                                phase="cognition", context=context, extra={"fn": fn_name})
+                            except Exception:
+                                pass
+                            _ = try_auto_repair({"type": "UnknownFunction",
+                                                 "msg": str(fn_name),
+                                                 "trace": "",
+                                                 "phase": "cognition"}, context)
+                            reward = 0.0
+                            feats = bandit_learn(fn_name, context, reward)
+                            record_decision(fn_name, reason_string({"error": "unknown_fn"}, reward, feats, "think.fn"))
                     except Exception as e:
-                        route_exception(e, phase="action", context=context)
+                        route_exception(e, phase="cognition", context=context, extra={"fn": fn_name})
                         _ = try_auto_repair({"type": e.__class__.__name__,
                                              "msg": str(e),
                                              "trace": "",
-                                             "phase": "action"}, context)
-                        log_error(f"❌ Action execution failed: {e}")
-                        log_pain(context, "frustration", increment=0.3)
+                                             "phase": "cognition"}, context)
+                        log_error(f"❌ Function {fn_name} crashed: {e}")
+                        log_private("⚠️ Pain signal: Function execution failed.")
+                        log_pain(context, "frustration", increment=0.3 + 0.3 * emotional_state.get("anger", 0.4))
                         reward = 0.0
-                        feats = bandit_learn(str(action_type or "unknown_action"), context, reward)
-                        record_decision(str(action_type or "unknown_action"),
-                                        reason_string({"error": str(e)}, reward, feats, "think.action"))
+                        feats = bandit_learn(fn_name, context, reward)
+                        record_decision(fn_name, reason_string({"error": str(e)}, reward, feats, "think.fn"))
+
+                # Path C: robust fallback (selector + registries)
+                else:
+                    log_model_issue("⚠️ No valid instruction returned by think(). Fallback to selector.")
+                    log_uncertainty_spike(context, increment=0.1)
+
+                    sel = None
+                    try:
+                        from think.think_utils.select_function import select_function
+                        sel = select_function(context)
+                    except Exception as _e:
+                        log_model_issue(f"select_function failed: {_e}")
+
+                    if not sel or not isinstance(sel, str):
+                        # Secondary fallback: self-reflection
+                        fb_meta_or_fn = COGNITIVE_FUNCTIONS.get("reflect_on_self_beliefs")
+                        fb_fn = (fb_meta_or_fn.get("function") if isinstance(fb_meta_or_fn, dict) else fb_meta_or_fn)
+                        if callable(fb_fn):
+                            try:
+                                fb_fn()
+                                log_activity("✅ Fallback executed: reflect_on_self_beliefs")
+                                reward = 1.0
+                            except Exception as e:
+                                route_exception(e, phase="cognition", context=context, extra={"fn": "reflect_on_self_beliefs"})
+                                _ = try_auto_repair({"type": e.__class__.__name__,
+                                                     "msg": str(e),
+                                                     "trace": "",
+                                                     "phase": "cognition"}, context)
+                                log_error(f"❌ Fallback function crashed: {e}")
+                                reward = 0.0
+                        else:
+                            log_model_issue("No fallback function available.")
+                            reward = 0.0
+                        feats = bandit_learn("reflect_on_self_beliefs", context, reward)
+                        record_decision("reflect_on_self_beliefs",
+                                        reason_string({"status": "fallback"}, reward, feats, "fallback.fn"))
+                    else:
+                        exec_result = execute_action_via_registries(sel, context, COG_MAP)
+                        reward = compute_reward(exec_result)
+                        feats = bandit_learn(sel, context, reward)
+                        record_decision(sel, reason_string(exec_result, reward, feats, "fallback.sel"))
+                        if isinstance(exec_result, dict) and exec_result.get("success"):
+                            acted_this_cycle = True
+                            context["last_action_ts"] = time.time()
 
-            # Path B: think() produced a next_function (cognition function)
-            elif isinstance(result, dict) and "next_function" in result:
-                fn_name = result["next_function"]
-                check_emotion_drift(max_cycles=10)
+                # ✅ Count any reflex actions taken inside action_gate this tick
+                acted_this_cycle = acted_this_cycle or bool(context.pop("__acted_this_tick__", False))
 
-                meta_or_fn = COGNITIVE_FUNCTIONS.get(fn_name)
-                fn = (meta_or_fn.get("function") if isinstance(meta_or_fn, dict) else meta_or_fn)
+                # Commit→Act guardrail accounting (only if a goal is committed)
+                try:
+                    if context.get("committed_goal"):
+                        context["action_debt"] = 0 if acted_this_cycle else int(context.get("action_debt", 0)) + 1
+                except Exception as _e:
+                    log_model_issue(f"Guardrail accounting issue: {_e}")
 
+                # Stall watchdog: minimum viable action if stuck
                 try:
-                    if callable(fn):
-                        # NEW: invoke with args/kwargs if provided; else bind from context by signature
-                        _invoke_cognition(
-                            fn,
-                            fn_name,
-                            context,
-                            args=result.get("args") if isinstance(result, dict) else None,
-                            kwargs=result.get("kwargs") if isinstance(result, dict) else None,
-                        )
-                        log_activity(f"✅ Executed: {fn_name}")
-                        reward = 1.0
-                        feats = bandit_learn(fn_name, context, reward)
-                        record_decision(fn_name, reason_string({"status": "ok"}, reward, feats, "think.fn"))
-                    else:
-                        log_model_issue(f"⚠️ Unknown function requested: {fn_name}")
-                        try:
-                            route_exception(RuntimeError(f"Unknown function {fn_name}"),
-                                            phase="cognition", context=context, extra={"fn": fn_name})
-                        except Exception:
-                            pass
-                        _ = try_auto_repair({"type": "UnknownFunction",
-                                             "msg": str(fn_name),
-                                             "trace": "",
-                                             "phase": "cognition"}, context)
-                        reward = 0.0
-                        feats = bandit_learn(fn_name, context, reward)
-                        record_decision(fn_name, reason_string({"error": "unknown_fn"}, reward, feats, "think.fn"))
-                except Exception as e:
-                    route_exception(e, phase="cognition", context=context, extra={"fn": fn_name})
-                    _ = try_auto_repair({"type": e.__class__.__name__,
-                                         "msg": str(e),
-                                         "trace": "",
-                                         "phase": "cognition"}, context)
-                    log_error(f"❌ Function {fn_name} crashed: {e}")
-                    log_private("⚠️ Pain signal: Function execution failed.")
-                    log_pain(context, "frustration", increment=0.3 + 0.3 * emotional_state.get("anger", 0.4))
-                    reward = 0.0
-                    feats = bandit_learn(fn_name, context, reward)
-                    record_decision(fn_name, reason_string({"error": str(e)}, reward, feats, "think.fn"))
-
-            # Path C: robust fallback (selector + registries)
-            else:
-                log_model_issue("⚠️ No valid instruction returned by think(). Fallback to selector.")
-                log_uncertainty_spike(context, increment=0.1)
-
-                sel = None
+                    STALL_SEC = 90
+                    now = time.time()
+                    if context.get("committed_goal"):
+                        last_ts = float(context.get("last_action_ts", 0.0) or 0.0)
+                        if (now - last_ts) > STALL_SEC:
+                            goal = context.get("committed_goal") or {}
+                            mv = goal.get("next_action")
+                            if isinstance(mv, dict):
+                                mv_type = mv.get("type")
+                                if mv_type in BEH_NAMES:
+                                    try:
+                                        ok = take_action(mv, context, context.get("speaker"))
+                                        if ok:
+                                            acted_this_cycle = True
+                                            context["last_action_ts"] = time.time()
+                                            context["action_debt"] = 0
+                                            log_activity(f"🧭 Watchdog executed MV action: {mv_type}")
+                                            feats = bandit_learn(mv_type, context, 1.0)
+                                            record_decision(mv_type, "watchdog executed minimum viable action")
+                                        else:
+                                            log_model_issue("Watchdog tried MV action; take_action returned False.")
+                                    except Exception as _e:
+                                        route_exception(_e, phase="action", context=context, extra={"mv_type": mv_type})
+                                        _ = try_auto_repair({"type": _e.__class__.__name__,
+                                                             "msg": str(_e),
+                                                             "trace": "",
+                                                             "phase": "action"}, context)
+                                        log_model_issue(f"Watchdog MV action failed: {_e}")
+                                else:
+                                    log_model_issue(f"Watchdog found MV action with unknown type: {mv_type}")
+                except Exception as _e:
+                    log_model_issue(f"Watchdog error: {_e}")
+
+                # Transparency trace
                 try:
-                    from think.think_utils.select_function import select_function
-                    sel = select_function(context)
+                    chosen = None
+                    if isinstance(result, dict):
+                        if "action" in result:
+                            a = result["action"]; chosen = f"ACTION:{a.get('type','unknown')}"
+                        elif "next_function" in result:
+                            chosen = f"FN:{result.get('next_function')}"
+                    emit_trace(
+                        chosen=chosen,
+                        debt=context.get("action_debt", 0),
+                        mode=context.get("mode"),
+                        emotions=context.get("emotional_state", {}),
+                        committed=bool(context.get("committed_goal")),
+                        last_action_ts=context.get("last_action_ts"),
+                        durability=durability_stats(),
+                        consolidation=consolidation.consolidation_stats(),
+                        embedding=embedding_stats(),
+                    )
                 except Exception as _e:
-                    log_model_issue(f"select_function failed: {_e}")
+                    log_model_issue(f"Trace cycle emit failed: {_e}")
 
-                if not sel or not isinstance(sel, str):
-                    # Secondary fallback: self-reflection
-                    fb_meta_or_fn = COGNITIVE_FUNCTIONS.get("reflect_on_self_beliefs")
-                    fb_fn = (fb_meta_or_fn.get("function") if isinstance(fb_meta_or_fn, dict) else fb_meta_or_fn)
-                    if callable(fb_fn):
-                        try:
-                            fb_fn()
-                            log_activity("✅ Fallback executed: reflect_on_self_beliefs")
-                            reward = 1.0
-                        except Exception as e:
-                            route_exception(e, phase="cognition", context=context, extra={"fn": "reflect_on_self_beliefs"})
-                            _ = try_auto_repair({"type": e.__class__.__name__,
-                                                 "msg": str(e),
-                                                 "trace": "",
-                                                 "phase": "cognition"}, context)
-                            log_error(f"❌ Fallback function crashed: {e}")
-                            reward = 0.0
-                    else:
-                        log_model_issue("No fallback function available.")
-                        reward = 0.0
-                    feats = bandit_learn("reflect_on_self_beliefs", context, reward)
-                    record_decision("reflect_on_self_beliefs",
-                                    reason_string({"status": "fallback"}, reward, feats, "fallback.fn"))
-                else:
-                    exec_result = execute_action_via_registries(sel, context, COG_MAP)
-                    reward = compute_reward(exec_result)
-                    feats = bandit_learn(sel, context, reward)
-                    record_decision(sel, reason_string(exec_result, reward, feats, "fallback.sel"))
-                    if isinstance(exec_result, dict) and exec_result.get("success"):
-                        acted_this_cycle = True
-                        context["last_action_ts"] = time.time()
-
-            # ✅ Count any reflex actions taken inside action_gate this tick
-            acted_this_cycle = acted_this_cycle or bool(context.pop("__acted_this_tick__", False))
-
-            # Commit→Act guardrail accounting (only if a goal is committed)
-            try:
-                if context.get("committed_goal"):
-                    context["action_debt"] = 0 if acted_this_cycle else int(context.get("action_debt", 0)) + 1
-            except Exception as _e:
-                log_model_issue(f"Guardrail accounting issue: {_e}")
-
-            # Stall watchdog: minimum viable action if stuck
-            try:
-                STALL_SEC = 90
-                now = time.time()
-                if context.get("committed_goal"):
-                    last_ts = float(context.get("last_action_ts", 0.0) or 0.0)
-                    if (now - last_ts) > STALL_SEC:
-                        goal = context.get("committed_goal") or {}
-                        mv = goal.get("next_action")
-                        if isinstance(mv, dict):
-                            mv_type = mv.get("type")
-                            if mv_type in BEH_NAMES:
-                                try:
-                                    ok = take_action(mv, context, context.get("speaker"))
-                                    if ok:
-                                        acted_this_cycle = True
-                                        context["last_action_ts"] = time.time()
-                                        context["action_debt"] = 0
-                                        log_activity(f"🧭 Watchdog executed MV action: {mv_type}")
-                                        feats = bandit_learn(mv_type, context, 1.0)
-                                        record_decision(mv_type, "watchdog executed minimum viable action")
-                                    else:
-                                        log_model_issue("Watchdog tried MV action; take_action returned False.")
-                                except Exception as _e:
-                                    route_exception(_e, phase="action", context=context, extra={"mv_type": mv_type})
-                                    _ = try_auto_repair({"type": _e.__class__.__name__,
-                                                         "msg": str(_e),
-                                                         "trace": "",
-                                                         "phase": "action"}, context)
-                                    log_model_issue(f"Watchdog MV action failed: {_e}")
-                            else:
-                                log_model_issue(f"Watchdog found MV action with unknown type: {mv_type}")
-            except Exception as _e:
-                log_model_issue(f"Watchdog error: {_e}")
-
-            # Transparency trace
-            try:
-                chosen = None
-                if isinstance(result, dict):
-                    if "action" in result:
-                        a = result["action"]; chosen = f"ACTION:{a.get('type','unknown')}"
-                    elif "next_function" in result:
-                        chosen = f"FN:{result.get('next_function')}"
-                emit_trace(
-                    chosen=chosen,
-                    debt=context.get("action_debt", 0),
-                    mode=context.get("mode"),
-                    emotions=context.get("emotional_state", {}),
-                    committed=bool(context.get("committed_goal")),
-                    last_action_ts=context.get("last_action_ts"),
-                )
-            except Exception as _e:
-                log_model_issue(f"Trace cycle emit failed: {_e}")
-
-            # Persist context safely each cycle
-            try:
-                save_json(CONTEXT, context)
-            except Exception as _e:
-                log_model_issue(f"Context save failed: {_e}")
+                # Persist context safely each cycle
+                try:
+                    save_json(CONTEXT, context)
+                except Exception as _e:
+                    log_model_issue(f"Context save failed: {_e}")
+
+            # Phase boundary: queued embedding requests shouldn't wait out the batch window
+            flush_embeddings()
+
+            # Idle phase: memory housekeeping queued during the cycle (promotion, summaries,
+            # pruning) runs here, committed as its own transaction
+            if consolidation.CONSOLIDATION_MODE == "idle":
+                try:
+                    with StateTransaction():
+                        consolidation.drain_consolidation(budget_s=consolidation.IDLE_BUDGET_S)
+                except Exception as _e:
+                    log_model_issue(f"Memory consolidation failed: {_e}")
 
             # Single-cycle dev mode
             if os.getenv("ORRIN_ONCE") == "1":
@@ -483,6 +513,8 @@ if __name__ == "__main__":
         except KeyboardInterrupt:
             print("\n🛑 Orrin loop stopped manually.")
             log_activity("Orrin loop manually interrupted by user.")
+            if save_memory_snapshot():
+                log_activity("Memory snapshot saved for the next start.")
             break
 
         except Exception as e:
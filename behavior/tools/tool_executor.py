@@ -7,6 +7,7 @@ from paths import TOOL_REQUESTS_FILE, LONG_MEMORY_FILE
 from behavior.tools.toolkit import tool_registry
 from utils.generate_response import generate_response
 from memory.working_memory import update_working_memory
+from memory.long_store import long_log_for
 from utils.emotion_utils import detect_emotion
 from utils.log import log_model_issue, log_private
 from utils.events import emit_event, ACTION_START, ACTION_END
@@ -56,7 +57,7 @@ def reflect_on_result(tool, reason, result):
 
 def execute_pending_tools():
     requests_data = load_json(TOOL_REQUESTS_FILE, default_type=list)
-    long_memory = load_json(LONG_MEMORY_FILE, default_type=list)
+    long_memory = long_log_for(LONG_MEMORY_FILE)
     updated = False
 
     for entry in requests_data:
@@ -83,9 +84,7 @@ def execute_pending_tools():
             "emotion": detect_emotion(reflection),
             "timestamp": timestamp
         }
-        long_memory.append(log_entry)
-        long_memory.append(reflection_entry)
-        save_json(LONG_MEMORY_FILE, long_memory)
+        long_memory.extend([log_entry, reflection_entry])
 
         update_working_memory(f"Tool `{tool}` executed: {reason} → {str(result)[:300]}")
         entry["executed"] = True
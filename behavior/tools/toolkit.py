@@ -13,6 +13,7 @@ import requests
 from bs4 import BeautifulSoup
 
 from utils.json_utils import load_json, save_json, extract_json
+from memory.long_store import long_log_for
 from utils.log import log_activity, log_error, log_model_issue, log_private
 from utils.core_utils import get_thinking_model
 from utils.generate_response import generate_response
@@ -291,10 +292,10 @@ def tool_thinking() -> None:
     Ask the model to propose tool uses based on recent memories.
     Appends merged suggestions to TOOL_REQUESTS_FILE.
     """
-    recent_long = load_json(LONG_MEMORY_FILE, default_type=list)
+    recent_long = long_log_for(LONG_MEMORY_FILE).load_recent(15)
     recent_work = load_json(WORKING_MEMORY_FILE, default_type=list)
 
-    recent_memories = (recent_long[-15:] if isinstance(recent_long, list) else []) + \
+    recent_memories = recent_long + \
                       (recent_work[-5:] if isinstance(recent_work, list) else [])
 
     bullet_lines = [
@@ -1,5 +1,5 @@
-import json
 from typing import Any, Dict, Optional
+from utils.json_utils import load_json
 from utils.log import log_error
 from paths import REFLECTION
 
@@ -30,21 +30,16 @@ def extract_last_reflection_topic(
                         return clean_snippet(content)
 
         # 2) Fallback: check reflection log file
-        try:
-            with open(reflection_log_path, "r", encoding="utf-8") as f:
-                reflections = json.load(f)
-            if isinstance(reflections, list):
-                for entry in reversed(reflections):
-                    if isinstance(entry, dict) and entry.get("type", "").lower() in {
-                        "reflection", "self_belief", "belief"
-                    }:
-                        content = (entry.get("content") or "").strip()
-                        if content:
-                            return clean_snippet(content)
-        except FileNotFoundError:
-            pass  # no reflection log yet is fine
-        except json.JSONDecodeError:
-            log_error("[extract_last_reflection_topic] Reflection log corrupted")
+        # (load_json serves the cached copy and tolerates a missing/corrupt log)
+        reflections = load_json(reflection_log_path, default_type=list)
+        if isinstance(reflections, list):
+            for entry in reversed(reflections):
+                if isinstance(entry, dict) and entry.get("type", "").lower() in {
+                    "reflection", "self_belief", "belief"
+                }:
+                    content = (entry.get("content") or "").strip()
+                    if content:
+                        return clean_snippet(content)
 
         # 3) Last resort: use emotional state
         emo = context.get("emotional_state")
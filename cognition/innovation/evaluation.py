@@ -9,6 +9,7 @@ from utils.generate_response import generate_response, get_thinking_model
 from utils.json_utils import extract_json, load_json, save_json
 from utils.log import log_error
 from memory.working_memory import update_working_memory
+from memory.long_store import long_log_for
 from utils.self_model import get_self_model
 from paths import PROPOSED_TOOLS_JSON, TOOL_EVALUATIONS_JSON, LONG_MEMORY_FILE
 
@@ -42,17 +43,12 @@ def evaluate_new_abstractions() -> str:
             log_error("❌ self_model is not a dict. Aborting tool evaluation.")
             return "❌ Invalid self model."
 
-        long_memory = load_json(LONG_MEMORY_FILE, default_type=list)
-        if not isinstance(long_memory, list):
-            update_working_memory("⚠️ LONG_MEMORY_FILE not a list; using empty.")
-            long_memory = []
-
         prior = load_json(TOOL_EVALUATIONS_JSON, default_type=list)
         if not isinstance(prior, list):
             prior = []
 
         evaluations: List[Dict[str, Any]] = []
-        recent_long = long_memory[-10:]
+        recent_long = long_log_for(LONG_MEMORY_FILE).load_recent(10)
 
         for tool in tools:
             # Skip junk entries gracefully
@@ -9,6 +9,7 @@ from utils.json_utils import load_json, extract_json
 from utils.self_model import get_self_model, save_self_model
 from utils.log import log_model_issue, log_private, log_error
 from utils.generate_response import generate_response, get_thinking_model
+from memory.long_store import long_log_for
 from paths import FEEDBACK_LOG, LONG_MEMORY_FILE
 
 
@@ -136,14 +137,14 @@ def self_model_maintenance_cycle() -> None:
 
 def self_supervised_repair() -> str:
     self_model = get_self_model()
-    long_memory = load_json(LONG_MEMORY_FILE, default_type=list)
+    long_memory = long_log_for(LONG_MEMORY_FILE).load_recent(12)
 
-    if not isinstance(self_model, dict) or not isinstance(long_memory, list):
+    if not isinstance(self_model, dict):
         return "❌ Missing or invalid state for repair."
 
     recent = [
         m.get("content")
-        for m in long_memory[-12:]
+        for m in long_memory
         if isinstance(m, dict) and isinstance(m.get("content"), str)
     ]
 
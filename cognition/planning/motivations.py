@@ -9,6 +9,7 @@ from utils.self_model import get_self_model, save_self_model, ensure_self_model_
 from utils.generate_response import generate_response, get_thinking_model
 from utils.log import log_model_issue
 from memory.working_memory import update_working_memory
+from memory.long_store import long_log_for
 from emotion.reward_signals.reward_signals import release_reward_signal
 from paths import (
     GOAL_TRAJECTORY_LOG_JSON,
@@ -35,13 +36,11 @@ def update_motivations() -> None:
         if not isinstance(self_model, dict):
             raise ValueError("self_model not a dict")
 
-        long_memory = load_json(LONG_MEMORY_FILE, default_type=list)
-        if not isinstance(long_memory, list):
-            long_memory = []
+        long_memory = long_log_for(LONG_MEMORY_FILE).load_recent(15)
 
         recent = [
             m.get("content")
-            for m in long_memory[-15:]
+            for m in long_memory
             if isinstance(m, dict) and isinstance(m.get("content"), str)
         ]
         core_values = self_model.get("core_values", [])
@@ -10,7 +10,7 @@ from typing import Any, Dict, List, Optional
 from memory.working_memory import update_working_memory
 from utils.log import log_private, log_error
 from utils.log_reflection import log_reflection
-from utils.json_utils import load_json, save_json
+from utils.json_utils import load_json, load_tail, save_json
 from utils.error_router import catch_and_route
 
 from paths import (
@@ -103,18 +103,17 @@ def reflect_on_cognition_patterns(n: int = 50) -> Optional[str]:
     Analyze recent cognition history to identify usage patterns, over/under-used functions,
     and shifting focus. Returns the plain-text summary on success; None on no data/error.
     """
-    history = load_json(COGNITION_HISTORY_FILE, default_type=list)
-    if not isinstance(history, list) or not history:
-        update_working_memory("⚠️ No cognition history to reflect on.")
-        return None
-
     # Defensive: n might be passed as non-int; also guard negative values
     try:
         n = max(1, int(n))
     except Exception:
         n = 50
 
-    recent_history = history[-n:]
+    recent_history = load_tail(COGNITION_HISTORY_FILE, n)
+    if not recent_history:
+        update_working_memory("⚠️ No cognition history to reflect on.")
+        return None
+
     usage: Counter[str] = Counter()
     satisfaction_by_fn: Dict[str, float] = {}
     count_by_fn: Dict[str, int] = {}
@@ -148,7 +147,7 @@ def reflect_on_cognition_patterns(n: int = 50) -> Optional[str]:
     }
 
     lines: List[str] = [
-        f"🧠 Cognition pattern summary over last {min(n, len(history))} cycles:",
+        f"🧠 Cognition pattern summary over last {len(recent_history)} cycles:",
         f"- Top used functions: {', '.join(f'{fn} ({count})' for fn, count in top_functions) or 'None'}",
         f"- Rarely used functions: {', '.join(rare_functions) or 'None'}",
         "- Average satisfaction by function:",
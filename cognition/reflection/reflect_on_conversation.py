@@ -1,25 +1,23 @@
 import os
-import json
 from datetime import datetime, timezone
 
 from utils.generate_response import generate_response, get_thinking_model
 from utils.log import log_private, log_error
 from utils.log_reflection import log_reflection
+from utils.json_utils import load_json
 from paths import CONTEXT, LOGS_DIR  # <- use paths, not hardcoded folder
 
 CONVERSATION_REFLECTION_LOG = os.path.join(LOGS_DIR, "conversation_reflection.log")
 
 def reflect_on_conversation_patterns():
     try:
-        # Load conversation context safely
-        try:
-            with open(CONTEXT, "r", encoding="utf-8") as f:
-                context = json.load(f)
-        except FileNotFoundError:
+        # Load conversation context safely (cached; may include this cycle's unflushed save)
+        context = load_json(CONTEXT, default_type=dict)
+        if not context:
             log_private("🧠 No CONTEXT file found; skipping conversation pattern reflection.")
             return
-        except Exception as e:
-            log_error(f"❌ Failed to read CONTEXT: {e}")
+        if not isinstance(context, dict):
+            log_error("❌ Failed to read CONTEXT: not a JSON object.")
             return
 
         history = context.get("conversation_history", [])
@@ -6,6 +6,7 @@ from utils.self_model import get_self_model, save_self_model
 from utils.generate_response import generate_response, get_thinking_model
 from utils.load_utils import load_all_known_json
 from memory.working_memory import update_working_memory
+from memory.long_store import long_log_for
 from utils.log import log_private, log_error
 from utils.log_reflection import log_reflection
 from paths import OUTCOMES_JSON, SELF_MODEL_BACKUP_JSON, PRIVATE_THOUGHTS_FILE, LONG_MEMORY_FILE, WORKING_MEMORY_FILE
@@ -89,16 +90,12 @@ def reflect_on_outcomes():
         log_reflection(f"Self-belief reflection: {reflection.strip()}")
 
         # Append reflection to long memory
-        long_memory = load_json(LONG_MEMORY_FILE, default_type=list)
-        if not isinstance(long_memory, list):
-            long_memory = []
-        long_memory.append({
+        long_log_for(LONG_MEMORY_FILE).append({
             "type": "reflection",
             "source": "reflect_on_outcomes",
             "content": reflection,
             "timestamp": _now_iso(),
         })
-        save_json(LONG_MEMORY_FILE, long_memory)
 
         # Mark the matching outcomes in the *full on-disk* list as reflected
         recent_keys = {_make_outcome_key(o) for o in recent_unreviewed}
@@ -145,11 +142,9 @@ def reflect_on_outcomes():
 def evaluate_recent_cognition():
     try:
         working_memory = load_json(WORKING_MEMORY_FILE, default_type=list)[-10:]
-        long_memory = load_json(LONG_MEMORY_FILE, default_type=list)[-20:]
+        long_memory = long_log_for(LONG_MEMORY_FILE).load_recent(20)
         if not isinstance(working_memory, list):
             working_memory = []
-        if not isinstance(long_memory, list):
-            long_memory = []
 
         recent_thoughts = [m["content"] for m in (working_memory + long_memory) if isinstance(m, dict) and "content" in m]
 
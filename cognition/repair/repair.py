@@ -10,6 +10,7 @@ from utils.log_reflection import log_reflection
 from utils.generate_response import generate_response, get_thinking_model
 from utils.load_utils import load_all_known_json
 from utils.feedback_log import log_feedback
+from memory.long_store import long_log_for
 from utils.response_utils import generate_response_from_context
 from cognition.reflection.reflect_on_cognition import update_cognition_schedule
 from emotion.reward_signals.reward_signals import release_reward_signal
@@ -122,10 +123,10 @@ def detect_contradiction():
     Returns the parsed contradictions JSON (or None/{} if not available).
     """
     # --- Get recent thoughts from long-term memory ---
-    long_memory = load_json(LONG_MEMORY_FILE, default_type=list)
+    long_memory = long_log_for(LONG_MEMORY_FILE).load_recent(10)
     recent_thoughts = "\n".join(
         m.get("content", "")
-        for m in (long_memory or [])[-10:]
+        for m in long_memory
         if isinstance(m, dict) and "content" in m
     )
 
@@ -197,12 +198,10 @@ def repair_contradictions():
 
     if not text:
         # Fallback: most recent long-memory content
-        long_memory = load_json(LONG_MEMORY_FILE, default_type=list)
-        if isinstance(long_memory, list):
-            for mem in reversed(long_memory):
-                if isinstance(mem, dict) and mem.get("content"):
-                    text = mem["content"]
-                    break
+        for mem in long_log_for(LONG_MEMORY_FILE).iter_query(batch=20):
+            if isinstance(mem, dict) and mem.get("content"):
+                text = mem["content"]
+                break
         if not text:
             text = "No recent contradiction or thought found."
 
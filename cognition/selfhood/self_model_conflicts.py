@@ -2,12 +2,13 @@ from datetime import datetime, timezone
 import json
 from typing import Any, Dict, List
 
-from utils.json_utils import load_json, extract_json
+from utils.json_utils import extract_json
 from utils.generate_response import generate_response, get_thinking_model
 from utils.self_model import get_self_model, save_self_model, ensure_self_model_integrity
 from utils.log import log_model_issue, log_error
 from paths import SELF_MODEL_FILE, LONG_MEMORY_FILE, PRIVATE_THOUGHTS_FILE, LOG_FILE
 from memory.working_memory import update_working_memory
+from memory.long_store import long_log_for
 
 
 def _coerce_model_dict(x: Any) -> Dict[str, Any]:
@@ -62,11 +63,11 @@ def _normalize_internal_agents(sm: Dict[str, Any]) -> None:
 
 def update_self_model():
     self_model = get_self_model()
-    long_memory = load_json(LONG_MEMORY_FILE, default_type=list)
-    if not isinstance(self_model, dict) or not isinstance(long_memory, list):
+    long_memory = long_log_for(LONG_MEMORY_FILE).load_recent(10)
+    if not isinstance(self_model, dict):
         return
 
-    recent = [m.get("content") for m in long_memory[-10:] if isinstance(m, dict) and "content" in m]
+    recent = [m.get("content") for m in long_memory if isinstance(m, dict) and "content" in m]
 
     # Ask for a compact PATCH, but allow fallback to full model.
     prompt = (
@@ -4,6 +4,7 @@ from utils.json_utils import load_json, save_json, extract_json
 from utils.log import log_model_issue, log_activity, log_private, log_error
 from utils.generate_response import generate_response, get_thinking_model
 from memory.working_memory import update_working_memory
+from memory.long_store import long_log_for
 from utils.self_model import get_core_values 
 from paths import WORLD_MODEL, LONG_MEMORY_FILE, CONCEPTS_FILE, WORLD_MODEL_RAW, WORLD_MODEL_BACKUP, WORLD_MODEL_ARCHIVE
 
@@ -22,10 +23,7 @@ def _clip(s, n=MAX_STR):
 
 def update_world_model():
     """Reflectively updates Orrin’s internal world model from recent thoughts."""
-    long_memory = load_json(LONG_MEMORY_FILE, default_type=list)[-15:]
-    if not isinstance(long_memory, list):
-        long_memory = []
-        log_error("LONG_MEMORY_FILE was not a list. Resetting to empty list.")
+    long_memory = long_log_for(LONG_MEMORY_FILE).load_recent(15)
     world_model = load_json(WORLD_MODEL, default_type=dict)
     if not isinstance(world_model, dict):
         world_model = {}
@@ -135,17 +133,14 @@ def update_world_model():
 
 def generate_concepts_from_memories():
     """Extracts emergent concepts from memory using reflection."""
-    long_memory = load_json(LONG_MEMORY_FILE, default_type=list)
-    if not isinstance(long_memory, list):
-        long_memory = []
-        log_error("LONG_MEMORY_FILE was not a list. Resetting to empty list.")
+    long_memory = long_log_for(LONG_MEMORY_FILE).load_recent(20)
 
     concepts = load_json(CONCEPTS_FILE, default_type=list)
     if not isinstance(concepts, list):
         concepts = []
         log_error("CONCEPTS_FILE was not a list. Resetting to empty list.")
 
-    recent = [m.get("content") for m in long_memory[-20:] if isinstance(m, dict) and "content" in m]
+    recent = [m.get("content") for m in long_memory if isinstance(m, dict) and "content" in m]
 
     prompt = (
         "I am a reflective AI building an internal worldview.\n"
@@ -4,6 +4,7 @@ from utils.log import log_model_issue
 from utils.generate_response import generate_response, get_thinking_model
 from utils.self_model import get_self_model
 from memory.working_memory import update_working_memory
+from memory.long_store import long_log_for
 from emotion.reflect_on_emotion_model import reflect_on_emotion_model
 from emotion.reward_signals.reward_signals import release_reward_signal
 from paths import WORKING_MEMORY_FILE, EMOTION_MODEL_FILE, CUSTOM_EMOTION, LONG_MEMORY_FILE
@@ -136,8 +137,7 @@ def discover_new_emotion(context=None):
 
         # --- Reflect on vocabulary model ---
         self_model = get_self_model()
-        lm = load_json(LONG_MEMORY_FILE, default_type=list)
-        memory = lm[-20:] if isinstance(lm, list) else []
+        memory = long_log_for(LONG_MEMORY_FILE).load_recent(20)
         reflect_on_emotion_model(context, self_model, memory)
 
     except Exception as e:
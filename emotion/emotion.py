@@ -17,15 +17,14 @@ from paths import (
 def investigate_unexplained_emotions(context, self_model, memory):
     from memory.working_memory import update_working_memory
     from emotion.reward_signals.reward_signals import release_reward_signal
+    from memory.long_store import long_log_for
     from datetime import datetime, timezone
 
     emotional_state = load_json(EMOTIONAL_STATE_FILE, default_type=dict)
     if not isinstance(emotional_state, dict):
         emotional_state = {}
 
-    long_memory = load_json(LONG_MEMORY_FILE, default_type=list)
-    if not isinstance(long_memory, list):
-        long_memory = []
+    long_memory = long_log_for(LONG_MEMORY_FILE).load_recent(20)
 
     config = load_json(MODEL_CONFIG_FILE, default_type=dict)
     if not isinstance(config, dict):
@@ -81,7 +80,7 @@ def investigate_unexplained_emotions(context, self_model, memory):
 
     past_reflections = [
         entry.get("content", "")
-        for entry in long_memory[-20:]
+        for entry in long_memory
         if isinstance(entry, dict) and entry.get("content")
     ]
     context_block = "\n".join(f"- {item}" for item in past_reflections)
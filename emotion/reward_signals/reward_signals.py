@@ -5,6 +5,7 @@ import random
 from emotion.reward_signals.reward_spike import log_reward_spike
 from utils.json_utils import save_json
 from utils.log import log_activity
+from utils.ring_buffer import ring_for
 from utils.signal_utils import create_signal
 from paths import EMOTIONAL_STATE_FILE, REWARD_TRACE
 
@@ -125,7 +126,7 @@ def release_reward_signal(
 
     # === Append to in-memory trace and persist ===
     noisy_strength = strength * random.uniform(0.85, 1.15)
-    reward_trace.append({
+    entry = {
         "type": signal_type,
         "strength": noisy_strength,
         "actual_reward": actual_reward,
@@ -135,13 +136,14 @@ def release_reward_signal(
         "tags": last_tags,
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "source": source,
-    })
+    }
+    reward_trace.append(entry)
     if len(reward_trace) > 50:
         reward_trace.pop(0)
 
-    # Persist emotional state + trace
+    # Persist emotional state + trace (the on-disk ring keeps the same last 50)
     save_json(EMOTIONAL_STATE_FILE, emotional_state)
-    save_json(REWARD_TRACE, reward_trace)
+    ring_for(REWARD_TRACE).append(entry)
 
     return context
 
@@ -193,7 +195,7 @@ def decay_reward_trace(context, base_decay_rate=0.015):
 
     context["reward_trace"] = new_trace
     # persist decayed buffer so it survives restarts
-    save_json(REWARD_TRACE, new_trace)
+    ring_for(REWARD_TRACE).replace(new_trace)
     return context
 
 
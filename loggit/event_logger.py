@@ -6,6 +6,7 @@ from enum import Enum
 from pathlib import Path
 
 from paths import EVENTS_FILE 
+from utils.durability import append_stream
 
 EVENTS_PATH = Path(EVENTS_FILE)
 EVENTS_PATH.parent.mkdir(parents=True, exist_ok=True)
@@ -34,7 +35,6 @@ def log_event(kind: EventKind | str, **payload) -> dict:
         **payload,
     }
 
-    with EVENTS_PATH.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    append_stream(EVENTS_PATH, json.dumps(rec, ensure_ascii=False) + "\n")
 
     return rec
\ No newline at end of file
@@ -0,0 +1,16 @@
+# Long-term memory is stored as an append-only log (memory/long_store.py), working
+# memory is kept resident (memory/working_store.py) and the chat log is append-only
+# JSONL (utils/jsonl_log.py); plain load_json/save_json calls on their files are
+# routed through them.
+from paths import (
+    CHAT_LOG_FILE as _CHAT_LOG_FILE,
+    LONG_MEMORY_FILE as _LONG_MEMORY_FILE,
+    WORKING_MEMORY_FILE as _WORKING_MEMORY_FILE,
+)
+from memory.long_store import register_long_memory as _register_long_memory
+from memory.working_store import register_working_memory as _register_working_memory
+from utils.jsonl_log import register_jsonl_log as _register_jsonl_log
+
+_register_long_memory(_LONG_MEMORY_FILE)
+_register_working_memory(_WORKING_MEMORY_FILE)
+_register_jsonl_log(_CHAT_LOG_FILE)
@@ -6,14 +6,23 @@ from typing import Any, Dict, Optional, Union
 
 from emotion.emotion import detect_emotion
 import paths
-from utils.append import append_to_json
+from memory.long_store import long_log_for
 from utils.generate_response import generate_response
 from utils.json_utils import load_json, save_json
+from utils.jsonl_log import jsonl_log_for
 from utils.log import log_error
 
 # Tokens that will cause an entry to be ignored when logging
 _NOISE_TOKENS = {"—", "-", "--", "---"}
 
+# The chat log is an append-only JSONL file (utils/jsonl_log.py). Summarization keeps a
+# cursor (<stem>.cursor.json) to the first message not yet rolled out of the window
+# instead of trimming the file; the summarized prefix is dropped in one rewrite once
+# it reaches CHAT_LOG_COMPACT_AT messages.
+CHAT_SUMMARY_WINDOW: int = 20   # messages per summary
+CHAT_SUMMARY_STEP: int = 10     # messages the window advances per summary
+CHAT_LOG_COMPACT_AT: int = 500
+
 
 def get_user_input() -> str:
     """
@@ -61,7 +70,7 @@ def log_user_message(content: str) -> None:
     Append a single user message to the chat log if it is not noise.
     """
     if not _is_noise(content):
-        append_to_json(paths.CHAT_LOG_FILE, _create_chat_entry("user", content))
+        jsonl_log_for(paths.CHAT_LOG_FILE).append(_create_chat_entry("user", content))
 
 
 def log_dialogue_pair(user: str, orrin: str, timestamp: Optional[str] = None) -> None:
@@ -70,10 +79,10 @@ def log_dialogue_pair(user: str, orrin: str, timestamp: Optional[str] = None) ->
     consist only of dashes, or where Orrin’s reply is '(no reply)' are skipped.
     """
     if not _is_noise(user):
-        append_to_json(paths.CHAT_LOG_FILE, _create_chat_entry("user", user, timestamp))
+        jsonl_log_for(paths.CHAT_LOG_FILE).append(_create_chat_entry("user", user, timestamp))
     orrin_stripped = orrin.strip()
     if orrin_stripped.lower() not in {"(no reply)", ""} and not _is_noise(orrin_stripped):
-        append_to_json(paths.CHAT_LOG_FILE, _create_chat_entry("orrin", orrin_stripped, timestamp))
+        jsonl_log_for(paths.CHAT_LOG_FILE).append(_create_chat_entry("orrin", orrin_stripped, timestamp))
 
 
 def log_raw_user_input(entry: Union[str, Dict[str, str]]) -> None:
@@ -101,20 +110,21 @@ def summarize_chat_to_long_memory(
     long_memory_file: Union[str, Path],
 ) -> None:
     """
-    Every 5 cycles, summarize the last 20 chat messages into a single long-term memory entry.
-    After summarizing, the oldest 10 chat entries are trimmed from the log.
+    Every 5 cycles, summarize the last 20 chat messages into a single long-term memory entry
+    once 20 messages are past the summary cursor. After summarizing, the cursor moves past
+    the oldest 10 of them; the log itself is only appended to.
     """
     if cycle_count % 5:
         return
 
     try:
-        chat_log: list[dict[str, Any]] = load_json(chat_log_file, default_type=list)
-        if not isinstance(chat_log, list):
-            chat_log = []
-        if len(chat_log) < 20:
+        chat_log = jsonl_log_for(chat_log_file)
+        cursor_file = Path(chat_log_file).with_name(f"{Path(chat_log_file).stem}.cursor.json")
+        cursor = min(int(load_json(cursor_file, default_type=dict).get("cursor", 0) or 0), len(chat_log))
+        if len(chat_log) - cursor < CHAT_SUMMARY_WINDOW:
             return
 
-        recent_chats = chat_log[-20:]
+        recent_chats = chat_log.tail(CHAT_SUMMARY_WINDOW)
         chat_text = "\n".join(str(entry.get("content", "")) for entry in recent_chats)
 
         prompt = (
@@ -138,10 +148,6 @@ def summarize_chat_to_long_memory(
         dominant_emotion = max(set(labels), key=labels.count) if labels else "neutral"
 
         # Build and save the new long-term memory record
-        long_memory: list[dict[str, Any]] = load_json(long_memory_file, default_type=list)
-        if not isinstance(long_memory, list):
-            long_memory = []
-
         new_memory = {
             "content": summary.strip(),
             "emotion": dominant_emotion,
@@ -156,11 +162,13 @@ def summarize_chat_to_long_memory(
             "recall_count": 0,
             "related_memory_ids": [entry.get("id") for entry in recent_chats if entry.get("id")],
         }
-        long_memory.append(new_memory)
-        save_json(long_memory_file, long_memory)
+        long_log_for(long_memory_file).append(new_memory)
 
-        # Trim the oldest 10 entries from the chat log
-        save_json(chat_log_file, chat_log[10:])
+        # Roll the window forward; drop the summarized prefix only once it has grown large
+        cursor += CHAT_SUMMARY_STEP
+        if cursor >= CHAT_LOG_COMPACT_AT:
+            cursor -= chat_log.drop_before(cursor)
+        save_json(cursor_file, {"cursor": cursor})
 
     except Exception as exc:
         log_error(f"Error summarizing chat to long memory: {exc}")
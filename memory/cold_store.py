@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+import numpy as np
+
+from memory.ann_index import ANN_CANDIDATES, index_for
+from memory.embedding_store import entry_embedding, store_for
+from utils.durability import sync_before_replace, sync_replaced
+from utils.json_utils import _json_default, in_transaction, join_transactions, load_json, save_json
+from utils.log import log_error
+
+# Cold tier below long memory. prune_long_memory demotes the entries it evicts here
+# instead of deleting them, so old facts stay retrievable while the warm store stays
+# at MAX_LONG_MEMORY:
+#   <stem>_cold/seg-NNNNNN.jsonl.zst|.gz   write-once compressed batches of entries
+#   <stem>_cold/manifest.json              {"segments": [...], "ids": {memory id -> segment}}
+#   <stem>_cold/cold.emb.* / cold.ann.*    the tier's own EmbeddingStore and ANN index
+# recall_relevant_knowledge only searches it when nothing warm is similar enough
+# (COLD_RECALL_THRESHOLD); a recalled cold entry moves back to long memory.
+# Inside a StateTransaction the manifest is buffered like any state file and emptied
+# segments are only deleted on commit; a rollback re-reads the manifest and removes the
+# segments the transaction wrote.
+
+try:
+    import zstandard  # type: ignore
+except Exception:
+    zstandard = None  # type: ignore
+
+COLD_CODEC: str = "zstd" if zstandard is not None else "gzip"
+COLD_RECALL_THRESHOLD: float = float(os.getenv("ORRIN_COLD_RECALL_THRESHOLD", "0.35"))
+COLD_CACHED_SEGMENTS: int = 4    # decompressed segments kept in memory
+
+_EXT = {"zstd": "zst", "gzip": "gz"}
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(data: bytes, name: str) -> bytes:
+    if name.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return gzip.decompress(data)
+
+
+class ColdArchive:
+    """Compressed, append-only archive of demoted entries for one memory file."""
+
+    def __init__(self, json_path: Union[str, Path]) -> None:
+        base = Path(json_path)
+        self.dir = base.parent / f"{base.with_suffix('').name}_cold"
+        self.vector_path = self.dir / "cold.json"   # anchors the tier's vector store and index
+        self.manifest_path = self.dir / "manifest.json"
+        self._lock = threading.RLock()
+        self._cache: "OrderedDict[str, Dict[str, Dict[str, Any]]]" = OrderedDict()
+        self._load_manifest()
+        self._dirty = False              # changed by the open transaction
+        self._created: List[str] = []    # segments it wrote
+        self._doomed: List[str] = []     # segments it emptied (deleted on commit)
+        join_transactions(self)
+
+    def _load_manifest(self) -> None:
+        manifest = load_json(self.manifest_path, default_type=dict)
+        self._segments: List[str] = [str(s) for s in manifest.get("segments", [])]
+        self._where: Dict[str, str] = {str(k): str(v) for k, v in (manifest.get("ids") or {}).items()}
+        self._cache.clear()
+
+    def _save_manifest(self) -> None:
+        save_json(self.manifest_path, {"segments": self._segments, "ids": self._where})
+
+    def _segment(self, name: str) -> Dict[str, Dict[str, Any]]:
+        rows = self._cache.get(name)
+        if rows is not None:
+            self._cache.move_to_end(name)
+            return rows
+        rows = {}
+        try:
+            for line in _decompress((self.dir / name).read_bytes(), name).splitlines():
+                if line.strip():
+                    e = json.loads(line)
+                    rows[str(e.get("id"))] = e
+        except Exception as e:
+            log_error(f"[cold_store] could not read {name}: {e}")
+        self._cache[name] = rows
+        while len(self._cache) > COLD_CACHED_SEGMENTS:
+            self._cache.popitem(last=False)
+        return rows
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def demote(self, entries: Iterable[Dict[str, Any]], source_path: Union[str, Path]) -> int:
+        """
+        Archive `entries` as one new segment, copying their vectors out of `source_path`'s
+        store. The caller deletes them from the warm tier afterwards. Returns how many moved.
+        """
+        with self._lock:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            store = store_for(self.vector_path)
+            batch = []
+            for e in entries:
+                if not isinstance(e, dict) or not e.get("id"):
+                    continue
+                vec = entry_embedding(e, source_path)
+                row = {k: v for k, v in e.items() if k not in ("embedding", "embedding_row")}
+                if vec is not None and vec.size:
+                    store.put(str(row["id"]), vec)
+                batch.append(row)
+            if not batch:
+                return 0
+
+            last = max((int(s.split("-")[1].split(".")[0]) for s in self._segments), default=0)
+            name = f"seg-{last + 1:06d}.jsonl.{_EXT[COLD_CODEC]}"
+            data = b"".join(
+                json.dumps(r, ensure_ascii=False, default=_json_default).encode("utf-8") + b"\n" for r in batch
+            )
+            tmp = self.dir / f".{name}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(_compress(data, COLD_CODEC))
+                sync_before_replace(f)
+            os.replace(tmp, self.dir / name)
+            sync_replaced(self.dir / name)
+
+            self._segments.append(name)
+            for r in batch:
+                self._where[str(r["id"])] = name
+            if in_transaction():
+                self._dirty = True
+                self._created.append(name)
+            self._save_manifest()
+            return len(batch)
+
+    def get_many(self, ids: Iterable[Any]) -> List[Dict[str, Any]]:
+        """Archived entries for `ids` (missing ids skipped)."""
+        with self._lock:
+            out = []
+            for mid in dict.fromkeys(str(i) for i in ids):
+                name = self._where.get(mid)
+                row = self._segment(name).get(mid) if name else None
+                if row is not None:
+                    out.append(dict(row))
+            return out
+
+    def search(self, q: Any, k: int) -> List[Tuple[float, Dict[str, Any]]]:
+        """The `k` archived entries most cosine-similar to `q`, best first, with their similarity."""
+        with self._lock:
+            store = store_for(self.vector_path)
+            q = np.asarray(q, dtype=np.float32).ravel()
+            norm = float(np.linalg.norm(q))
+            if k <= 0 or not self._where or norm == 0.0 or store.dim != q.size:
+                return []
+            q = q / norm
+            ids = index_for(self.vector_path).search_ids(q, k=max(ANN_CANDIDATES, 8 * int(k)))
+            if ids is None:
+                ids = store.ids
+            pairs = [(mid, store.row_of(mid)) for mid in ids if mid in self._where]
+            pairs = [(mid, r) for mid, r in pairs if r is not None]
+            if not pairs:
+                return []
+            sims = store.normalized()[np.asarray([r for _, r in pairs])] @ q
+            order = np.argsort(-sims, kind="stable")[:k]
+            found = {str(e["id"]): e for e in self.get_many(pairs[i][0] for i in order)}
+            return [(float(sims[i]), found[pairs[i][0]]) for i in order if pairs[i][0] in found]
+
+    def take(self, ids: Iterable[Any]) -> List[Dict[str, Any]]:
+        """
+        Remove `ids` from the archive and return them with their vector inline (as
+        "embedding"), ready to be written back to a warmer tier.
+        """
+        with self._lock:
+            store = store_for(self.vector_path)
+            out = self.get_many(ids)
+            for e in out:
+                vec = store.vector({"id": e["id"]})
+                if vec is not None:
+                    e["embedding"] = np.asarray(vec, dtype=np.float32).tolist()
+                self._where.pop(str(e["id"]), None)
+            if not out:
+                return out
+
+            # Segments with nothing left in them are deleted; dead vectors are compacted away
+            live = set(self._where.values())
+            emptied = [s for s in self._segments if s not in live]
+            for name in emptied:
+                self._segments.remove(name)
+                self._cache.pop(name, None)
+            if in_transaction():
+                self._dirty = True
+                self._doomed.extend(emptied)
+            else:
+                self._unlink(emptied)
+            self._save_manifest()
+            if store.maybe_compact([{"id": mid} for mid in self._where]):
+                index_for(self.vector_path).rebuild()
+            return out
+
+    def _unlink(self, names: List[str]) -> None:
+        for name in names:
+            try:
+                (self.dir / name).unlink()
+            except OSError:
+                pass
+
+    # ---- StateTransaction hooks ----
+    def commit(self) -> None:
+        with self._lock:
+            doomed = self._doomed
+            self._dirty, self._created, self._doomed = False, [], []
+            self._unlink(doomed)
+
+    def rollback(self) -> None:
+        """Re-read the manifest (its buffered save was discarded) and drop the segments written since."""
+        with self._lock:
+            if not self._dirty:
+                return
+            created = self._created
+            self._dirty, self._created, self._doomed = False, [], []
+            self._load_manifest()
+            self._unlink([s for s in created if s not in self._segments])
+
+
+_ARCHIVES: Dict[str, ColdArchive] = {}
+_ARCHIVES_LOCK = threading.Lock()
+
+
+def cold_for(json_path: Union[str, Path]) -> ColdArchive:
+    """The (process-wide) cold archive below memory file `json_path`."""
+    key = os.path.abspath(os.fspath(json_path))
+    with _ARCHIVES_LOCK:
+        archive = _ARCHIVES.get(key)
+        if archive is None:
+            archive = ColdArchive(key)
+            _ARCHIVES[key] = archive
+        return archive
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import importlib
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from paths import CONSOLIDATION_QUEUE_FILE
+from utils.json_utils import in_transaction, join_transactions, load_json, save_json
+from utils.log import log_error
+
+# Memory housekeeping (promoting evicted working memory, summarising, pruning long
+# memory) is queued here instead of running inside the write that triggered it.
+# Jobs are named, JSON-serializable and persisted with the other state files, so
+# a working-memory eviction and the job that promotes it commit together. They run
+# strictly in submission order, one at a time, when the queue is drained
+# (ORRIN_CONSOLIDATION):
+#   idle    between cognition cycles, by the main loop (default)
+#   thread  by a background worker as soon as jobs arrive
+#   inline  immediately by submit() (the old synchronous behaviour)
+# Jobs submitted inside a StateTransaction (except inline) are held back until it
+# commits; if it rolls back, the queue is re-read from its file, so it loses the jobs
+# the cycle added and gets back the ones it ran.
+
+CONSOLIDATION_MODES = ("idle", "thread", "inline")
+CONSOLIDATION_MODE: str = os.getenv("ORRIN_CONSOLIDATION", "idle").strip().lower()
+IDLE_BUDGET_S: float = float(os.getenv("ORRIN_CONSOLIDATION_BUDGET_S", "5"))
+MAX_ATTEMPTS: int = 3
+
+if CONSOLIDATION_MODE not in CONSOLIDATION_MODES:
+    CONSOLIDATION_MODE = "idle"
+
+# kind -> callable, or "module:function" resolved when the job runs
+JOB_HANDLERS: Dict[str, Union[str, Callable[..., Any]]] = {
+    "promote_working_memory": "memory.summarize_w_memory:summarize_and_promote_working_memory",
+    "prune_long_memory": "memory.long_memory:prune_long_memory",
+    "cluster_long_memory": "memory.topics:recluster_long_memory",
+}
+
+
+def _handler(kind: str) -> Callable[..., Any]:
+    target = JOB_HANDLERS[kind]
+    if callable(target):
+        return target
+    module, _, attr = target.partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+
+class ConsolidationQueue:
+    """FIFO of housekeeping jobs persisted in one JSON file; drained by a single runner at a time."""
+
+    def __init__(self, json_path: Union[str, Path]) -> None:
+        self.json_path = json_path
+        self._lock = threading.Lock()        # guards the job list and counters
+        self._run_lock = threading.Lock()    # one drain at a time keeps jobs in order
+        self._runner: Optional[int] = None   # thread id of the active drain
+        self._jobs: Optional[List[Dict[str, Any]]] = None
+        self._staged: List[Dict[str, Any]] = []   # submitted by the open transaction
+        self._touched = False                    # the open transaction changed the queue
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.last_job_ms = 0.0
+        join_transactions(self)
+
+    def _pending(self) -> List[Dict[str, Any]]:
+        if self._jobs is None:
+            jobs = load_json(self.json_path, default_type=list)
+            self._jobs = [j for j in jobs if isinstance(j, dict) and j.get("kind")]
+        return self._jobs
+
+    def _save(self) -> None:
+        if not in_transaction():   # e.g. the worker: written through, so no held jobs
+            save_json(self.json_path, self._pending())
+            return
+        self._touched = True
+        save_json(self.json_path, self._pending() + self._staged)
+
+    def submit(self, kind: str, *args: Any, coalesce: bool = False, **kwargs: Any) -> bool:
+        """
+        Queue `kind(*args, **kwargs)`. With `coalesce`, nothing is added while a job of
+        the same kind is still pending. Returns True if a job was added.
+        """
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"unknown consolidation job: {kind!r}")
+        held = CONSOLIDATION_MODE != "inline" and in_transaction()
+        with self._lock:
+            jobs = self._pending()
+            if coalesce and any(j["kind"] == kind for j in jobs + self._staged):
+                self.coalesced += 1
+                return False
+            (self._staged if held else jobs).append({
+                "id": str(uuid.uuid4()),
+                "kind": kind,
+                "args": list(args),
+                "kwargs": kwargs,
+                "submitted": datetime.now(timezone.utc).isoformat(),
+                "attempts": 0,
+            })
+            self.submitted += 1
+            self.max_depth = max(self.max_depth, len(jobs) + len(self._staged))
+            self._save()
+
+        if held:
+            return True   # commit() releases it
+        if CONSOLIDATION_MODE == "inline":
+            if self._runner != threading.get_ident():  # a running job's follow-ups wait their turn
+                self.drain()
+        elif CONSOLIDATION_MODE == "thread":
+            self._ensure_thread()
+            self._wake.set()
+        return True
+
+    def drain(self, budget_s: Optional[float] = None, max_jobs: Optional[int] = None) -> int:
+        """
+        Run pending jobs oldest first until the queue is empty, `max_jobs` ran, or
+        `budget_s` seconds passed (a running job is never interrupted). A failing job
+        stops the drain so later jobs never overtake it; it is dropped after
+        MAX_ATTEMPTS. Returns the number of jobs completed.
+        """
+        done = 0
+        deadline = None if budget_s is None else time.monotonic() + budget_s
+        with self._run_lock:
+            self._runner = threading.get_ident()
+            try:
+                while max_jobs is None or done < max_jobs:
+                    if deadline is not None and time.monotonic() >= deadline:
+                        break
+                    with self._lock:
+                        jobs = self._pending()
+                        if not jobs:
+                            break
+                        job = jobs[0]
+                        job["attempts"] = int(job.get("attempts", 0)) + 1
+                    t0 = time.perf_counter()
+                    try:
+                        _handler(job["kind"])(*job.get("args", []), **job.get("kwargs", {}))
+                        ok = True
+                    except Exception as e:
+                        ok = False
+                        log_error(f"[consolidation] {job['kind']} failed (attempt {job['attempts']}): {e}")
+                    with self._lock:
+                        self.last_job_ms = (time.perf_counter() - t0) * 1e3
+                        if ok or job["attempts"] >= MAX_ATTEMPTS:
+                            # by id: a rollback may have re-read the list meanwhile
+                            self._jobs = [j for j in self._pending() if j.get("id") != job.get("id")]
+                        if ok:
+                            self.completed += 1
+                            done += 1
+                        else:
+                            self.failed += 1
+                        self._save()
+                    if not ok:
+                        break
+            finally:
+                self._runner = None
+        return done
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="memory-consolidation", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            self.drain()
+
+    # ---- StateTransaction hooks ----
+    def commit(self) -> None:
+        with self._lock:
+            staged, self._staged, self._touched = self._staged, [], False
+            if not staged:
+                return
+            self._pending().extend(staged)
+            self._save()   # again: a worker may have saved the queue since the cycle did
+        if CONSOLIDATION_MODE == "thread":
+            self._ensure_thread()
+            self._wake.set()
+
+    def rollback(self) -> None:
+        with self._lock:
+            touched = self._touched
+            self._staged, self._touched = [], False
+            if touched:
+                self._jobs = None   # its saves were discarded; the file holds the queue as it was
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending()) + len(self._staged)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            jobs = self._pending()
+            jobs = jobs + self._staged
+            return {
+                "mode": CONSOLIDATION_MODE,
+                "depth": len(jobs),
+                "max_depth": self.max_depth,
+                "oldest": jobs[0].get("submitted") if jobs else None,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "coalesced": self.coalesced,
+                "last_job_ms": round(self.last_job_ms, 3),
+            }
+
+
+_QUEUE = ConsolidationQueue(CONSOLIDATION_QUEUE_FILE)
+
+
+def submit_consolidation(kind: str, *args: Any, coalesce: bool = False, **kwargs: Any) -> bool:
+    """Queue a housekeeping job (see JOB_HANDLERS) on the process-wide queue."""
+    return _QUEUE.submit(kind, *args, coalesce=coalesce, **kwargs)
+
+
+def drain_consolidation(budget_s: Optional[float] = None, max_jobs: Optional[int] = None) -> int:
+    """Run pending housekeeping jobs now (the main loop calls this between cycles)."""
+    return _QUEUE.drain(budget_s=budget_s, max_jobs=max_jobs)
+
+
+def consolidation_stats() -> Dict[str, Any]:
+    """Queue depth and job counters of the process-wide queue."""
+    return _QUEUE.stats()
@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+from utils.durability import sync_file
+from utils.json_utils import join_transactions, load_json, save_json
+from utils.log import log_error
+
+# Memory JSON files keep only an "embedding_row" per entry; the vectors live in a
+# memory-mapped matrix next to the JSON file:
+#   <stem>.emb.json        header: {"dim", "dtype", "generation", "ids": [row -> memory id]}
+#   <stem>.emb.<gen>.bin   raw row-major matrix, append-only between compactions
+#   <stem>.emb.<gen>.ids   ids of rows appended since the header was written, one per line
+# Rows are never overwritten in place; compact() writes a new generation, so a crash
+# before the header is flushed still leaves the previous header/matrix pair intact.
+# put() only appends a line to the ids log; the header (with every id) is rewritten
+# when a compaction starts a new generation. If a StateTransaction that changed the
+# generation rolls back, its header save is discarded and the store re-opens from disk.
+
+EMBEDDING_DTYPE: str = "float32"   # "float16" halves the file at a small precision cost
+_MIN_CAPACITY: int = 64
+
+
+class EmbeddingStore:
+    """Row store of embeddings for one memory file, keyed by memory id."""
+
+    def __init__(self, json_path: Union[str, Path], dtype: str = EMBEDDING_DTYPE) -> None:
+        base = Path(json_path)
+        self._stem = base.with_suffix("").name
+        self._dir = base.parent
+        self.header_path = self._dir / f"{self._stem}.emb.json"
+        self._lock = threading.RLock()
+        self._load(dtype)
+        self._sweep()
+        self._began: Optional[tuple] = None   # (generation, dim) when a transaction began
+        join_transactions(self)
+
+    def _load(self, dtype: str) -> None:
+        header = load_json(self.header_path, default_type=dict)
+        if not isinstance(header, dict):
+            header = {}
+        self.dim: int = int(header.get("dim") or 0)
+        self.dtype = np.dtype(header.get("dtype") or dtype)
+        self.generation: int = int(header.get("generation") or 0)
+        self.ids: List[str] = [str(i) for i in (header.get("ids") or [])]
+        self.ids.extend(self._read_ids_log())
+        self._rows: Dict[str, int] = {mid: i for i, mid in enumerate(self.ids)}
+        self._mm: Optional[np.memmap] = None
+        self._unit: Optional[np.ndarray] = None
+        self._unit_key: Optional[tuple] = None
+        self._open()
+
+    # ---- files ----
+    def matrix_path(self, generation: Optional[int] = None) -> Path:
+        gen = self.generation if generation is None else generation
+        return self._dir / f"{self._stem}.emb.{gen}.bin"
+
+    @property
+    def _row_bytes(self) -> int:
+        return self.dim * self.dtype.itemsize
+
+    @property
+    def capacity(self) -> int:
+        return 0 if self._mm is None else int(self._mm.shape[0])
+
+    def ids_log_path(self, generation: Optional[int] = None) -> Path:
+        gen = self.generation if generation is None else generation
+        return self._dir / f"{self._stem}.emb.{gen}.ids"
+
+    def _read_ids_log(self) -> List[str]:
+        """Ids appended since the header; a torn final line (crash mid-append) is cut off."""
+        try:
+            with open(self.ids_log_path(), "rb+") as f:
+                data = f.read()
+                end = data.rfind(b"\n") + 1
+                if end != len(data):
+                    f.truncate(end)
+        except FileNotFoundError:
+            return []
+        return data[:end].decode("utf-8").splitlines()
+
+    def _append_ids_log(self, mem_id: str) -> None:
+        path = self.ids_log_path()
+        with open(path, "ab") as f:
+            f.write(mem_id.encode("utf-8") + b"\n")
+            sync_file(f, path)
+
+    def _drop_ids_log(self, generation: int) -> None:
+        try:
+            self.ids_log_path(generation).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _open(self) -> None:
+        self._mm = None
+        if self.dim <= 0:
+            return
+        path = self.matrix_path()
+        size = path.stat().st_size if path.exists() else 0
+        if size < len(self.ids) * self._row_bytes:
+            log_error(f"[embedding_store] {path.name} is shorter than its header; resetting store.")
+            self.ids, self._rows = [], {}
+            self._save_header()
+            self._drop_ids_log(self.generation)
+        cap = size // self._row_bytes if self._row_bytes else 0
+        if cap > 0:
+            self._mm = np.memmap(path, dtype=self.dtype, mode="r+", shape=(cap, self.dim))
+
+    def _ensure_capacity(self, rows: int) -> None:
+        if rows <= self.capacity:
+            return
+        new_cap = max(rows, self.capacity * 2, _MIN_CAPACITY)
+        path = self.matrix_path()
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm = None
+        # Growing in place only appends zero bytes; existing rows are untouched
+        with open(path, "ab") as f:
+            f.truncate(new_cap * self._row_bytes)
+        self._mm = np.memmap(path, dtype=self.dtype, mode="r+", shape=(new_cap, self.dim))
+
+    def _save_header(self) -> None:
+        save_json(self.header_path, {
+            "dim": self.dim,
+            "dtype": self.dtype.name,
+            "generation": self.generation,
+            "ids": list(self.ids),   # a snapshot: later put()s go to the ids log only
+        })
+
+    def _sweep(self) -> None:
+        """Remove matrix and ids-log files from generations older than the previous one."""
+        keep = {self.matrix_path().name, self.matrix_path(self.generation - 1).name, self.ids_log_path().name}
+        for p in [*self._dir.glob(f"{self._stem}.emb.*.bin"), *self._dir.glob(f"{self._stem}.emb.*.ids")]:
+            if p.name not in keep:
+                try:
+                    p.unlink()
+                except OSError:
+                    pass
+
+    # ---- StateTransaction hooks ----
+    def begin(self) -> None:
+        self._began = (self.generation, self.dim)
+
+    def commit(self) -> None:
+        self._began = None
+
+    def rollback(self) -> None:
+        with self._lock:
+            began, self._began = self._began, None
+            if began is not None and began != (self.generation, self.dim):
+                self._load(self.dtype.name)
+
+    # ---- API ----
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def put(self, mem_id: str, vector: Any) -> Optional[int]:
+        """Append `vector` for `mem_id` and return its row (None if empty/mismatched)."""
+        v = np.asarray(vector, dtype=np.float32).ravel()
+        if v.size == 0 or not mem_id:
+            return None
+        with self._lock:
+            if self.dim <= 0:
+                self.dim = int(v.size)
+                self._save_header()
+            elif v.size != self.dim:
+                log_error(f"[embedding_store] dim mismatch for {self._stem}: {v.size} != {self.dim}")
+                return None
+            row = len(self.ids)
+            self._ensure_capacity(row + 1)
+            self._mm[row] = v
+            self.ids.append(str(mem_id))
+            self._rows[str(mem_id)] = row
+            self._append_ids_log(str(mem_id))
+            return row
+
+    def row_of(self, mem_id: Any) -> Optional[int]:
+        return self._rows.get(str(mem_id)) if mem_id is not None else None
+
+    def vector(self, entry: Dict[str, Any]) -> Optional[np.ndarray]:
+        """Zero-copy view of an entry's vector, located by its row (verified) or id."""
+        if self._mm is None:
+            return None
+        mem_id = entry.get("id")
+        row = entry.get("embedding_row")
+        if not (isinstance(row, int) and 0 <= row < len(self.ids) and self.ids[row] == str(mem_id)):
+            row = self.row_of(mem_id)
+        return None if row is None else self._mm[row]
+
+    def matrix(self) -> np.ndarray:
+        """All stored rows as a (rows, dim) memmap view."""
+        if self._mm is None:
+            return np.zeros((0, max(self.dim, 0)), dtype=self.dtype)
+        return self._mm[: len(self.ids)]
+
+    def normalized(self) -> np.ndarray:
+        """
+        L2-normalized float32 copy of matrix() (zero rows stay zero).
+        Kept in a growable buffer: appends only normalize the new rows.
+        """
+        with self._lock:
+            n = len(self.ids)
+            done = self._unit_key[1] if self._unit_key and self._unit_key[0] == self.generation else 0
+            if self._unit is None or done > n or self._unit.shape[1] != self.dim:
+                done = 0
+            if done < n:
+                if self._unit is None or self._unit.shape[0] < n or done == 0:
+                    buf = np.zeros((max(n, self.capacity), self.dim), dtype=np.float32)
+                    if done:
+                        buf[:done] = self._unit[:done]
+                    self._unit = buf
+                new = np.asarray(self._mm[done:n], dtype=np.float32)
+                norms = np.linalg.norm(new, axis=1, keepdims=True)
+                self._unit[done:n] = np.divide(new, norms, out=np.zeros_like(new), where=norms > 0)
+            self._unit_key = (self.generation, n)
+            if self._unit is None:
+                return np.zeros((0, max(self.dim, 0)), dtype=np.float32)
+            return self._unit[:n]
+
+    def adopt_normalized(self, unit: np.ndarray, generation: int) -> bool:
+        """
+        Use `unit` (a snapshot of normalized() rows) as the normalized cache if it belongs
+        to this generation and dimension; rows appended since are normalized on demand.
+        """
+        with self._lock:
+            n = int(unit.shape[0]) if unit.ndim == 2 else -1
+            if generation != self.generation or n > len(self.ids) or n < 0 or (n and unit.shape[1] != self.dim):
+                return False
+            self._unit = unit
+            self._unit_key = (self.generation, n)
+            return True
+
+    def compact(self, entries: Iterable[Dict[str, Any]]) -> None:
+        """Rewrite the matrix keeping only `entries`' vectors (new generation) and renumber their rows."""
+        entries = [e for e in entries if isinstance(e, dict)]
+        with self._lock:
+            live: List[str] = []
+            src_rows: List[int] = []
+            seen = set()
+            for e in entries:
+                mid = str(e.get("id"))
+                row = self._rows.get(mid)
+                if row is None or mid in seen:
+                    continue
+                seen.add(mid)
+                live.append(mid)
+                src_rows.append(row)
+
+            new_gen = self.generation + 1
+            self._drop_ids_log(new_gen)   # leftover of a compaction whose header never landed
+            path = self.matrix_path(new_gen)
+            cap = max(len(live), _MIN_CAPACITY)
+            if self.dim > 0:
+                mm = np.memmap(path, dtype=self.dtype, mode="w+", shape=(cap, self.dim))
+                if src_rows and self._mm is not None:
+                    mm[: len(src_rows)] = self._mm[np.asarray(src_rows)]
+                mm.flush()
+                self._mm = mm
+
+            self.generation = new_gen
+            self.ids = live
+            self._rows = {mid: i for i, mid in enumerate(live)}
+            self._save_header()
+
+            for e in entries:
+                row = self._rows.get(str(e.get("id")))
+                if row is None:
+                    e.pop("embedding_row", None)
+                else:
+                    e["embedding_row"] = row
+
+    def maybe_compact(self, entries: List[Dict[str, Any]], slack: float = 2.0) -> bool:
+        """Compact when dead rows outnumber live entries by `slack`x."""
+        if len(self.ids) > _MIN_CAPACITY and len(self.ids) > slack * max(len(entries), 1):
+            self.compact(entries)
+            return True
+        return False
+
+
+# ------------------------------
+# Per-file registry + helpers
+# ------------------------------
+
+_STORES: Dict[str, EmbeddingStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def store_for(json_path: Union[str, Path]) -> EmbeddingStore:
+    """The (process-wide) EmbeddingStore that sits next to `json_path`."""
+    key = os.path.abspath(os.fspath(json_path))
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        # Re-open if the files were removed underneath us (e.g. temp dirs)
+        if store is None or (store.dim > 0 and not store.matrix_path().exists()):
+            store = EmbeddingStore(key)
+            _STORES[key] = store
+        return store
+
+
+def externalize_embeddings(entries: Iterable[Dict[str, Any]], json_path: Union[str, Path]) -> int:
+    """
+    Move inline "embedding" lists into the sidecar store, leaving "embedding_row".
+    Also migrates legacy files on their first rewrite. Returns how many were moved.
+    """
+    store = store_for(json_path)
+    moved = 0
+    for e in entries:
+        if not isinstance(e, dict) or "embedding" not in e:
+            continue
+        emb = e.pop("embedding")
+        if emb is None or not e.get("id"):
+            continue
+        try:
+            row = store.put(e["id"], emb)
+        except Exception as exc:
+            log_error(f"[embedding_store] failed to store embedding: {exc}")
+            row = None
+        if row is not None:
+            e["embedding_row"] = row
+            moved += 1
+    return moved
+
+
+def entry_embedding(entry: Dict[str, Any], json_path: Union[str, Path]) -> Optional[np.ndarray]:
+    """Inline embedding if the entry still has one (legacy/knowledge rows), else its sidecar row."""
+    if "embedding" in entry:
+        emb = entry.get("embedding")
+        return None if emb is None else np.asarray(emb, dtype=np.float32).ravel()
+    if "embedding_row" not in entry and not entry.get("id"):
+        return None
+    return store_for(json_path).vector(entry)
+
+
+def recover_embedding(entry: Dict[str, Any], *json_paths: Union[str, Path]) -> Optional[List[float]]:
+    """Find an entry's existing vector (inline or in any of the given stores) as a plain list."""
+    for p in json_paths:
+        vec = entry_embedding(entry, p)
+        if vec is not None and vec.size:
+            return vec.astype(np.float32).tolist()
+    return None
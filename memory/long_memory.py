@@ -1,20 +1,31 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import Any, List, Optional
+import heapq
+import math
+from typing import Any, Dict, List, Optional, Tuple
 import uuid
 
+import numpy as np
+
 from cognition.selfhood.ethics import update_values_with_lessons
 from emotion.emotion import detect_emotion
-from paths import LONG_MEMORY_FILE, PRIVATE_THOUGHTS_FILE
+from memory.embedding_store import externalize_embeddings, recover_embedding, store_for
+from memory.ann_index import index_for
+from memory.cold_store import cold_for
+from memory.consolidation import submit_consolidation
+from memory.long_store import LongMemoryLog, long_log_for
+from memory.topics import topics_for
+from paths import LONG_MEMORY_FILE, PRIVATE_THOUGHTS_FILE, WORKING_MEMORY_FILE
 from utils.embedder import get_embedding
-from utils.json_utils import load_json, save_json
 from utils.log import log_error, log_private
 from utils.memory_utils import summarize_memories
 
 # Constants defining behaviour
-DUPLICATE_WINDOW: int = 10        # Number of recent entries to check for duplicates
-MAX_LONG_MEMORY: int = 2000       # Maximum allowed entries in long-term memory
+NEAR_DUPLICATE_COSINE: Optional[float] = None  # e.g. 0.97 to also skip near-identical embeddings
+NEAR_DUPLICATE_CANDIDATES: int = 8
+MAX_LONG_MEMORY: int = 2000       # Maximum allowed entries in long-term memory (high-water mark)
+PRUNE_BATCH: int = 50             # Entries removed (and summarised together) per prune
 STRONG_EMOTIONS = {"joy", "fear", "anger", "grief", "pride", "curiosity"}
 
 
@@ -25,6 +36,35 @@ def _emotion_name(e: Any) -> str:
     return str(e or "neutral").lower()
 
 
+def find_near_duplicate(log: LongMemoryLog, embedding: Any, event_type: str) -> Optional[str]:
+    """
+    Id of a live memory of the same event_type whose embedding has cosine similarity
+    >= NEAR_DUPLICATE_COSINE with `embedding` (None when disabled or nothing is close).
+    """
+    if NEAR_DUPLICATE_COSINE is None or embedding is None or not len(embedding):
+        return None
+    store = store_for(log.json_path)
+    q = np.asarray(embedding, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(q))
+    if not len(store) or store.dim != q.size or norm == 0.0:
+        return None
+    q /= norm
+    unit = store.normalized()
+    ids = index_for(log.json_path).search_ids(q, NEAR_DUPLICATE_CANDIDATES)
+    if ids is None:
+        sims = unit @ q
+        k = min(NEAR_DUPLICATE_CANDIDATES, sims.size)
+        ids = [store.ids[r] for r in np.argpartition(-sims, k - 1)[:k]]
+    for mid in ids:
+        row = store.row_of(mid)
+        if row is None or float(unit[row] @ q) < NEAR_DUPLICATE_COSINE:
+            continue
+        m = log.get(mid)
+        if m is not None and m.get("event_type", "") == event_type:
+            return mid
+    return None
+
+
 def update_long_memory(
     new: Any,
     emotion: Optional[str] = None,
@@ -40,15 +80,30 @@ def update_long_memory(
     context: Optional[dict] = None,
 ) -> None:
     """Append a new event to long-term memory, with duplicate prevention and embedding generation."""
-    memories: list = load_json(LONG_MEMORY_FILE, default_type=list)
-    if not isinstance(memories, list):
-        memories = []
-
+    log = long_log_for(LONG_MEMORY_FILE)
     now = datetime.now(timezone.utc).isoformat()
 
-    # Build the entry from either a dict or a string
     if isinstance(new, dict):
         content = str(new.get("content", "")).strip()
+        event_type = new.get("event_type", event_type)
+    elif isinstance(new, str):
+        content = new.strip()
+    else:
+        log_error("update_long_memory: Invalid 'new' argument.")
+        return
+
+    # Don’t store empty/noise-only entries
+    if not content:
+        log_private("[long_memory] Skipped empty content entry.")
+        return
+
+    # Exact duplicates (whole store, fingerprint index) cost no emotion/embedding calls
+    if log.find_duplicate(content, event_type) is not None:
+        log_private(f"[long_memory] Skipped duplicate memory: {content[:50]}")
+        return
+
+    # Build the entry from either a dict or a string
+    if isinstance(new, dict):
         entry: dict = new.copy()
         entry.setdefault("id", str(uuid.uuid4()))
         entry.setdefault("timestamp", now)
@@ -63,8 +118,11 @@ def update_long_memory(
         entry.setdefault("recall_count", recall_count)
         entry.setdefault("context", context)
         entry["emotion"] = _emotion_name(emotion or detect_emotion(content))
-    elif isinstance(new, str):
-        content = new.strip()
+        # Promoted rows carry a sidecar row of their source file; reuse that vector by id
+        entry.pop("embedding_row", None)
+        if embedding is None and "embedding" not in entry:
+            embedding = recover_embedding(new, WORKING_MEMORY_FILE, LONG_MEMORY_FILE)
+    else:
         entry = {
             "id": str(uuid.uuid4()),
             "timestamp": now,
@@ -80,18 +138,12 @@ def update_long_memory(
             "recall_count": recall_count,
             "context": context,
         }
-    else:
-        log_error("update_long_memory: Invalid 'new' argument.")
-        return
-
-    # Don’t store empty/noise-only entries
-    if not entry.get("content"):
-        log_private("[long_memory] Skipped empty content entry.")
-        return
 
     # Generate or attach embedding
     try:
-        emb = embedding if embedding is not None else get_embedding(entry.get("content", ""))
+        emb = embedding if embedding is not None else entry.get("embedding")
+        if emb is None or not len(emb):
+            emb = get_embedding(entry.get("content", ""))
         if hasattr(emb, "tolist"):
             emb = emb.tolist()
         entry["embedding"] = emb
@@ -99,17 +151,9 @@ def update_long_memory(
         log_error(f"update_long_memory: Embedding failed: {exc}")
         entry["embedding"] = []
 
-    # Check for duplicates in the most recent window
-    for m in memories[-DUPLICATE_WINDOW:]:
-        if (
-            m.get("content", "") == entry.get("content", "")
-            and m.get("event_type", "") == entry.get("event_type", "")
-        ):
-            log_private(f"[long_memory] Skipped duplicate memory: {entry['content'][:50]}")
-            return
-
-    # Append the new entry
-    memories.append(entry)
+    if find_near_duplicate(log, entry["embedding"], event_type) is not None:
+        log_private(f"[long_memory] Skipped near-duplicate memory: {content[:50]}")
+        return
 
     # Optionally trigger a reward signal for important/priority memories
     if context is not None and (importance >= 2 or priority >= 2 or referenced >= 3):
@@ -128,21 +172,20 @@ def update_long_memory(
         except Exception as exc:
             log_error(f"update_long_memory: reward signalling failed: {exc}")
 
-    # Prune if the memory exceeds the maximum size
-    if len(memories) > MAX_LONG_MEMORY:
-        # Save current list before pruning so the pruner sees the new item
-        save_json(LONG_MEMORY_FILE, memories)
-        prune_long_memory(max_total=MAX_LONG_MEMORY)
-        return
+    # Vector goes to the memory-mapped sidecar; only the new record is written
+    externalize_embeddings([entry], LONG_MEMORY_FILE)
+    log.append(entry)
+    index_for(LONG_MEMORY_FILE).sync()
 
-    save_json(LONG_MEMORY_FILE, memories)
+    # Past the high-water mark, queue pruning one batch back below it
+    if log.count() > MAX_LONG_MEMORY:
+        submit_consolidation("prune_long_memory", coalesce=True, max_total=MAX_LONG_MEMORY - PRUNE_BATCH)
 
 
 def reevaluate_memory_significance() -> None:
     """Recompute the 'effectiveness_score' of all entries in long-term memory."""
-    long_memory = load_json(LONG_MEMORY_FILE, default_type=list)
-    if not isinstance(long_memory, list):
-        return
+    log = long_log_for(LONG_MEMORY_FILE)
+    long_memory = log.load_all()
 
     for mem in long_memory:
         if not isinstance(mem, dict):
@@ -186,80 +229,130 @@ def reevaluate_memory_significance() -> None:
 
         mem["effectiveness_score"] = score
 
-    save_json(LONG_MEMORY_FILE, long_memory)
+    # Only entries whose score changed are rewritten
+    log.replace_all(long_memory)
 
 
-def prune_long_memory(max_total: int = MAX_LONG_MEMORY) -> None:
-    """Reduce long-term memory to `max_total` items by removing low scoring entries and summarising them."""
-    long_memory = load_json(LONG_MEMORY_FILE, default_type=list)
-    if not isinstance(long_memory, list) or len(long_memory) <= max_total:
-        return
+def _ts_epoch(ts: Any) -> Optional[float]:
+    """ISO timestamp -> epoch seconds (None if missing, unparseable or naive)."""
+    try:
+        dt = datetime.fromisoformat(ts)
+    except (TypeError, ValueError):
+        return None
+    return dt.timestamp() if dt.tzinfo is not None else None
 
-    def memory_score(mem: dict) -> int:
-        try:
-            score = 0
-            emotion = _emotion_name(mem.get("emotion", ""))
-            content = str(mem.get("content", "")).lower()
-
-            if emotion in STRONG_EMOTIONS:
-                score += 3
-            if "lesson:" in content:
-                score += 4
-            score += int(mem.get("effectiveness_score", 5)) // 2
-
-            # Recency boost and age penalty
-            try:
-                ts = mem.get("timestamp", "")
-                delta = datetime.now(timezone.utc) - datetime.fromisoformat(ts)
-                days_old = delta.days
-                if days_old < 3:
-                    score += 3
-                elif days_old < 7:
-                    score += 1
-                elif days_old > 30:
-                    score -= 2
-            except Exception:
-                pass
-
-            # Pin multiplier
-            if mem.get("pin", False):
-                score += 10000
-
-            # Recall bonus
-            rc = int(mem.get("recall_count", 0))
-            if rc >= 5:
-                score += 2
-            elif rc >= 2:
-                score += 1
-
-            # Related memory bonus
-            rids = mem.get("related_memory_ids")
-            if isinstance(rids, list) and len(rids) > 2:
-                score += 1
-
-            score += int(mem.get("importance", 1))
-            score += int(mem.get("priority", 1))
-        except Exception as exc:
-            log_error(f"prune_long_memory: scoring failed: {exc}")
-            score = 0
+
+def _static_score(mem: dict) -> Optional[int]:
+    """The part of memory_score that only changes when the entry itself does."""
+    try:
+        score = 0
+        if _emotion_name(mem.get("emotion", "")) in STRONG_EMOTIONS:
+            score += 3
+        if "lesson:" in str(mem.get("content", "")).lower():
+            score += 4
+        score += int(mem.get("effectiveness_score", 5)) // 2
+
+        # Pin multiplier
+        if mem.get("pin", False):
+            score += 10000
+
+        # Recall bonus
+        rc = int(mem.get("recall_count", 0))
+        if rc >= 5:
+            score += 2
+        elif rc >= 2:
+            score += 1
+
+        # Related memory bonus
+        rids = mem.get("related_memory_ids")
+        if isinstance(rids, list) and len(rids) > 2:
+            score += 1
+
+        score += int(mem.get("importance", 1))
+        score += int(mem.get("priority", 1))
         return score
+    except Exception as exc:
+        log_error(f"prune_long_memory: scoring failed: {exc}")
+        return None
+
+
+def _recency(ts: Optional[float], now: float) -> int:
+    """Recency boost and age penalty."""
+    if ts is None:
+        return 0
+    days_old = math.floor((now - ts) / 86400.0)
+    if days_old < 3:
+        return 3
+    if days_old < 7:
+        return 1
+    if days_old > 30:
+        return -2
+    return 0
+
+
+class _ScoreCache:
+    """
+    Per-entry (record hash, static score, timestamp as epoch float, pinned) for one
+    long-memory log. An entry is rescored only when its stored record changes, so a
+    prune reads just the new or edited entries instead of the whole store.
+    """
+
+    def __init__(self) -> None:
+        self._rows: Dict[str, Tuple[str, Optional[int], Optional[float], bool]] = {}
+
+    def refresh(self, log: LongMemoryLog) -> Dict[str, Tuple[str, Optional[int], Optional[float], bool]]:
+        digests = log.digests()
+        for mid in self._rows.keys() - digests.keys():
+            del self._rows[mid]
+        dirty = [mid for mid, h in digests.items() if mid not in self._rows or self._rows[mid][0] != h]
+        for mem in log.get_many(dirty):
+            mid = str(mem.get("id"))
+            self._rows[mid] = (digests[mid], _static_score(mem), _ts_epoch(mem.get("timestamp", "")), bool(mem.get("pin", False)))
+        return self._rows
+
+
+_SCORE_CACHES: Dict[str, _ScoreCache] = {}
+
+
+def prune_long_memory(max_total: int = MAX_LONG_MEMORY, batch: int = PRUNE_BATCH) -> None:
+    """
+    Demote up to `batch` of the lowest scoring unpinned entries to the cold archive to bring
+    long-term memory towards `max_total` items, summarising them into one entry per topic
+    (see memory/topics.py; a single entry while long memory is unclustered).
+    """
+    log = long_log_for(LONG_MEMORY_FILE)
+    excess = min(log.count() - max_total, batch)
+    if excess <= 0:
+        return
 
-    # Sort by score then timestamp (desc)
-    scored = sorted(long_memory, key=lambda m: (memory_score(m), m.get("timestamp", "")), reverse=True)
-    pins = [m for m in scored if m.get("pin", False)]
-    non_pins = [m for m in scored if not m.get("pin", False)]
+    cache = _SCORE_CACHES.setdefault(str(log.json_path), _ScoreCache())
+    now = datetime.now(timezone.utc).timestamp()
 
-    keep_count = max_total - len(pins)
-    kept = pins + non_pins[: max(0, keep_count)]
-    removed = non_pins[max(0, keep_count) :]
+    # Lowest (score, timestamp) first; partial selection instead of sorting everything
+    candidates = [
+        (0 if static is None else static + _recency(ts, now), ts if ts is not None else float("-inf"), mid)
+        for mid, (_, static, ts, pinned) in cache.refresh(log).items()
+        if not pinned
+    ]
+    removed = log.get_many(mid for _, _, mid in heapq.nsmallest(excess, candidates))
 
+    merged = []
     if removed:
-        summary = summarize_memories(removed)
-        if summary:
-            merged = {
+        topics = topics_for(LONG_MEMORY_FILE)
+        of = topics.topic_of(m.get("id") for m in removed)
+        groups: Dict[int, List[dict]] = {}
+        for m in removed:
+            groups.setdefault(of.get(str(m.get("id")), -1), []).append(m)
+        for topic, group in groups.items():
+            summary = summarize_memories(group, limit=len(group), truncate=160)
+            if not summary:
+                continue
+            theme = next(iter(topics.summary(topic).splitlines()), "").lstrip("- ")[:80]
+            header = f"🧠 Summary of faded memories{f' (topic: {theme})' if theme else ''}:"
+            merged.append({
                 "id": str(uuid.uuid4()),
                 "timestamp": datetime.now(timezone.utc).isoformat(),
-                "content": f"🧠 Summary of faded memories:\n{summary}",
+                "content": f"{header}\n{summary}",
                 "emotion": _emotion_name(detect_emotion(summary)),
                 "event_type": "memory_prune_summary",
                 "agent": "orrin",
@@ -267,19 +360,30 @@ def prune_long_memory(max_total: int = MAX_LONG_MEMORY) -> None:
                 "priority": 1,
                 "referenced": 0,
                 "pin": False,
-                "related_memory_ids": [],
+                "related_memory_ids": [str(m.get("id")) for m in group],  # now in the cold tier
                 "recall_count": 0,
-            }
-            kept.append(merged)
+            })
         update_values_with_lessons()
 
-    save_json(LONG_MEMORY_FILE, kept)
+    # Archive the pruned rows (with their vectors) in the cold tier and tombstone them here.
+    # Their stored vectors stay until dead rows outnumber live ones (recall skips ids the
+    # log no longer has), so a prune batch doesn't rewrite the matrix or retrain the index.
+    cold_for(LONG_MEMORY_FILE).demote(removed, LONG_MEMORY_FILE)
+    log.delete(m.get("id") for m in removed)
+    if merged:
+        log.extend(merged)
+    if store_for(LONG_MEMORY_FILE).maybe_compact([{"id": mid} for mid in log.digests()]):
+        index_for(LONG_MEMORY_FILE).rebuild()
+    else:
+        index_for(LONG_MEMORY_FILE).sync()
+    if topics_for(LONG_MEMORY_FILE).stale():
+        submit_consolidation("cluster_long_memory", coalesce=True)
 
     # Log pruning to private thoughts file
     try:
         with open(PRIVATE_THOUGHTS_FILE, "a", encoding="utf-8") as f:
             f.write(
-                f"\n[{datetime.now(timezone.utc)}] Orrin pruned {len(removed)} long memories. "
+                f"\n[{datetime.now(timezone.utc)}] Orrin archived {len(removed)} long memories. "
                 f"{'Summarized and merged.' if removed else ''}\n"
             )
     except Exception as exc:
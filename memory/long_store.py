@@ -0,0 +1,826 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from memory.embedding_store import externalize_embeddings
+from memory.record import MemoryRecord
+from utils.durability import sync_file
+from utils.json_utils import (
+    _json_default, get_adapter, in_transaction, join_transactions, load_json, register_adapter,
+    save_json,
+)
+from utils.log import log_error
+
+# Long-term memory as an append-only log instead of one JSON array rewritten per event:
+#   <stem>_log/seg-000001.jsonl   one record per line: {"op": "put", "entry": {...}}
+#                                 or {"op": "del", "id": ...} (tombstone)
+#   <stem>_log/index.json         [id, segment, offset, length, hash, fingerprint, keys] in
+#                                 insertion order, valid up to its (segment, offset) watermark
+# Writes only touch the active segment. The index is saved every INDEX_SAVE_EVERY
+# records and on flush_state(); records past its watermark are replayed on open.
+# Compaction copies live records into a fresh segment on a background thread once
+# dead bytes (overwritten puts + tombstones) outweigh live ones.
+# Every live entry's content fingerprint (normalized text + event_type) is indexed too,
+# so duplicate checks cover the whole store in O(1).
+# So are a few query keys per entry (event_type, emotion, agent, timestamp, pin), which
+# back query(): filtered reads touch only the matching records, not the whole store.
+# recall_count bumps (bump_recall) are kept as in-memory deltas, added to entries on
+# read and written as re-puts of just those records when the index is flushed.
+# Inside a StateTransaction the first write of each id records its previous record; a
+# rollback re-puts those (or tombstones ids that didn't exist), so the log matches the
+# JSON state again. A restored deleted entry moves to the end of insertion order.
+
+SEGMENT_MAX_BYTES: int = 4 * 1024 * 1024
+INDEX_SAVE_EVERY: int = 64
+COMPACT_MIN_DEAD_BYTES: int = 1024 * 1024
+INDEX_VERSION: int = 3   # 2: entries carry a content fingerprint; 3: and query keys
+
+# id -> (segment, offset, length, hash)
+Loc = Tuple[int, int, int, str]
+# id -> (event_type, emotion, agent, timestamp epoch, pinned); see _entry_keys
+Keys = Tuple[str, str, str, Optional[float], bool]
+
+
+def _encode_put(entry: Dict[str, Any]) -> bytes:
+    return (json.dumps({"op": "put", "entry": entry}, ensure_ascii=False,
+                       sort_keys=True, default=_json_default) + "\n").encode("utf-8")
+
+
+def _encode_del(mem_id: str) -> bytes:
+    return (json.dumps({"op": "del", "id": mem_id}) + "\n").encode("utf-8")
+
+
+def _digest(line: bytes) -> str:
+    return hashlib.blake2b(line, digest_size=8).hexdigest()
+
+
+def content_fingerprint(content: Any, event_type: Any) -> str:
+    """Hash of case-folded, whitespace-collapsed content plus event_type (duplicate key)."""
+    text = content if isinstance(content, str) else str(content)
+    norm = " ".join(text.split()).casefold()
+    return hashlib.blake2b(f"{event_type or ''}\x1f{norm}".encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _entry_fingerprint(entry: Dict[str, Any]) -> str:
+    return content_fingerprint(entry.get("content", ""), entry.get("event_type", ""))
+
+
+def _epoch(ts: Any) -> Optional[float]:
+    """datetime / ISO string / epoch number -> epoch seconds (naive times are UTC)."""
+    if isinstance(ts, (int, float)) and not isinstance(ts, bool):
+        return float(ts)
+    if isinstance(ts, str):
+        try:
+            ts = datetime.fromisoformat(ts.strip().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if isinstance(ts, datetime):
+        return (ts if ts.tzinfo is not None else ts.replace(tzinfo=timezone.utc)).timestamp()
+    return None
+
+
+def _emotion_name(emotion: Any) -> str:
+    if isinstance(emotion, dict):
+        emotion = emotion.get("emotion")
+    return emotion.strip().lower() if isinstance(emotion, str) else ""
+
+
+def _entry_keys(entry: Dict[str, Any]) -> Keys:
+    event_type = entry.get("event_type")
+    agent = entry.get("agent")
+    return (
+        event_type if isinstance(event_type, str) else "",
+        _emotion_name(entry.get("emotion")),
+        agent.strip().lower() if isinstance(agent, str) else "",
+        _epoch(entry.get("timestamp")),
+        bool(entry.get("pin", False)),
+    )
+
+
+class LongMemoryLog:
+    """Segmented append-only store for one long-memory file, keyed by memory id."""
+
+    def __init__(self, json_path: Union[str, Path], state: Optional[Dict[str, Any]] = None) -> None:
+        base = Path(json_path)
+        self.json_path = base
+        self.dir = base.parent / f"{base.with_suffix('').name}_log"
+        self.index_path = self.dir / "index.json"
+        self._lock = threading.RLock()
+        self._index: Dict[str, Loc] = {}
+        self._fp: Dict[str, str] = {}                 # id -> content fingerprint
+        self._by_fp: Dict[str, Set[str]] = {}         # fingerprint -> ids
+        self._keys: Dict[str, Keys] = {}              # id -> query keys
+        self._pos: Dict[str, int] = {}                # id -> insertion position (= _index order)
+        self._seq = 0
+        self._by_key: Tuple[Dict[str, Set[str]], ...] = ({}, {}, {})  # event_type / emotion / agent -> ids
+        self._pinned: Set[str] = set()
+        self._segments: List[int] = []
+        self._next_seg = 1
+        self._wm: Tuple[int, int] = (0, 0)
+        self._dead = 0
+        self._live_bytes = 0
+        self._unsaved = 0
+        self._live: Optional[Dict[str, MemoryRecord]] = None  # parsed entries, once load_all() ran
+        self._recalls: Dict[str, int] = {}            # id -> recall_count not yet written
+        self._compacting = False
+        self._undo: Optional[Dict[str, Optional[bytes]]] = None  # id -> record before the transaction
+        self._undo_recalls: Dict[str, int] = {}
+        self.restored = state is not None and self._restore(state)
+        if not self.restored:
+            self._open()
+        join_transactions(self)
+
+    # ---- files ----
+    def _seg_path(self, seg: int) -> Path:
+        return self.dir / f"seg-{seg:06d}.jsonl"
+
+    def _disk_segments(self) -> List[int]:
+        if not self.dir.is_dir():
+            return []
+        found = []
+        for p in self.dir.glob("seg-*.jsonl"):
+            try:
+                found.append(int(p.stem[4:]))
+            except ValueError:
+                continue
+        return sorted(found)
+
+    def _open(self) -> None:
+        for tmp in self.dir.glob("*.tmp") if self.dir.is_dir() else ():
+            try:
+                tmp.unlink()  # half-written compaction output
+            except OSError:
+                pass
+        disk = self._disk_segments()
+        if not disk:
+            self._migrate_legacy()
+            return
+        self._next_seg = disk[-1] + 1
+
+        idx = load_json(self.index_path, default_type=dict)
+        segs = [int(s) for s in (idx.get("segments") or [])] if isinstance(idx, dict) else []
+        wm = idx.get("watermark") if isinstance(idx, dict) else None
+        wm_seg, wm_off = (int(wm[0]), int(wm[1])) if isinstance(wm, list) and len(wm) == 2 else (0, 0)
+        trusted = bool(segs) and all(s in disk for s in segs) and all(s in segs or s > wm_seg for s in disk)
+        trusted = trusted and idx.get("version") == INDEX_VERSION  # older indexes lack fingerprints / keys
+
+        if trusted:
+            for row in idx.get("entries") or []:
+                mid, seg, off, length, h, fp, keys = row
+                self._index[str(mid)] = (int(seg), int(off), int(length), str(h))
+                self._set_fp(str(mid), str(fp))
+                self._set_keys(str(mid), keys)
+                self._live_bytes += int(length)
+            self._dead = int(idx.get("dead") or 0)
+            self._segments = segs
+            self._wm = (wm_seg, wm_off)
+            for seg in disk:
+                if seg >= wm_seg:
+                    self._replay(seg, wm_off if seg == wm_seg else 0)
+        else:
+            if idx.get("version") not in (None, INDEX_VERSION) and segs:
+                log_error(f"[long_store] upgrading index for {self.json_path.name}; replaying all segments.")
+            elif segs or idx:
+                log_error(f"[long_store] index for {self.json_path.name} is stale; replaying all segments.")
+            for seg in disk:
+                self._replay(seg, 0)
+            self._dead = max(0, self._segment_bytes() - self._live_bytes)
+            self._unsaved = 1
+
+    def _restore(self, state: Dict[str, Any]) -> bool:
+        """
+        Adopt export_state() output (see memory/snapshot.py) if the segments on disk are
+        exactly the ones it describes; segments are append-only, so equal sizes mean
+        equal content. Returns False (nothing changed) otherwise.
+        """
+        sizes = {int(k): int(v) for k, v in (state.get("segments") or {}).items()}
+        disk = self._disk_segments()
+        if state.get("version") != INDEX_VERSION or not sizes or sorted(sizes) != disk:
+            return False
+        for seg, size in sizes.items():
+            try:
+                if self._seg_path(seg).stat().st_size != size:
+                    return False
+            except OSError:
+                return False
+        for mid, seg, off, length, h, fp, keys in state.get("index") or []:
+            self._index[str(mid)] = (int(seg), int(off), int(length), str(h))
+            self._set_fp(str(mid), str(fp))
+            self._set_keys(str(mid), keys)
+        entries = state.get("entries")
+        if isinstance(entries, list) and len(entries) == len(self._index):
+            self._live = {str(e.get("id")): MemoryRecord.from_dict(e) for e in entries}
+        self._segments = disk
+        self._next_seg = disk[-1] + 1
+        self._wm = (int(state["watermark"][0]), int(state["watermark"][1]))
+        self._dead = int(state.get("dead") or 0)
+        self._live_bytes = int(state.get("live_bytes") or 0)
+        self._unsaved = 1  # index.json may be older than the snapshot
+        return True
+
+    def export_state(self) -> Dict[str, Any]:
+        """Everything _restore() needs to reopen without reading the index or any record."""
+        with self._lock:
+            self.load_all()
+            sizes = {}
+            for seg in self._segments:
+                try:
+                    sizes[str(seg)] = self._seg_path(seg).stat().st_size
+                except OSError:
+                    pass
+            return {
+                "version": INDEX_VERSION,
+                "segments": sizes,
+                "watermark": list(self._wm),
+                "dead": self._dead,
+                "live_bytes": self._live_bytes,
+                "index": self._index_rows(),
+                "entries": [self._live[mid].to_dict() for mid in self._index],
+            }
+
+    def _segment_bytes(self) -> int:
+        total = 0
+        for seg in self._segments:
+            try:
+                total += self._seg_path(seg).stat().st_size
+            except OSError:
+                pass
+        return total
+
+    def _replay(self, seg: int, start: int) -> None:
+        path = self._seg_path(seg)
+        if seg not in self._segments:
+            self._segments.append(seg)
+            self._segments.sort()
+        with open(path, "rb") as f:
+            f.seek(start)
+            off = start
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    # Torn final write: drop it so the next append starts on a clean line
+                    log_error(f"[long_store] truncating partial record in {path.name} at {off}")
+                    with open(path, "r+b") as w:
+                        w.truncate(off)
+                    break
+                try:
+                    rec = json.loads(raw)
+                except ValueError:
+                    log_error(f"[long_store] skipping unreadable record in {path.name} at {off}")
+                    self._dead += len(raw)
+                    off += len(raw)
+                    continue
+                self._apply(rec, seg, off, raw)
+                off += len(raw)
+        self._wm = max(self._wm, (seg, off))
+
+    def _set_fp(self, mid: str, fp: Optional[str]) -> None:
+        old = self._fp.pop(mid, None)
+        if old is not None:
+            ids = self._by_fp.get(old)
+            if ids is not None:
+                ids.discard(mid)
+                if not ids:
+                    del self._by_fp[old]
+        if fp is not None:
+            self._fp[mid] = fp
+            self._by_fp.setdefault(fp, set()).add(mid)
+
+    def _set_keys(self, mid: str, keys: Optional[Iterable[Any]]) -> None:
+        old = self._keys.pop(mid, None)
+        if old is not None:
+            for bucket, key in zip(self._by_key, old):
+                ids = bucket.get(key)
+                if ids is not None:
+                    ids.discard(mid)
+                    if not ids:
+                        del bucket[key]
+            self._pinned.discard(mid)
+        if keys is None:
+            self._pos.pop(mid, None)
+            return
+        event_type, emotion, agent, ts, pin = keys
+        new: Keys = (str(event_type), str(emotion), str(agent), None if ts is None else float(ts), bool(pin))
+        self._keys[mid] = new
+        if mid not in self._pos:
+            self._pos[mid] = self._seq
+            self._seq += 1
+        for bucket, key in zip(self._by_key, new):
+            if key:
+                bucket.setdefault(key, set()).add(mid)
+        if new[4]:
+            self._pinned.add(mid)
+
+    def _index_rows(self) -> List[List[Any]]:
+        return [[mid, *loc, self._fp.get(mid, ""), list(self._keys.get(mid, ("", "", "", None, False)))]
+                for mid, loc in self._index.items()]
+
+    def _apply(self, rec: Dict[str, Any], seg: int, off: int, raw: bytes) -> None:
+        if rec.get("op") == "put" and isinstance(rec.get("entry"), dict):
+            entry = rec["entry"]
+            mid = str(entry.get("id"))
+            old = self._index.get(mid)
+            if old is not None:
+                self._dead += old[2]
+                self._live_bytes -= old[2]
+            self._index[mid] = (seg, off, len(raw), _digest(raw))
+            self._set_fp(mid, _entry_fingerprint(entry))
+            self._set_keys(mid, _entry_keys(entry))
+            self._live_bytes += len(raw)
+            if self._live is not None:
+                self._live[mid] = MemoryRecord.from_dict(entry)
+        elif rec.get("op") == "del":
+            mid = str(rec.get("id"))
+            old = self._index.pop(mid, None)
+            self._set_fp(mid, None)
+            self._set_keys(mid, None)
+            if old is not None:
+                self._dead += old[2]
+                self._live_bytes -= old[2]
+            self._dead += len(raw)
+            if self._live is not None:
+                self._live.pop(mid, None)
+        else:
+            self._dead += len(raw)
+
+    def _migrate_legacy(self) -> None:
+        """Import a pre-log long_memory.json once, then set it aside as <name>.migrated."""
+        if not self.json_path.is_file():
+            return
+        try:
+            data = json.loads(self.json_path.read_text(encoding="utf-8") or "[]")
+        except Exception as e:
+            log_error(f"[long_store] could not read legacy {self.json_path.name}: {e}")
+            return
+        if not isinstance(data, list):
+            log_error(f"[long_store] legacy {self.json_path.name} is not a list; leaving it in place.")
+            return
+        seen = set()
+        entries = []
+        for e in data:
+            if not isinstance(e, dict):
+                continue
+            # Old files may hold the same id twice; keep both rows
+            if not e.get("id") or str(e["id"]) in seen:
+                e["id"] = str(uuid.uuid4())
+            seen.add(str(e["id"]))
+            entries.append(e)
+        if entries:
+            self._commit(self._encode_puts(entries), [])
+            self.flush()
+        try:
+            os.replace(self.json_path, self.json_path.with_name(self.json_path.name + ".migrated"))
+        except OSError as e:
+            log_error(f"[long_store] could not set aside legacy {self.json_path.name}: {e}")
+
+    # ---- writes ----
+    def _active_segment(self, incoming: int) -> int:
+        if self._segments:
+            seg = self._segments[-1]
+            size = self._wm[1] if self._wm[0] == seg else (
+                self._seg_path(seg).stat().st_size if self._seg_path(seg).exists() else 0)
+            if size == 0 or size + incoming <= SEGMENT_MAX_BYTES:
+                return seg
+        seg = self._next_seg
+        self._next_seg += 1
+        self._segments.append(seg)
+        return seg
+
+    def _encode_puts(self, entries: Iterable[Dict[str, Any]]) -> List[Tuple[str, bytes]]:
+        out = []
+        for e in entries:
+            if "embedding" in e:
+                e = dict(e)
+                externalize_embeddings([e], self.json_path)
+            out.append((str(e["id"]), _encode_put(e)))
+        return out
+
+    def _commit(self, puts: List[Tuple[str, bytes]], dels: List[str]) -> None:
+        lines = [_encode_del(mid) for mid in dels] + [line for _, line in puts]
+        if not lines:
+            return
+        if self._undo is not None and in_transaction():
+            fresh = [m for m in dict.fromkeys(dels + [mid for mid, _ in puts]) if m not in self._undo]
+            old = [m for m in fresh if m in self._index]
+            self._undo.update(dict.fromkeys(fresh))
+            self._undo.update(zip(old, self._read_raw([self._index[m] for m in old])))
+        # A re-put entry was read with its pending recalls merged in; don't add them twice
+        for mid in dels:
+            self._recalls.pop(mid, None)
+        for mid, _ in puts:
+            self._recalls.pop(mid, None)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        seg = self._active_segment(sum(len(line) for line in lines))
+        with open(self._seg_path(seg), "ab") as f:
+            off = f.tell()
+            f.write(b"".join(lines))
+            sync_file(f)
+        for line in lines:
+            self._apply(json.loads(line), seg, off, line)
+            off += len(line)
+        self._wm = (seg, off)
+        self._unsaved += len(lines)
+        if self._unsaved >= INDEX_SAVE_EVERY:
+            self.flush()
+        if not self._compacting and self._dead > max(COMPACT_MIN_DEAD_BYTES, self._live_bytes):
+            self.compact_async()
+
+    def append(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Add (or replace, if its id exists) one entry. O(1) in the size of the store."""
+        self.extend([entry])
+        return entry
+
+    def extend(self, entries: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            batch = []
+            for e in entries:
+                if isinstance(e, dict):
+                    e.setdefault("id", str(uuid.uuid4()))
+                    batch.append(e)
+            self._commit(self._encode_puts(batch), [])
+
+    def delete(self, ids: Iterable[Any]) -> int:
+        """Tombstone the given ids; returns how many existed."""
+        with self._lock:
+            gone = list(dict.fromkeys(str(i) for i in ids if str(i) in self._index))
+            self._commit([], gone)
+            return len(gone)
+
+    def replace_all(self, entries: List[Dict[str, Any]]) -> None:
+        """
+        Make the store hold exactly `entries`, writing only what changed: new or modified
+        entries are re-put, missing ids are tombstoned. The log keeps insertion order,
+        so reordering a list is not persisted.
+        """
+        with self._lock:
+            seen = set()
+            changed: List[Dict[str, Any]] = []
+            puts: List[Tuple[str, bytes]] = []
+            for e in entries:
+                if not isinstance(e, dict):
+                    continue
+                if not e.get("id"):
+                    e = {**e, "id": str(uuid.uuid4())}
+                mid = str(e["id"])
+                if mid in seen:
+                    continue
+                seen.add(mid)
+                if "embedding" in e:
+                    changed.append(e)
+                    continue
+                line = _encode_put(e)
+                old = self._index.get(mid)
+                if old is None or old[3] != _digest(line):
+                    puts.append((mid, line))
+            puts.extend(self._encode_puts(changed))
+            gone = [mid for mid in self._index if mid not in seen]
+            self._commit(puts, gone)
+
+    def bump_recall(self, ids: Iterable[Any], by: int = 1) -> int:
+        """
+        Add `by` to the recall_count of the given live entries without writing them now;
+        reads include it and the next flush() persists it. Returns how many were bumped.
+        """
+        with self._lock:
+            n = 0
+            for mid in dict.fromkeys(str(i) for i in ids):
+                if mid in self._index:
+                    self._recalls[mid] = self._recalls.get(mid, 0) + int(by)
+                    n += 1
+            return n
+
+    # ---- StateTransaction hooks ----
+    def begin(self) -> None:
+        with self._lock:
+            self._undo, self._undo_recalls = {}, dict(self._recalls)
+
+    def commit(self) -> None:
+        with self._lock:
+            self._undo, self._undo_recalls = None, {}
+
+    def rollback(self) -> None:
+        """Put back the records the transaction overwrote and tombstone the ones it added."""
+        with self._lock:
+            undo, recalls = self._undo, self._undo_recalls
+            self._undo, self._undo_recalls = None, {}
+            if undo is None:
+                return
+            puts = [(mid, raw) for mid, raw in undo.items()
+                    if raw is not None and self._index.get(mid, (0, 0, 0, ""))[3] != _digest(raw)]
+            dels = [mid for mid, raw in undo.items() if raw is None and mid in self._index]
+            self._commit(puts, dels)
+            self._recalls = recalls   # the recall bumps pending when it began
+
+    def _write_recalls(self) -> None:
+        if not self._recalls:
+            return
+        pending, self._recalls = self._recalls, {}
+        entries = self.get_many(pending)
+        for e in entries:
+            e["recall_count"] = int(e.get("recall_count", 0) or 0) + pending[str(e["id"])]
+        self._commit(self._encode_puts(entries), [])
+
+    def flush(self) -> None:
+        """Write pending recall counts, then persist the index (normally batched; replay covers anything after it)."""
+        with self._lock:
+            self._write_recalls()
+            if not self._unsaved or not self.dir.is_dir():
+                return
+            save_json(self.index_path, {
+                "version": INDEX_VERSION,
+                "segments": self._segments,
+                "watermark": list(self._wm),
+                "dead": self._dead,
+                "entries": self._index_rows(),
+            })
+            self._unsaved = 0
+
+    # ---- reads ----
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def count(self) -> int:
+        return len(self._index)
+
+    def find_duplicate(self, content: Any, event_type: Any) -> Optional[str]:
+        """Id of a live entry with the same normalized content and event_type, if any."""
+        with self._lock:
+            ids = self._by_fp.get(content_fingerprint(content, event_type))
+            return next(iter(ids)) if ids else None
+
+    def query_ids(
+        self,
+        event_type: Optional[str] = None,
+        emotion: Optional[str] = None,
+        agent: Optional[str] = None,
+        pinned: Optional[bool] = None,
+        since: Any = None,
+        until: Any = None,
+        limit: Optional[int] = None,
+        order: str = "newest",
+    ) -> List[str]:
+        """
+        Ids of live entries matching every given filter, from the secondary indexes alone.
+        `since`/`until` (datetime, ISO string or epoch seconds) bound the entry timestamp,
+        inclusive; entries without a readable timestamp never match a time bound.
+        `order` is "newest" (latest inserted first) or "oldest"; `limit` keeps the first n.
+        """
+        if order not in ("newest", "oldest"):
+            raise ValueError(f"order must be 'newest' or 'oldest', not {order!r}")
+        lo, hi = _epoch(since), _epoch(until)
+        if (since is not None and lo is None) or (until is not None and hi is None):
+            raise ValueError("since/until must be a datetime, ISO timestamp or epoch seconds")
+        if limit is not None and limit <= 0:
+            return []
+        wanted = (event_type, None if emotion is None else _emotion_name(emotion),
+                  None if agent is None else str(agent).strip().lower())
+        with self._lock:
+            sets = [bucket.get(str(v), set()) for bucket, v in zip(self._by_key, wanted) if v is not None]
+            if pinned is True:
+                sets.append(self._pinned)
+            if sets:
+                sets.sort(key=len)
+                pool: Iterable[str] = sorted(
+                    (m for m in sets[0] if all(m in s for s in sets[1:])),
+                    key=self._pos.__getitem__, reverse=order == "newest",
+                )
+            else:
+                pool = reversed(self._index) if order == "newest" else iter(self._index)
+
+            out: List[str] = []
+            for mid in pool:
+                keys = self._keys[mid]
+                if pinned is False and keys[4]:
+                    continue
+                if lo is not None or hi is not None:
+                    ts = keys[3]
+                    if ts is None or (lo is not None and ts < lo) or (hi is not None and ts > hi):
+                        continue
+                out.append(mid)
+                if limit is not None and len(out) >= limit:
+                    break
+            return out
+
+    def query(self, **filters: Any) -> List[Dict[str, Any]]:
+        """Entries for query_ids(**filters), in that order, reading only the matching records."""
+        return self.get_many(self.query_ids(**filters))
+
+    def iter_query(self, batch: int = 64, **filters: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Entries for query_ids(**filters) read `batch` records at a time, for callers that
+        filter on fields the indexes don't cover and stop once they have enough.
+        """
+        ids = self.query_ids(**filters)
+        step = max(1, int(batch))
+        for i in range(0, len(ids), step):
+            yield from self.get_many(ids[i:i + step])
+
+    def digests(self) -> Dict[str, str]:
+        """id -> hash of its stored record; changes whenever the entry is re-put."""
+        with self._lock:
+            return {mid: loc[3] for mid, loc in self._index.items()}
+
+    def get_many(self, ids: Iterable[Any]) -> List[Dict[str, Any]]:
+        """Live entries for `ids` (missing ids skipped), reading only those records."""
+        with self._lock:
+            wanted = [m for m in dict.fromkeys(str(i) for i in ids) if m in self._index]
+            if self._live is not None:
+                return self._merged([self._live[m].to_dict() for m in wanted])
+            return self._merged([e for _, e in self._read(wanted)])
+
+    def get(self, mem_id: Any) -> Optional[Dict[str, Any]]:
+        """One live entry by id (a single record read), or None."""
+        mid = str(mem_id)
+        with self._lock:
+            if mid not in self._index:
+                return None
+            if self._live is not None:
+                return self._merged([self._live[mid].to_dict()])[0]
+            found = self._read([mid])
+            return self._merged([found[0][1]])[0] if found else None
+
+    def _read_raw(self, locs: List[Loc]) -> List[Optional[bytes]]:
+        out: List[Optional[bytes]] = [None] * len(locs)
+        by_seg: Dict[int, List[int]] = {}
+        for i, loc in enumerate(locs):
+            by_seg.setdefault(loc[0], []).append(i)
+        for seg, idxs in by_seg.items():
+            try:
+                with open(self._seg_path(seg), "rb") as f:
+                    if len(idxs) > 32:
+                        buf = f.read()
+                        for i in idxs:
+                            _, off, length, _ = locs[i]
+                            out[i] = buf[off:off + length]
+                    else:
+                        for i in idxs:
+                            _, off, length, _ = locs[i]
+                            f.seek(off)
+                            out[i] = f.read(length)
+            except OSError as e:
+                log_error(f"[long_store] could not read segment {seg}: {e}")
+        return out
+
+    def _read(self, ids: List[str]) -> List[Tuple[str, Dict[str, Any]]]:
+        out = []
+        for mid, raw in zip(ids, self._read_raw([self._index[m] for m in ids])):
+            try:
+                out.append((mid, json.loads(raw)["entry"]))
+            except Exception:
+                log_error(f"[long_store] unreadable record for memory {mid}")
+        return out
+
+    def load_recent(self, n: int) -> List[Dict[str, Any]]:
+        """The last `n` entries (oldest first) without reading the rest of the store."""
+        with self._lock:
+            if n <= 0:
+                return []
+            ids = list(islice(reversed(self._index), int(n)))[::-1]
+            if self._live is not None:
+                return self._merged([self._live[m].to_dict() for m in ids])
+            return self._merged([e for _, e in self._read(ids)])
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            if self._live is None:
+                self._live = {mid: MemoryRecord.from_dict(e) for mid, e in self._read(list(self._index))}
+            return self._merged([rec.to_dict() for rec in self._live.values()])
+
+    def _merged(self, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Add pending recall_count deltas to freshly copied entries."""
+        if self._recalls:
+            for e in entries:
+                delta = self._recalls.get(str(e.get("id")))
+                if delta:
+                    e["recall_count"] = int(e.get("recall_count", 0) or 0) + delta
+        return entries
+
+    # ---- compaction ----
+    def compact(self) -> bool:
+        """Rewrite live records into a new segment and drop the old ones. Appends keep going meanwhile."""
+        with self._lock:
+            if self._compacting or not self._segments:
+                return False
+            self._compacting = True
+            sealed = set(self._segments)
+            out_seg = self._next_seg
+            self._next_seg += 2
+            self._segments.append(out_seg + 1)  # new active segment; appends land after out_seg
+            snapshot = list(self._index.items())
+        try:
+            final = self._seg_path(out_seg)
+            tmp = final.with_suffix(".jsonl.tmp")
+            moved: Dict[str, Loc] = {}
+            off = 0
+            with open(tmp, "wb") as out:
+                for (mid, loc), raw in zip(snapshot, self._read_raw([loc for _, loc in snapshot])):
+                    if raw is None:
+                        continue
+                    out.write(raw)
+                    moved[mid] = (out_seg, off, len(raw), loc[3])
+                    off += len(raw)
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp, final)
+
+            with self._lock:
+                for mid, loc in snapshot:
+                    # Entries rewritten or deleted since the snapshot keep their newer record
+                    if mid in moved and self._index.get(mid) is loc:
+                        self._index[mid] = moved[mid]
+                self._segments = [out_seg] + [s for s in self._segments if s not in sealed]
+                self._dead = max(0, self._segment_bytes() - self._live_bytes)
+                self._unsaved += 1
+                self.flush()
+                # A stale on-disk index (write-back) no longer matches the files; open() replays then
+                for seg in sealed:
+                    try:
+                        self._seg_path(seg).unlink()
+                    except OSError:
+                        pass
+            return True
+        finally:
+            self._compacting = False
+
+    def compact_async(self) -> None:
+        def _run() -> None:
+            try:
+                self.compact()
+            except Exception as e:
+                log_error(f"[long_store] compaction failed: {e}")
+        threading.Thread(target=_run, name="long-memory-compact", daemon=True).start()
+
+
+# ------------------------------
+# Per-file registry + load_json/save_json adapter
+# ------------------------------
+
+_LOGS: Dict[str, LongMemoryLog] = {}
+_LOGS_LOCK = threading.Lock()
+
+
+class _JsonView:
+    """Lets existing load_json/save_json callers keep treating the log as a list file."""
+
+    def __init__(self, json_path: Union[str, Path]) -> None:
+        self.json_path = json_path
+
+    def load(self, default_type: type = list) -> List[Dict[str, Any]]:
+        return long_log_for(self.json_path).load_all()
+
+    def append(self, entry: Any) -> None:
+        if isinstance(entry, dict):
+            long_log_for(self.json_path).append(dict(entry))
+
+    def save(self, data: Any) -> None:
+        if not isinstance(data, list):
+            log_error(f"[long_store] refusing to save non-list data to {self.json_path}")
+            return
+        long_log_for(self.json_path).replace_all(data)
+
+    def flush(self) -> None:
+        log = _LOGS.get(os.path.abspath(os.fspath(self.json_path)))
+        if log is not None:
+            log.flush()
+
+
+def register_long_memory(json_path: Union[str, Path]) -> None:
+    """Route load_json/save_json for `json_path` through its log (idempotent, opens nothing)."""
+    if get_adapter(json_path) is None:
+        register_adapter(json_path, _JsonView(json_path))
+
+
+def adopt_long_log(json_path: Union[str, Path], state: Dict[str, Any]) -> bool:
+    """
+    Open `json_path`'s log from a snapshot state (LongMemoryLog.export_state) if it is not
+    open yet and the state still matches the files. Returns True if the state was used.
+    """
+    key = os.path.abspath(os.fspath(json_path))
+    with _LOGS_LOCK:
+        if key in _LOGS:
+            return False
+        log = LongMemoryLog(key, state=state)
+        _LOGS[key] = log
+    register_long_memory(key)
+    return log.restored
+
+
+def long_log_for(json_path: Union[str, Path]) -> LongMemoryLog:
+    """The (process-wide) LongMemoryLog that replaces `json_path`."""
+    key = os.path.abspath(os.fspath(json_path))
+    with _LOGS_LOCK:
+        log = _LOGS.get(key)
+        # Re-open if the files were removed (e.g. temp dirs) or a legacy file appeared
+        if log is None or (log.count() and not log.dir.is_dir()) or (
+                not log.count() and Path(key).is_file()):
+            log = LongMemoryLog(key)
+            _LOGS[key] = log
+    register_long_memory(key)
+    return log
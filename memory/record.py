@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import sys
+from datetime import datetime, timezone
+from operator import attrgetter
+from typing import Any, Dict, Optional, Tuple
+
+from utils.state_store import clone_json
+
+# Compact in-process form of one memory entry, for stores that keep thousands of them
+# resident (the long-memory log's parsed-entry cache). Compared with the parsed JSON
+# dict it replaces:
+#   - the usual keys live in __slots__ instead of a per-entry hash table
+#   - event_type / agent / emotion names are interned, so every entry with the same
+#     value shares one string (json.loads makes a new one per entry)
+#   - the ISO timestamp is kept as a float (ts) and re-rendered on the way out, which
+#     is exact for datetime.now(timezone.utc).isoformat() strings; any other timestamp
+#     value is kept verbatim
+# to_dict() gives back an entry equal to the one from_dict() was given (JSON round-trip
+# is lossless), as a private copy. scripts/bench_memory_records.py measures the saving.
+
+_FIELDS: Tuple[str, ...] = (
+    "id", "content", "event_type", "emotion", "agent", "importance", "priority",
+    "referenced", "pin", "recall_count", "decay", "related_memory_ids", "context", "embedding_row",
+)
+_FIELD_SET = frozenset(_FIELDS)
+_INTERNED = frozenset(("event_type", "agent", "emotion"))
+_SCALARS = (str, int, float, bool, type(None))
+
+_MISSING = object()   # key absent from the entry
+_DERIVED = object()   # timestamp is exactly the UTC isoformat() of ts
+_get_fields = attrgetter(*_FIELDS)
+
+
+def _pack_timestamp(value: Any) -> Tuple[Optional[float], Any]:
+    """timestamp value -> (epoch seconds or None, _DERIVED or the value to keep verbatim)."""
+    if type(value) is not str:
+        return None, value
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        return None, value
+    if dt.tzinfo is None:
+        return None, value
+    ts = dt.timestamp()
+    if datetime.fromtimestamp(ts, timezone.utc).isoformat() == value:
+        return ts, _DERIVED
+    return ts, value
+
+
+class MemoryRecord:
+    """One memory entry in slot form; see from_dict / to_dict."""
+
+    __slots__ = _FIELDS + ("ts", "_ts_raw", "_extra")
+
+    ts: Optional[float]
+
+    @classmethod
+    def from_dict(cls, entry: Dict[str, Any]) -> "MemoryRecord":
+        """Build a record that takes ownership of `entry`'s values (pass a private copy)."""
+        rec = cls.__new__(cls)
+        for key in _FIELDS:
+            setattr(rec, key, _MISSING)
+        rec.ts = None
+        rec._ts_raw = _MISSING
+        rec._extra = None
+        for key, value in entry.items():
+            if key == "timestamp":
+                rec.ts, rec._ts_raw = _pack_timestamp(value)
+            elif key in _FIELD_SET:
+                if key in _INTERNED and type(value) is str:
+                    value = sys.intern(value)
+                setattr(rec, key, value)
+            else:
+                if rec._extra is None:
+                    rec._extra = {}
+                rec._extra[sys.intern(key)] = value
+        return rec
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The entry as a fresh JSON-native dict."""
+        out: Dict[str, Any] = {}
+        for key, value in zip(_FIELDS, _get_fields(self)):
+            if value is not _MISSING:
+                out[key] = value if type(value) in _SCALARS else clone_json(value)
+        raw = self._ts_raw
+        if raw is _DERIVED:
+            out["timestamp"] = datetime.fromtimestamp(self.ts, timezone.utc).isoformat()
+        elif raw is not _MISSING:
+            out["timestamp"] = raw if type(raw) in _SCALARS else clone_json(raw)
+        if self._extra:
+            for key, value in self._extra.items():
+                out[key] = value if type(value) in _SCALARS else clone_json(value)
+        return out
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """dict.get-style read of one key (nested values are not copied)."""
+        if key == "timestamp":
+            if self._ts_raw is _DERIVED:
+                return datetime.fromtimestamp(self.ts, timezone.utc).isoformat()
+            return default if self._ts_raw is _MISSING else self._ts_raw
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            return default if value is _MISSING else value
+        return self._extra.get(key, default) if self._extra else default
+
+    def __repr__(self) -> str:
+        return f"MemoryRecord({self.to_dict()!r})"
@@ -7,9 +7,11 @@ import uuid
 from emotion.emotion import detect_emotion
 from paths import LONG_MEMORY_FILE
 from utils.embedder import get_embedding
-from utils.json_utils import load_json, save_json
 from utils.log import log_error, log_private
-from memory.long_memory import DUPLICATE_WINDOW
+from memory.long_memory import find_near_duplicate
+from memory.embedding_store import externalize_embeddings
+from memory.ann_index import index_for
+from memory.long_store import long_log_for
 
 def _emotion_name(e: Any) -> str:
     """Coerce detect_emotion output into a lowercase string."""
@@ -30,10 +32,7 @@ def remember(
     related_memory_ids: Optional[List[str]] = None,
 ) -> None:
     """Store an event in long-term memory with deduplication and embeddings."""
-    long_memory: list = load_json(LONG_MEMORY_FILE, default_type=list)
-    if not isinstance(long_memory, list):
-        long_memory = []
-
+    log = long_log_for(LONG_MEMORY_FILE)
     now = datetime.now(timezone.utc).isoformat()
 
     # Normalize content to a string but keep raw if non-string
@@ -48,13 +47,11 @@ def remember(
         # Nothing meaningful to store
         return
 
-    # Deduplication (compare using string form)
-    for m in long_memory[-DUPLICATE_WINDOW:]:
-        m_content = m.get("content", "")
-        m_content_str = str(m_content) if not isinstance(m_content, str) else m_content
-        if m_content_str == content_str and m.get("event_type", "") == event_type:
-            log_private(f"[long_memory] Skipped duplicate memory: {content_str[:50]}")
-            return
+    # Deduplication over the whole store (fingerprint of the string form), before any
+    # embedding/emotion work
+    if log.find_duplicate(content_str, event_type) is not None:
+        log_private(f"[long_memory] Skipped duplicate memory: {content_str[:50]}")
+        return
 
     # Get embedding (always use string content)
     try:
@@ -65,6 +62,10 @@ def remember(
         log_error(f"remember: embedding failed: {exc}")
         emb = []
 
+    if find_near_duplicate(log, emb, event_type) is not None:
+        log_private(f"[long_memory] Skipped near-duplicate memory: {content_str[:50]}")
+        return
+
     detected = _emotion_name(emotion or detect_emotion(content_str))
 
     entry = {
@@ -86,5 +87,6 @@ def remember(
         "context": context,
     }
 
-    long_memory.append(entry)
-    save_json(LONG_MEMORY_FILE, long_memory)
\ No newline at end of file
+    externalize_embeddings([entry], LONG_MEMORY_FILE)
+    log.append(entry)
+    index_for(LONG_MEMORY_FILE).sync()
\ No newline at end of file
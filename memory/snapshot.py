@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import os
+import struct
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Union
+
+import numpy as np
+
+from memory.ann_index import adopt_index, index_for
+from memory.embedding_store import store_for
+from memory.long_store import adopt_long_log, long_log_for
+from memory.working_store import adopt_working_memory, working_memory_for
+from paths import LONG_MEMORY_FILE, MEMORY_SNAPSHOT_FILE, WORKING_MEMORY_FILE
+from utils.durability import sync_before_replace, sync_replaced
+from utils.json_utils import dumps_json, flush_state, loads_json
+from utils.log import log_error
+
+# Warm-restart bundle for working + long memory, written on graceful shutdown and read
+# at boot so the first cycle does not re-read the long-memory index and every record,
+# re-normalize the embedding matrices or regroup the ANN index:
+#   MAGIC | u64 header offset | u64 header length | arrays (64-byte aligned) | header JSON
+# The header holds the long-memory log state with its parsed entries, the working-memory
+# rows and where each array lives; arrays (normalized embeddings, IVF lists) are
+# memory-mapped copy-on-write straight out of the file. Every part is checked against
+# the files it was taken from (segment sizes, file signature, store generation) and
+# ignored if they changed since, so a stale bundle only costs the normal load.
+
+SNAPSHOT_MAGIC = b"ORRSNAP1"
+SNAPSHOT_VERSION = 1
+_PREFIX = struct.Struct("<8sQQ")
+_ALIGN = 64
+
+PathLike = Union[str, Path]
+
+
+def _same(a: Any, b: PathLike) -> bool:
+    return os.path.abspath(os.fspath(a)) == os.path.abspath(os.fspath(b))
+
+
+def save_memory_snapshot(
+    path: PathLike = MEMORY_SNAPSHOT_FILE,
+    long_path: PathLike = LONG_MEMORY_FILE,
+    working_path: PathLike = WORKING_MEMORY_FILE,
+) -> bool:
+    """Write the memory bundle (buffered state is flushed first). Returns True on success."""
+    try:
+        flush_state()
+        arrays: Dict[str, np.ndarray] = {}
+        header: Dict[str, Any] = {
+            "version": SNAPSHOT_VERSION,
+            "created": datetime.now(timezone.utc).isoformat(),
+            "long": {"path": str(long_path), "state": long_log_for(long_path).export_state()},
+            "working": {"path": str(working_path), "state": working_memory_for(working_path).export_state()},
+            "stores": {},
+            "index": None,
+        }
+        for name, p in (("long", long_path), ("working", working_path)):
+            store = store_for(p)
+            if len(store) and store.dim > 0:
+                arrays[f"{name}.unit"] = store.normalized()
+                header["stores"][name] = {"path": str(p), "generation": store.generation, "array": f"{name}.unit"}
+        ivf = index_for(long_path).export_arrays()
+        if ivf is not None:
+            header["index"] = {"path": str(long_path), "arrays": {k: f"ivf.{k}" for k in ivf}}
+            arrays.update({f"ivf.{k}": v for k, v in ivf.items()})
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        layout: Dict[str, Dict[str, Any]] = {}
+        with open(tmp, "wb") as f:
+            f.write(_PREFIX.pack(SNAPSHOT_MAGIC, 0, 0))
+            for name, arr in arrays.items():
+                arr = np.ascontiguousarray(arr)
+                f.write(b"\0" * (-f.tell() % _ALIGN))
+                layout[name] = {"offset": f.tell(), "dtype": arr.dtype.str, "shape": list(arr.shape)}
+                f.write(arr.tobytes())
+            header["arrays"] = layout
+            blob = dumps_json(header, pretty=False)
+            offset = f.tell()
+            f.write(blob)
+            f.seek(0)
+            f.write(_PREFIX.pack(SNAPSHOT_MAGIC, offset, len(blob)))
+            sync_before_replace(f)
+        os.replace(tmp, path)
+        sync_replaced(path)
+        return True
+    except Exception as e:
+        log_error(f"[snapshot] could not write memory snapshot: {e}")
+        return False
+
+
+def load_memory_snapshot(
+    path: PathLike = MEMORY_SNAPSHOT_FILE,
+    long_path: PathLike = LONG_MEMORY_FILE,
+    working_path: PathLike = WORKING_MEMORY_FILE,
+) -> Dict[str, Any]:
+    """
+    Warm the memory stores from the bundle, before anything else opens them. Returns which
+    parts were used (and the time it took); parts that no longer match are skipped.
+    """
+    t0 = time.perf_counter()
+    used: Dict[str, Any] = {"long": False, "working": False, "vectors": 0, "index": False}
+    path = Path(path)
+    if not path.is_file():
+        return used
+    try:
+        with open(path, "rb") as f:
+            magic, offset, length = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != SNAPSHOT_MAGIC or not offset:
+                log_error(f"[snapshot] {path.name} is not a memory snapshot; ignoring it.")
+                return used
+            f.seek(offset)
+            header = loads_json(f.read(length))
+        if header.get("version") != SNAPSHOT_VERSION:
+            return used
+
+        def array(name: str) -> np.ndarray:
+            spec = header["arrays"][name]
+            shape = tuple(spec["shape"])
+            if not all(shape):
+                return np.zeros(shape, dtype=np.dtype(spec["dtype"]))
+            return np.memmap(path, dtype=np.dtype(spec["dtype"]), mode="c", offset=spec["offset"], shape=shape)
+
+        long_part, working_part = header.get("long") or {}, header.get("working") or {}
+        if _same(long_part.get("path", ""), long_path):
+            used["long"] = adopt_long_log(long_path, long_part.get("state") or {})
+        if _same(working_part.get("path", ""), working_path):
+            used["working"] = adopt_working_memory(working_path, working_part.get("state") or {})
+        for name, spec in (header.get("stores") or {}).items():
+            if _same(spec.get("path", ""), long_path if name == "long" else working_path):
+                used["vectors"] += bool(store_for(spec["path"]).adopt_normalized(
+                    array(spec["array"]), int(spec.get("generation", -1))))
+        index = header.get("index")
+        if index and _same(index.get("path", ""), long_path):
+            used["index"] = adopt_index(long_path, {k: array(v) for k, v in index["arrays"].items()})
+    except Exception as e:
+        log_error(f"[snapshot] could not load memory snapshot: {e}")
+    used["ms"] = round((time.perf_counter() - t0) * 1e3, 3)
+    return used
@@ -40,7 +40,9 @@ def summarize_and_promote_working_memory(memories: List[Dict[str, Any]]) -> None
     related_ids = [m.get("id") for m in memories if m.get("id")]
     referenced_total = sum(m.get("referenced", 0) for m in memories)
     pin_flag = any(m.get("pin", False) for m in memories)
-    decay_avg = sum((m.get("decay", 1.0) or 1.0) for m in memories) / max(len(memories), 1)
+    # decay is the effective value (working_store applies the lazy epoch decay on read)
+    decay_avg = sum(float(m.get("decay", 1.0) if m.get("decay") is not None else 1.0)
+                    for m in memories) / max(len(memories), 1)
     recall_total = sum(m.get("recall_count", 0) for m in memories)
 
     content_str = f"📝 Working memory summary: {summary_text}{extra_info}"
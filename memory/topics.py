@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+from memory.ann_index import _atomic_savez
+from memory.embedding_store import store_for
+from memory.long_store import long_log_for
+from paths import LONG_MEMORY_FILE
+from utils.json_utils import load_json, save_json
+from utils.log import log_error
+from utils.memory_utils import summarize_memories
+
+# Topic clusters over a memory file's embeddings, built offline (a consolidation job):
+#   <stem>.topics.npz    unit centroids + the number of rows they were trained on
+#   <stem>.topics.json   {"topics": [{"size", "summary"}]} - one summary per centroid, made
+#                        from the members nearest to it
+# Rows are assigned to their nearest centroid on demand, so appends and compactions only
+# cost an (n x k) product; centroids are retrained once the store has changed by
+# TOPIC_RETRAIN_GROWTH. Recall uses them as a two-level search (nearest centroids, then
+# their members) on stores too small for the ANN index, and pruning summarises the
+# memories it removes per topic instead of as one undifferentiated batch.
+
+TOPIC_MIN_ROWS: int = 200            # below this, no clustering
+TOPIC_RECALL_MIN_ROWS: int = 1000    # two-level recall only pays off above this
+TOPIC_PROBE: int = 8                 # nearest topics scanned (~0.98 recall@8 at 2k rows, 44 topics)
+TOPIC_RETRAIN_GROWTH: float = 0.25   # retrain once rows changed by this fraction
+TOPIC_SUMMARY_ITEMS: int = 5         # members (nearest the centroid) per topic summary
+TOPIC_BATCH: int = 256
+TOPIC_ITERS: int = 60
+
+
+def minibatch_kmeans(
+    unit: np.ndarray, k: int, batch: int = TOPIC_BATCH, iters: int = TOPIC_ITERS, seed: int = 0,
+) -> np.ndarray:
+    """
+    Spherical mini-batch k-means (Sculley 2010) on unit rows, k-means++ seeded: each step
+    moves the centroids of a random batch towards their members with a per-centroid
+    1/count learning rate.
+    Returns (k, dim) unit centroids; k is capped at the number of rows.
+    """
+    n = len(unit)
+    k = min(int(k), n)
+    if k <= 0:
+        return np.zeros((0, unit.shape[1] if unit.ndim == 2 else 0), dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    # k-means++ seeding (on cosine distance) over a sample keeps far-apart topics apart
+    sample = np.asarray(unit[rng.choice(n, size=min(n, max(40 * k, 1024)), replace=False)], dtype=np.float32)
+    cents = np.empty((k, sample.shape[1]), dtype=np.float32)
+    cents[0] = sample[rng.integers(len(sample))]
+    dist = np.maximum(1.0 - sample @ cents[0], 0.0)
+    for i in range(1, k):
+        total = float(dist.sum())
+        pick = rng.choice(len(sample), p=dist / total) if total > 0 else rng.integers(len(sample))
+        cents[i] = sample[pick]
+        dist = np.minimum(dist, np.maximum(1.0 - sample @ cents[i], 0.0))
+    counts = np.zeros(k, dtype=np.float64)
+    for _ in range(iters):
+        x = np.asarray(unit[rng.choice(n, size=min(batch, n), replace=False)], dtype=np.float32)
+        labels = np.argmax(x @ cents.T, axis=1)
+        for c in np.unique(labels):
+            members = x[labels == c]
+            counts[c] += len(members)
+            eta = len(members) / counts[c]
+            cents[c] = (1.0 - eta) * cents[c] + eta * members.mean(axis=0)
+        norms = np.linalg.norm(cents, axis=1, keepdims=True)
+        cents = np.divide(cents, norms, out=np.zeros_like(cents), where=norms > 0)
+    return cents
+
+
+class TopicModel:
+    """Topic centroids and summaries for one memory file's EmbeddingStore."""
+
+    def __init__(self, json_path: Union[str, Path]) -> None:
+        self.json_path = Path(json_path)
+        base = self.json_path.with_suffix("")
+        self.path = base.with_name(f"{base.name}.topics.npz")
+        self.meta_path = base.with_name(f"{base.name}.topics.json")
+        self._lock = threading.RLock()
+        self.centroids: Optional[np.ndarray] = None
+        self.trained_rows = 0
+        self.topics: List[Dict[str, Any]] = []
+        self._assign: Optional[np.ndarray] = None
+        self._assign_key: Optional[tuple] = None
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            with np.load(self.path) as z:
+                self.centroids = np.asarray(z["centroids"], dtype=np.float32)
+                self.trained_rows = int(z["meta"][0])
+        except Exception as exc:
+            log_error(f"[topics] failed to load {self.path.name}: {exc}")
+            self.centroids = None
+            return
+        meta = load_json(self.meta_path, default_type=dict)
+        self.topics = [t for t in meta.get("topics", []) if isinstance(t, dict)]
+
+    def __len__(self) -> int:
+        return 0 if self.centroids is None else len(self.centroids)
+
+    def stale(self) -> bool:
+        """True when retraining is due (no model yet, or the store changed enough)."""
+        n = len(store_for(self.json_path))
+        if n < TOPIC_MIN_ROWS:
+            return self.centroids is not None
+        if self.centroids is None or self.centroids.shape[1] != store_for(self.json_path).dim:
+            return True
+        return abs(n - self.trained_rows) > TOPIC_RETRAIN_GROWTH * max(self.trained_rows, 1)
+
+    def rebuild(self) -> int:
+        """Retrain centroids on every stored row and refresh the topic summaries. Returns the topic count."""
+        with self._lock:
+            store = store_for(self.json_path)
+            unit = store.normalized()
+            n = len(unit)
+            if n < TOPIC_MIN_ROWS:
+                self.centroids, self.topics, self.trained_rows, self._assign = None, [], 0, None
+                for p in (self.path, self.meta_path):
+                    try:
+                        p.unlink()
+                    except OSError:
+                        pass
+                return 0
+            k = int(np.clip(np.sqrt(n), 4, 256))
+            self.centroids = minibatch_kmeans(unit, k)
+            self.trained_rows = n
+            self._assign = None
+            assign = self.assignments()
+            sims = np.einsum("ij,ij->i", unit, self.centroids[assign])
+
+            log = long_log_for(self.json_path)
+            ids = store.ids
+            self.topics = []
+            for t in range(len(self.centroids)):
+                rows = np.flatnonzero(assign == t)
+                nearest = rows[np.argsort(-sims[rows], kind="stable")]
+                # Stored rows can belong to deleted entries until the store is compacted
+                members = log.get_many(ids[r] for r in nearest[: 4 * TOPIC_SUMMARY_ITEMS])
+                self.topics.append({
+                    "size": int(rows.size),
+                    "summary": summarize_memories(members[:TOPIC_SUMMARY_ITEMS], truncate=120),
+                })
+            _atomic_savez(self.path, centroids=self.centroids, meta=np.asarray([n], dtype=np.int64))
+            save_json(self.meta_path, {"topics": self.topics})
+            return len(self.centroids)
+
+    def assignments(self) -> np.ndarray:
+        """Topic of every stored row (recomputed after appends or compaction)."""
+        with self._lock:
+            store = store_for(self.json_path)
+            key = (store.generation, len(store))
+            if self.centroids is None:
+                return np.zeros(0, dtype=np.int32)
+            if self._assign is None or self._assign_key != key:
+                # Appends only assign the new rows; a new generation (compaction) reassigns all
+                keep = np.zeros(0, dtype=np.int32)
+                if self._assign is not None and self._assign_key[0] == key[0] and self._assign_key[1] <= key[1]:
+                    keep = self._assign
+                unit = store.normalized()
+                fresh = np.argmax(unit[len(keep):] @ self.centroids.T, axis=1).astype(np.int32)
+                self._assign = np.concatenate([keep, fresh])
+                self._assign_key = key
+            return self._assign
+
+    def topic_of(self, ids: Iterable[Any]) -> Dict[str, int]:
+        """memory id -> topic for the ids that have a stored vector."""
+        with self._lock:
+            if self.centroids is None:
+                return {}
+            store = store_for(self.json_path)
+            assign = self.assignments()
+            out = {}
+            for mid in ids:
+                row = store.row_of(mid)
+                if row is not None and row < len(assign):
+                    out[str(mid)] = int(assign[row])
+            return out
+
+    def summary(self, topic: int) -> str:
+        return str(self.topics[topic].get("summary", "")) if 0 <= topic < len(self.topics) else ""
+
+    def search_ids(self, q: np.ndarray, probe: int = TOPIC_PROBE) -> Optional[List[str]]:
+        """
+        Ids of every row in the `probe` topics nearest to unit query `q` (centroids first,
+        then members), or None when the store is too small or unclustered.
+        """
+        with self._lock:
+            store = store_for(self.json_path)
+            if self.centroids is None or len(store) < TOPIC_RECALL_MIN_ROWS or store.dim != q.size:
+                return None
+            sims = self.centroids @ np.asarray(q, dtype=np.float32)
+            best = np.argsort(-sims, kind="stable")[: max(1, int(probe))]
+            rows = np.flatnonzero(np.isin(self.assignments(), best))
+            ids = store.ids
+            return [ids[r] for r in rows]
+
+
+_MODELS: Dict[str, TopicModel] = {}
+_MODELS_LOCK = threading.Lock()
+
+
+def topics_for(json_path: Union[str, Path]) -> TopicModel:
+    """The (process-wide) TopicModel for a memory file."""
+    key = os.path.abspath(os.fspath(json_path))
+    with _MODELS_LOCK:
+        model = _MODELS.get(key)
+        if model is None:
+            model = TopicModel(key)
+            _MODELS[key] = model
+        return model
+
+
+def recluster_long_memory(json_path: Union[str, Path] = LONG_MEMORY_FILE) -> int:
+    """Consolidation job: retrain long memory's topics if they are stale. Returns the topic count."""
+    model = topics_for(json_path)
+    return model.rebuild() if model.stale() else len(model)
@@ -7,9 +7,10 @@ import numpy as np
 
 from emotion.emotion import detect_emotion
 from utils.embedder import get_embedding
-from utils.json_utils import load_json, save_json
 from utils.log import log_private, log_error
-from memory.summarize_w_memory import summarize_and_promote_working_memory
+from memory.consolidation import submit_consolidation
+from memory.embedding_store import recover_embedding
+from memory.working_store import working_memory_for
 from paths import WORKING_MEMORY_FILE
 
 MAX_WORKING_LOGS: int = 50  # adjust as needed
@@ -45,10 +46,6 @@ def update_working_memory(
     """
     Add a new entry to working memory and manage pruning.
     """
-    memories: list = load_json(WORKING_MEMORY_FILE, default_type=list)
-    if not isinstance(memories, list):
-        memories = []
-
     now = datetime.now(timezone.utc).isoformat()
 
     # Build or copy the entry
@@ -67,7 +64,9 @@ def update_working_memory(
         entry.setdefault("pin", pin)
         entry.setdefault("decay", 1.0)
         entry.setdefault("related_memory_ids", related_memory_ids or [])
-        emb = entry.get("embedding")
+        # Rows copied from a memory file carry a sidecar row, not the vector itself
+        entry.pop("embedding_row", None)
+        emb = entry.get("embedding") or recover_embedding(new, WORKING_MEMORY_FILE)
         if not emb:
             emb = _safe_embedding(entry.get("content", ""))
         elif isinstance(emb, np.ndarray):
@@ -97,50 +96,11 @@ def update_working_memory(
         # Unsupported type, nothing to do
         return
 
-    # Update decay and reference counts on existing memories
-    for m in memories:
-        if not m.get("pin"):
-            m["decay"] = max(0.0, (m.get("decay", 1.0) or 1.0) - 0.02)
-        if m.get("content") == entry.get("content"):
-            m["referenced"] = m.get("referenced", 0) + entry.get("referenced", 0)
-            m["decay"] = min(1.0, (m.get("decay", 1.0) or 1.0) + 0.1)
-
-    # De-duplicate pinned entries by content
-    if entry.get("pin"):
-        memories = [m for m in memories if not (m.get("pin") and m.get("content") == entry.get("content"))]
-
-    memories.append(entry)
-
-    # Sort by pin, then priority/importance/decay, then timestamp (newest last)
-    memories.sort(
-        key=lambda m: (
-            m.get("pin", False),
-            m.get("priority", 1),
-            m.get("importance", 1),
-            m.get("decay", 1.0),
-            m.get("timestamp", ""),
-        ),
-        reverse=True,
-    )
-
-    # Handle overflow: keep all pins, trim non-pins; never slice with a negative start
-    if len(memories) > MAX_WORKING_LOGS:
-        pins = [m for m in memories if m.get("pin")]
-        non_pins = [m for m in memories if not m.get("pin")]
-
-        capacity_for_non_pins = max(0, MAX_WORKING_LOGS - len(pins))
-        dropped = non_pins[capacity_for_non_pins:]
-        kept_non_pins = non_pins[:capacity_for_non_pins]
-
-        # If pins alone exceed the cap, we keep them all (pins are never pruned)
-        kept = pins + kept_non_pins
-
-        if dropped:
-            summarize_and_promote_working_memory(dropped)
-            log_private(f"[working_memory] Promoted {len(dropped)} old entries to long-term memory summary.")
-
-        memories = kept
-
-    # Sort chronologically for the final write
-    memories.sort(key=lambda m: m.get("timestamp", ""))
-    save_json(WORKING_MEMORY_FILE, memories)
\ No newline at end of file
+    # Decay, reinforcement of same-content entries, pin de-duplication and eviction of
+    # the weakest non-pinned entries all happen incrementally (memory/working_store.py)
+    dropped = working_memory_for(WORKING_MEMORY_FILE).add(entry, MAX_WORKING_LOGS)
+    if dropped:
+        # Summarising and promoting them (LLM calls, long-memory pruning) is left to the
+        # consolidation queue, so this write never waits on memory housekeeping
+        submit_consolidation("promote_working_memory", dropped)
+        log_private(f"[working_memory] Queued {len(dropped)} old entries for promotion to long-term memory.")
@@ -0,0 +1,364 @@
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from memory.embedding_store import externalize_embeddings, store_for
+from utils.json_utils import (
+    STATE_STORE, _to_native, _write_json_atomic, get_adapter, join_transactions, load_json,
+    loads_json, register_adapter, save_json,
+)
+from utils.log import log_error
+from utils.state_store import clone_json, file_signature
+
+# Working memory kept resident instead of being loaded, decayed, sorted twice and
+# rewritten on every update_working_memory() call:
+#   - decay is lazy: each insert bumps a global write epoch, and an entry's decay is its
+#     stored value minus DECAY_STEP per epoch since "decay_epoch" (when it was stored).
+#     The file keeps (decay, decay_epoch) per row and the epoch in <stem>.epoch.json, so
+#     an insert never rewrites other rows' decay; readers get the effective value.
+#   - a content index finds the entries a new one reinforces without scanning
+#   - non-pinned entries sit in a min-heap on (priority, importance, decay, timestamp),
+#     so evicting the weakest is O(log n); stale heap items are skipped on pop
+#   - the JSON file is written through, or once per cycle under write-back
+#     (StateTransaction; a rolled-back cycle re-reads it); rows are materialized only
+#     when someone reads them
+
+DECAY_STEP: float = 0.02
+REFERENCE_BOOST: float = 0.1
+
+HeapItem = Tuple[float, float, float, str, str]
+
+
+def _num(v: Any, default: float = 1.0) -> float:
+    try:
+        return float(v) if v is not None else default
+    except (TypeError, ValueError):
+        return default
+
+
+def _content_key(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    return json.dumps(content, sort_keys=True, default=str)
+
+
+class WorkingMemory:
+    """Resident working memory for one JSON file, keyed by entry id."""
+
+    def __init__(self, json_path: Union[str, Path], state: Optional[Dict[str, Any]] = None) -> None:
+        self.json_path = Path(json_path)
+        self.epoch_path = self.json_path.with_name(f"{self.json_path.stem}.epoch.json")
+        self._lock = threading.RLock()
+        self._epoch = 0
+        self.restored = state is not None and self._restore(state)
+        if not self.restored:
+            self._load()
+        join_transactions(self)
+
+    # ---- state ----
+    def _reset(self) -> None:
+        """Forget every entry (the epoch keeps counting, so stored decay_epochs stay valid)."""
+        self._entries: Dict[str, Dict[str, Any]] = {}   # id -> row (decay as of _touched[id])
+        self._touched: Dict[str, int] = {}              # id -> epoch its decay was stored at
+        self._by_content: Dict[str, Set[str]] = {}
+        self._heap: List[HeapItem] = []
+        self._heap_key: Dict[str, HeapItem] = {}        # live heap item per non-pinned id
+        self._pins = 0
+        self._last_ts = ""
+        self._ordered = True
+        self._dirty = False
+
+    def _load(self) -> None:
+        self._reset()
+        rows: Any = []
+        try:
+            if self.json_path.is_file() and self.json_path.stat().st_size:
+                rows = loads_json(self.json_path.read_bytes())
+        except Exception as e:
+            log_error(f"[working_store] could not read {self.json_path}: {e}")
+        rows = [r for r in rows if isinstance(r, dict)] if isinstance(rows, list) else []
+        meta = load_json(self.epoch_path, default_type=dict)
+        stamped = [r["decay_epoch"] for r in rows if isinstance(r.get("decay_epoch"), int)]
+        self._epoch = max([self._epoch, int(meta.get("epoch", 0) or 0)] + stamped)
+        for row in rows:
+            self._insert(row)
+        self._sig = file_signature(self.json_path)
+        if len(stamped) < len(rows):
+            # Backfill: rows written before decay_epoch existed hold an already-applied
+            # decay, so they start counting from now; persist the stamped form once.
+            self._changed()
+
+    def _restore(self, state: Dict[str, Any]) -> bool:
+        """Adopt export_state() output (memory/snapshot.py) if the file is unchanged since."""
+        sig = file_signature(self.json_path)
+        if sig is None or list(sig) != list(state.get("signature") or []):
+            return False
+        self._reset()
+        self._epoch = int(state.get("epoch", 0) or 0)
+        for row in state.get("rows") or []:
+            if isinstance(row, dict):
+                self._insert(row)
+        self._sig = sig
+        return True
+
+    def export_state(self) -> Dict[str, Any]:
+        """Stored rows (with decay_epoch), the epoch and the file signature they match."""
+        with self._lock:
+            self.flush()
+            rows = []
+            for mem_id, row in self._entries.items():
+                row = dict(row)
+                row["decay_epoch"] = self._touched[mem_id]
+                rows.append(row)
+            return {"rows": rows, "epoch": self._epoch, "signature": list(self._sig or [])}
+
+    def _fresh(self) -> None:
+        """Reload if the file was replaced behind our back (another process, a test...)."""
+        if not self._dirty and file_signature(self.json_path) != self._sig:
+            self._load()
+
+    def _decay_of(self, mem_id: str) -> float:
+        row = self._entries[mem_id]
+        decay = _num(row.get("decay"))
+        if row.get("pin"):
+            return decay
+        return max(0.0, decay - DECAY_STEP * (self._epoch - self._touched[mem_id]))
+
+    def _push(self, mem_id: str) -> None:
+        row = self._entries[mem_id]
+        if row.get("pin"):
+            self._heap_key.pop(mem_id, None)
+            return
+        # Every unpinned entry loses DECAY_STEP per epoch, so ordering by decay "as of
+        # epoch 0" is ordering by current decay and heap items never need re-keying.
+        item = (
+            _num(row.get("priority")),
+            _num(row.get("importance")),
+            _num(row.get("decay")) + DECAY_STEP * self._touched[mem_id],
+            str(row.get("timestamp", "")),
+            mem_id,
+        )
+        self._heap_key[mem_id] = item
+        heapq.heappush(self._heap, item)
+        if len(self._heap) > 2 * len(self._heap_key) + 16:
+            self._heap = list(self._heap_key.values())
+            heapq.heapify(self._heap)
+
+    def _insert(self, row: Dict[str, Any]) -> str:
+        mem_id = str(row.setdefault("id", str(uuid.uuid4())))
+        if mem_id in self._entries:
+            self._remove(mem_id)
+        stamp = row.pop("decay_epoch", None)
+        self._entries[mem_id] = row
+        self._touched[mem_id] = stamp if isinstance(stamp, int) and stamp <= self._epoch else self._epoch
+        self._by_content.setdefault(_content_key(row.get("content")), set()).add(mem_id)
+        if row.get("pin"):
+            self._pins += 1
+        ts = str(row.get("timestamp", ""))
+        if ts < self._last_ts:
+            self._ordered = False
+        self._last_ts = max(self._last_ts, ts)
+        self._push(mem_id)
+        return mem_id
+
+    def _remove(self, mem_id: str) -> Dict[str, Any]:
+        row = self._entries.pop(mem_id)
+        self._touched.pop(mem_id, None)
+        self._heap_key.pop(mem_id, None)
+        key = _content_key(row.get("content"))
+        ids = self._by_content.get(key)
+        if ids is not None:
+            ids.discard(mem_id)
+            if not ids:
+                del self._by_content[key]
+        if row.get("pin"):
+            self._pins -= 1
+        return row
+
+    def _materialize(self, mem_id: str) -> Dict[str, Any]:
+        row = clone_json(self._entries[mem_id])
+        row["decay"] = round(self._decay_of(mem_id), 6)
+        return row
+
+    def _evict_one(self) -> Optional[Dict[str, Any]]:
+        while self._heap:
+            item = heapq.heappop(self._heap)
+            if self._heap_key.get(item[-1]) == item:
+                row = self._materialize(item[-1])
+                self._remove(item[-1])
+                return row
+        return None
+
+    # ---- API ----
+    def add(self, entry: Dict[str, Any], max_entries: int) -> List[Dict[str, Any]]:
+        """
+        Insert `entry` (embedding already externalized or present), decaying everything
+        else by one step and reinforcing entries with the same content. Returns the
+        unpinned entries evicted to stay within `max_entries` (pins are never evicted).
+        """
+        with self._lock:
+            self._fresh()
+            self._epoch += 1
+            key = _content_key(entry.get("content"))
+            same = list(self._by_content.get(key, ()))
+            for mem_id in same:
+                row = self._entries[mem_id]
+                row["referenced"] = row.get("referenced", 0) + entry.get("referenced", 0)
+                row["decay"] = min(1.0, self._decay_of(mem_id) + REFERENCE_BOOST)
+                self._touched[mem_id] = self._epoch
+                self._push(mem_id)
+            if entry.get("pin"):
+                for mem_id in same:
+                    if self._entries[mem_id].get("pin"):
+                        self._remove(mem_id)
+
+            externalize_embeddings([entry], self.json_path)
+            self._insert(_to_native(entry))
+
+            dropped = []
+            while len(self._entries) - self._pins > max(0, max_entries - self._pins):
+                row = self._evict_one()
+                if row is None:
+                    break
+                dropped.append(row)
+            self._changed()
+            return dropped
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Private copies of every entry, oldest first, with decay brought up to date."""
+        with self._lock:
+            self._fresh()
+            if not self._ordered:
+                order = sorted(self._entries, key=lambda i: str(self._entries[i].get("timestamp", "")))
+                self._entries = {i: self._entries[i] for i in order}
+                self._ordered = True
+            return [self._materialize(i) for i in self._entries]
+
+    def replace(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Take `rows` as the whole working memory (callers that edit the list themselves).
+        Their decay is taken as current unless they carry a decay_epoch.
+        """
+        rows = [_to_native(r) for r in rows if isinstance(r, dict)]
+        externalize_embeddings(rows, self.json_path)
+        with self._lock:
+            self._reset()
+            for row in rows:
+                self._insert(row)
+            self._changed()
+
+    def bump_recall(self, ids: Iterable[Any], by: int = 1) -> int:
+        """
+        Add `by` to the recall_count of the given entries. Counters don't justify a write
+        of their own: the file picks them up at the next flush (end of cycle, or exit).
+        """
+        with self._lock:
+            self._fresh()
+            n = 0
+            for mem_id in dict.fromkeys(str(i) for i in ids):
+                row = self._entries.get(mem_id)
+                if row is not None:
+                    row["recall_count"] = int(row.get("recall_count", 0) or 0) + int(by)
+                    n += 1
+            if n:
+                self._dirty = True
+            return n
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._fresh()
+            return len(self._entries)
+
+    def _changed(self) -> None:
+        self._dirty = True
+        if not STATE_STORE.write_back:
+            self.flush()
+
+    def rollback(self) -> None:
+        """StateTransaction hook: drop the changes not written yet by re-reading the file."""
+        with self._lock:
+            if self._dirty:
+                self._dirty = False
+                self._epoch = 0   # back to the stored epoch, so decay isn't advanced either
+                self._load()
+
+    def flush(self) -> bool:
+        """Write the file if anything changed since the last write."""
+        with self._lock:
+            if not self._dirty:
+                return True
+            self.rows()  # puts entries in chronological order
+            rows = []
+            for mem_id, row in self._entries.items():
+                row = dict(row)
+                row["decay_epoch"] = self._touched[mem_id]
+                rows.append(row)
+            store_for(self.json_path).maybe_compact(rows)
+            ok = _write_json_atomic(self.json_path, rows, native=True)
+            STATE_STORE.invalidate(self.json_path)
+            save_json(self.epoch_path, {"epoch": self._epoch})
+            if ok:
+                self._dirty = False
+                self._sig = file_signature(self.json_path)
+            return ok
+
+
+_MEMORIES: Dict[str, WorkingMemory] = {}
+_MEMORIES_LOCK = threading.Lock()
+
+
+class _JsonView:
+    """Lets existing load_json/save_json callers keep treating working memory as a list file."""
+
+    def __init__(self, json_path: Union[str, Path]) -> None:
+        self.json_path = json_path
+
+    def load(self, default_type: type = list) -> List[Dict[str, Any]]:
+        return working_memory_for(self.json_path).rows()
+
+    def save(self, data: Any) -> None:
+        if not isinstance(data, list):
+            log_error(f"[working_store] refusing to save non-list data to {self.json_path}")
+            return
+        working_memory_for(self.json_path).replace(data)
+
+    def flush(self) -> None:
+        wm = _MEMORIES.get(os.path.abspath(os.fspath(self.json_path)))
+        if wm is not None:
+            wm.flush()
+
+
+def register_working_memory(json_path: Union[str, Path]) -> None:
+    """Route load_json/save_json for `json_path` through its WorkingMemory (opens nothing)."""
+    if get_adapter(json_path) is None:
+        register_adapter(json_path, _JsonView(json_path))
+
+
+def adopt_working_memory(json_path: Union[str, Path], state: Dict[str, Any]) -> bool:
+    """Open `json_path`'s WorkingMemory from a snapshot state if not open yet and still valid."""
+    key = os.path.abspath(os.fspath(json_path))
+    with _MEMORIES_LOCK:
+        if key in _MEMORIES:
+            return False
+        wm = WorkingMemory(key, state=state)
+        _MEMORIES[key] = wm
+    register_working_memory(key)
+    return wm.restored
+
+
+def working_memory_for(json_path: Union[str, Path]) -> WorkingMemory:
+    """The (process-wide) WorkingMemory behind `json_path`."""
+    key = os.path.abspath(os.fspath(json_path))
+    with _MEMORIES_LOCK:
+        wm = _MEMORIES.get(key)
+        if wm is None:
+            wm = WorkingMemory(key)
+            _MEMORIES[key] = wm
+    register_working_memory(key)
+    return wm
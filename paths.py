@@ -1,4 +1,5 @@
 # paths.py
+import os
 from pathlib import Path
 from typing import Iterable
 
@@ -67,6 +68,9 @@ CORE_MEMORY_FILE = DATA_DIR / "core_memory.json"
 LONG_MEMORY_FILE = DATA_DIR / "long_memory.json"
 WORKING_MEMORY_FILE = DATA_DIR / "working_memory.json"
 CHAT_LOG_FILE = DATA_DIR / "chat_log.json"
+CONSOLIDATION_QUEUE_FILE = DATA_DIR / "consolidation_queue.json"
+MEMORY_SNAPSHOT_FILE = DATA_DIR / "memory_snapshot.bin"
+EMBEDDING_CACHE_DIR = DATA_DIR / "embedding_cache"
 
 # ===== Prompts/Context =====
 REF_PROMPTS = DATA_DIR / "prompts.json"
@@ -135,6 +139,19 @@ STATE_SNAPSHOT_FILE = DATA_DIR / "state_snapshot.json"
 MODEL_FAILURES_FILE = DATA_DIR / "model_failures.jsonl"
 INCIDENTS_FILE = DATA_DIR / "incidents.jsonl"
 
+# ===== State backend =====
+# "json" (default): one file per path. "sqlite": every .json/.jsonl path under DATA_DIR is
+# kept in STATE_DB_FILE instead (WAL mode; flush_state() commits a cycle atomically).
+STATE_BACKEND = os.getenv("ORRIN_STATE_BACKEND", "json").lower()
+STATE_DB_FILE = Path(os.getenv("ORRIN_STATE_DB", str(DATA_DIR / "state.db")))
+# List-shaped files stored one row per item under the sqlite backend (.jsonl always are).
+# Long memory and the capped histories are not here: they have their own append-only
+# files (memory/long_store.py, utils/ring_buffer.py).
+ROW_STATE_FILES = (
+    GOALS_FILE,
+    FEEDBACK_LOG,
+)
+
 
 # ===== Templates kept for format() call sites that expect strings =====
 # If some legacy code does: BANDIT_JSON_TEMPLATE.format(ctx='x'), leave these as strings.
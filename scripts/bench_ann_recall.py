@@ -0,0 +1,102 @@
+# bench_ann_recall.py
+# Recall-vs-exact benchmark for memory/ann_index.py backends, for picking nlist/nprobe/ef.
+#
+#   python -m scripts.bench_ann_recall                   # synthetic clustered data
+#   python -m scripts.bench_ann_recall --rows 200000 --k 64
+#   python -m scripts.bench_ann_recall --from-store      # vectors from data/long_memory.emb.*
+
+import argparse
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from memory.ann_index import IVFIndex, HNSWIndex, hnswlib
+
+
+def synthetic(rows: int, dim: int, topics: int, seed: int = 0) -> np.ndarray:
+    """Unit vectors drawn around `topics` random directions (roughly how memories cluster)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(topics, dim)).astype(np.float32)
+    labels = rng.integers(0, topics, size=rows)
+    x = centers[labels] + 0.6 * rng.normal(size=(rows, dim)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def exact_topk(unit: np.ndarray, queries: np.ndarray, k: int) -> Tuple[List[set], float]:
+    t = time.perf_counter()
+    out = []
+    for q in queries:
+        sims = unit @ q
+        out.append(set(np.argpartition(-sims, k - 1)[:k].tolist()))
+    return out, (time.perf_counter() - t) / len(queries) * 1e3
+
+
+def evaluate(index, unit: np.ndarray, queries: np.ndarray, truth: List[set], k: int) -> Tuple[float, float]:
+    t = time.perf_counter()
+    hits = 0
+    for q, gt in zip(queries, truth):
+        got = index.search(unit, q, k)
+        hits += len(gt.intersection(got.tolist()))
+    ms = (time.perf_counter() - t) / len(queries) * 1e3
+    return hits / (k * len(queries)), ms
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--dim", type=int, default=768)
+    ap.add_argument("--topics", type=int, default=300)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=64, help="candidates requested (ANN_CANDIDATES)")
+    ap.add_argument("--from-store", action="store_true", help="use the real long-memory embedding store")
+    args = ap.parse_args()
+
+    if args.from_store:
+        from memory.embedding_store import store_for
+        from paths import LONG_MEMORY_FILE
+        unit = np.ascontiguousarray(store_for(LONG_MEMORY_FILE).normalized())
+        if len(unit) < args.k * 2:
+            print(f"Store has only {len(unit)} rows; nothing meaningful to benchmark.")
+            return
+    else:
+        unit = synthetic(args.rows, args.dim, args.topics)
+
+    rng = np.random.default_rng(1)
+    queries = unit[rng.choice(len(unit), size=args.queries, replace=False)]
+    queries = queries + 0.3 * rng.normal(size=queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    k = min(args.k, len(unit))
+    truth, exact_ms = exact_topk(unit, queries, k)
+    print(f"rows={len(unit)} dim={unit.shape[1]} k={k}  exact: {exact_ms:.2f} ms/query\n")
+
+    print(f"{'backend':<8} {'params':<22} {'build s':>8} {'recall@k':>9} {'ms/query':>9}")
+    base_nlist = int(np.clip(np.sqrt(len(unit)), 16, 4096))
+    for nlist in (base_nlist // 2, base_nlist, base_nlist * 2):
+        t = time.perf_counter()
+        ivf = IVFIndex(nlist=nlist)
+        ivf.build(unit)
+        build_s = time.perf_counter() - t
+        for nprobe in (4, 8, 16, 32):
+            ivf.nprobe = nprobe
+            recall, ms = evaluate(ivf, unit, queries, truth, k)
+            print(f"{'ivf':<8} {f'nlist={nlist} nprobe={nprobe}':<22} {build_s:>8.2f} {recall:>9.3f} {ms:>9.2f}")
+
+    if hnswlib is None:
+        print("\nhnswlib not installed; skipping the hnsw backend.")
+        return
+    for m in (16, 32):
+        t = time.perf_counter()
+        hnsw = HNSWIndex(unit.shape[1], m=m)
+        hnsw.build(unit)
+        build_s = time.perf_counter() - t
+        for ef in (64, 128, 256):
+            hnsw.ef = ef
+            hnsw._index.set_ef(max(ef, k))
+            recall, ms = evaluate(hnsw, unit, queries, truth, k)
+            print(f"{'hnsw':<8} {f'M={m} ef={ef}':<22} {build_s:>8.2f} {recall:>9.3f} {ms:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# bench_embedder.py
+# Startup / latency / throughput of the embedder backends in utils/embed_backends.py, and
+# how closely each one's cosine rankings follow the fp32 torch reference.
+#
+#   python -m scripts.bench_embedder                          # every available backend
+#   python -m scripts.bench_embedder --backends torch int8 --texts 500
+#   python -m scripts.bench_embedder --from-store --check     # real memories; exit 1 below tolerance
+
+import argparse
+import random
+import sys
+import time
+from typing import List
+
+import numpy as np
+
+from utils.embed_backends import RANK_AGREEMENT_MIN, backend_available, backend_names, load_backend, ranking_agreement
+from utils.embedder import MODEL_NAME
+
+WORDS = ("I", "noticed", "the", "user", "seemed", "curious", "about", "memory", "again", "today",
+         "and", "it", "felt", "good", "goal", "plan", "dream", "fear", "reflect", "learned", "why",
+         "sky", "blue", "music", "quiet", "tomorrow", "mistake", "change", "friend", "question")
+
+
+def synthetic(n: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randrange(6, 30))) for _ in range(n)]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--model", default=MODEL_NAME)
+    ap.add_argument("--backends", nargs="*", default=None, help=f"default: all of {backend_names()}")
+    ap.add_argument("--texts", type=int, default=300)
+    ap.add_argument("--singles", type=int, default=50, help="one-text encodes timed for latency")
+    ap.add_argument("--batch", type=int, default=32)
+    ap.add_argument("--from-store", action="store_true", help="embed long-memory contents")
+    ap.add_argument("--check", action="store_true", help=f"fail if top-k overlap < {RANK_AGREEMENT_MIN}")
+    args = ap.parse_args()
+
+    if args.from_store:
+        from memory.long_store import long_log_for
+        from paths import LONG_MEMORY_FILE
+        texts = [str(m.get("content", "")) for m in long_log_for(LONG_MEMORY_FILE).load_recent(args.texts)]
+    else:
+        texts = synthetic(args.texts)
+    if len(texts) < 20:
+        print(f"Only {len(texts)} texts; nothing meaningful to benchmark.")
+        return
+
+    t = time.perf_counter()
+    import sentence_transformers  # noqa: F401  (shared by every backend)
+    print(f"model={args.model} texts={len(texts)}  import sentence_transformers: {time.perf_counter() - t:.2f} s\n")
+
+    names = ["torch"] + [b for b in (args.backends or backend_names()) if b != "torch"]
+    print(f"{'backend':<8} {'load s':>7} {'p50 ms':>7} {'p95 ms':>7} {'texts/s':>8} {'top-k':>6} {'drift':>7}")
+    reference = None
+    failed = []
+    for name in names:
+        if not backend_available(name):
+            print(f"{name:<8} unavailable (optional packages missing)")
+            continue
+        t = time.perf_counter()
+        model = load_backend(name, args.model)
+        load_s = time.perf_counter() - t
+        model.encode(texts[:2], normalize_embeddings=True, show_progress_bar=False)  # warm-up
+
+        lat = []
+        for text in texts[: args.singles]:
+            t = time.perf_counter()
+            model.encode([text], normalize_embeddings=True, show_progress_bar=False)
+            lat.append((time.perf_counter() - t) * 1e3)
+        t = time.perf_counter()
+        vecs = model.encode(texts, batch_size=args.batch, normalize_embeddings=True, show_progress_bar=False)
+        tput = len(texts) / (time.perf_counter() - t)
+
+        if reference is None:
+            reference = vecs
+        agree = ranking_agreement(reference, vecs)
+        if agree["topk_overlap"] < RANK_AGREEMENT_MIN:
+            failed.append(name)
+        print(f"{name:<8} {load_s:>7.2f} {np.percentile(lat, 50):>7.1f} {np.percentile(lat, 95):>7.1f} "
+              f"{tput:>8.0f} {agree['topk_overlap']:>6.3f} {agree['max_score_drift']:>7.4f}")
+        del model
+
+    if failed:
+        print(f"\nBelow the ranking tolerance ({RANK_AGREEMENT_MIN}): {', '.join(failed)}")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# bench_json_codec.py
+# Encode/decode timings for the codecs behind utils/json_utils.py (stdlib, orjson, msgspec),
+# pretty vs compact, on the large state files that are rewritten every cycle.
+#
+#   python -m scripts.bench_json_codec
+#   python -m scripts.bench_json_codec --files data/attention_history.json --repeat 50
+
+import argparse
+import time
+from pathlib import Path
+from typing import Any, Callable, List
+
+import utils.json_utils as ju
+from paths import ATTENTION_HISTORY, COGNITION_HISTORY_FILE, EVOLUTION_FUTURES, REFLECTION
+
+DEFAULT_FILES = [ATTENTION_HISTORY, EVOLUTION_FUTURES, COGNITION_HISTORY_FILE, REFLECTION]
+
+
+def timed(fn: Callable[[], Any], repeat: int) -> float:
+    """Best-of-`repeat` wall time in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best * 1e3
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--files", nargs="*", type=Path, default=DEFAULT_FILES)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    codecs: List[str] = ["json"] + [c for c in ("orjson", "msgspec") if getattr(ju, c) is not None]
+    active = ju._CODEC
+    print(f"codecs available: {', '.join(codecs)} (active: {active})\n")
+    print(f"{'file':<28} {'codec':<8} {'mode':<8} {'bytes':>9} {'dump ms':>8} {'load ms':>8}")
+    try:
+        for path in args.files:
+            data = ju.load_json(path)  # through adapters: ring-backed histories load as lists
+            if not data:
+                print(f"{Path(path).name:<28} (missing)")
+                continue
+            for codec in codecs:
+                ju._CODEC = codec
+                for pretty in (True, False):
+                    blob = ju.dumps_json(data, pretty=pretty, native=True)
+                    dump_ms = timed(lambda: ju.dumps_json(data, pretty=pretty, native=True), args.repeat)
+                    load_ms = timed(lambda: ju.loads_json(blob), args.repeat)
+                    mode = "pretty" if pretty else "compact"
+                    print(f"{Path(path).name:<28} {codec:<8} {mode:<8} {len(blob):>9} {dump_ms:>8.2f} {load_ms:>8.2f}")
+    finally:
+        ju._CODEC = active
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# bench_memory_records.py
+# Resident size of long-memory entries held as parsed JSON dicts vs memory/record.py's
+# MemoryRecord, plus the cost of materialising them back to dicts.
+#
+#   python -m scripts.bench_memory_records                 # 100k synthetic entries
+#   python -m scripts.bench_memory_records --rows 20000
+#   python -m scripts.bench_memory_records --from-store    # entries from data/long_memory.*
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from memory.record import MemoryRecord
+from utils.state_store import clone_json
+
+EVENT_TYPES = ("summary", "reflection", "thought", "dream", "user_input", "goal_update")
+EMOTIONS = ("joy", "curiosity", "fear", "sadness", "neutral", "anger", "surprise")
+
+
+def synthetic(rows: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Entries shaped like update_long_memory() writes them, as json.loads returns them."""
+    import random
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    out = []
+    for i in range(rows):
+        ts = start + timedelta(seconds=i * 37, microseconds=rng.randrange(1_000_000))
+        out.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "timestamp": ts.isoformat(),
+            "content": " ".join(rng.choice(("I", "noticed", "the", "user", "seemed", "curious", "about",
+                                            "memory", "again", "today", "and", "it", "felt", "good"))
+                                for _ in range(rng.randrange(8, 40))),
+            "emotion": rng.choice(EMOTIONS),
+            "event_type": rng.choice(EVENT_TYPES),
+            "agent": "orrin",
+            "importance": rng.randrange(1, 4),
+            "priority": rng.randrange(1, 4),
+            "referenced": rng.randrange(0, 5),
+            "pin": False,
+            "related_memory_ids": [],
+            "recall_count": rng.randrange(0, 10),
+            "context": None,
+            "embedding_row": i,
+        })
+    # json.loads allocates every string separately, as the log's segment reads do
+    return [json.loads(json.dumps(e)) for e in out]
+
+
+def rss_kb() -> Optional[int]:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def measure(build: Callable[[], Any]) -> tuple:
+    gc.collect()
+    rss0 = rss_kb()
+    tracemalloc.start()
+    held = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.collect()
+    rss1 = rss_kb()
+    return held, current, (rss1 - rss0) if rss0 is not None and rss1 is not None else None
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--from-store", action="store_true", help="use the real long-memory log")
+    args = ap.parse_args()
+
+    if args.from_store:
+        from memory.long_store import long_log_for
+        from paths import LONG_MEMORY_FILE
+        lines = [json.dumps(e) for e in long_log_for(LONG_MEMORY_FILE).load_all()]
+    else:
+        lines = [json.dumps(e) for e in synthetic(args.rows)]
+    if not lines:
+        print("No entries to benchmark.")
+        return
+
+    # Records are measured first so the dict pass can't hand its freed pages to them
+    records, rec_bytes, rec_rss = measure(lambda: [MemoryRecord.from_dict(json.loads(s)) for s in lines])
+    dicts, dict_bytes, dict_rss = measure(lambda: [json.loads(s) for s in lines])
+    assert all(r.to_dict() == d for r, d in zip(records, dicts)), "round-trip mismatch"
+
+    n = len(lines)
+    print(f"entries={n}\n")
+    print(f"{'form':<14} {'traced MB':>10} {'bytes/entry':>12} {'RSS delta MB':>13}")
+    for name, b, r in (("dict", dict_bytes, dict_rss), ("MemoryRecord", rec_bytes, rec_rss)):
+        rss = f"{r / 1024:>13.1f}" if r is not None else f"{'n/a':>13}"
+        print(f"{name:<14} {b / 2**20:>10.1f} {b / n:>12.0f} {rss}")
+    print(f"\nreduction: {100.0 * (1 - rec_bytes / dict_bytes):.1f}% of traced bytes")
+
+    t = time.perf_counter()
+    for d in dicts:
+        clone_json(d)
+    clone_ms = (time.perf_counter() - t) * 1e3
+    t = time.perf_counter()
+    for r in records:
+        r.to_dict()
+    to_dict_ms = (time.perf_counter() - t) * 1e3
+    print(f"materialise all: clone_json(dict) {clone_ms:.0f} ms, MemoryRecord.to_dict() {to_dict_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# test_ann_index.py
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+import memory.ann_index as ann
+from memory.embedding_store import store_for
+
+
+def _clustered(rows, dim=16, topics=8, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(topics, dim))
+    x = centers[rng.integers(0, topics, size=rows)] + 0.2 * rng.normal(size=(rows, dim))
+    return (x / np.linalg.norm(x, axis=1, keepdims=True)).astype(np.float32)
+
+
+class IVFIndexTests(unittest.TestCase):
+    def test_probing_every_list_is_exact(self):
+        unit = _clustered(500)
+        idx = ann.IVFIndex(nlist=8, nprobe=8)
+        idx.build(unit)
+        q = unit[3]
+        exact = np.argsort(-(unit @ q))[:10]
+        self.assertEqual(idx.search(unit, q, 10).tolist(), exact.tolist())
+
+    def test_incremental_add_is_searchable(self):
+        unit = _clustered(300)
+        idx = ann.IVFIndex(nlist=4, nprobe=4)
+        idx.build(unit[:200])
+        idx.add(unit[200:])
+        self.assertEqual(idx.size, 300)
+        self.assertIn(250, idx.search(unit, unit[250], 5).tolist())
+
+
+class MemoryIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.json_path = Path(self.tempdir.name) / "long_memory.json"
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    @patch.object(ann, "ANN_MIN_ROWS", 50)
+    def test_sync_persist_and_reload(self):
+        store = store_for(self.json_path)
+        unit = _clustered(120)
+        for i, v in enumerate(unit[:80]):
+            store.put(f"m{i}", v)
+
+        index = ann.MemoryIndex(self.json_path, backend="ivf")
+        index.rebuild()
+        self.assertTrue(index.path.exists())
+        for i, v in enumerate(unit[80:], start=80):
+            store.put(f"m{i}", v)
+        self.assertIn("m100", index.search_ids(unit[100], k=5))
+
+        # A fresh instance loads the saved prefix and catches up from the store
+        reloaded = ann.MemoryIndex(self.json_path, backend="ivf")
+        self.assertIn("m110", reloaded.search_ids(unit[110], k=5))
+
+    def test_inactive_below_threshold(self):
+        store_for(self.json_path).put("only", [1.0, 0.0])
+        self.assertIsNone(ann.MemoryIndex(self.json_path).search_ids(np.array([1.0, 0.0]), k=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
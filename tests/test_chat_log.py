@@ -10,9 +10,11 @@ from memory.chat_log import (
     get_user_input,
     log_user_message,
     log_dialogue_pair,
-    log_raw_user_input,
     summarize_chat_to_long_memory,
 )
+from memory.long_store import long_log_for
+from utils.json_utils import load_json
+from utils.jsonl_log import JsonlLog
 
 class ChatLogModuleTests(unittest.TestCase):
     def test_is_noise_detection(self):
@@ -35,7 +37,8 @@ class ChatLogModuleTests(unittest.TestCase):
             finally:
                 paths.USER_INPUT = original_user_input
 
-    def test_log_user_message_appends_entry(self):
+    @patch("memory.chat_log.detect_emotion", return_value="neutral")
+    def test_log_user_message_appends_entry(self, _mock_emotion):
         with tempfile.TemporaryDirectory() as tmpdir:
             chat_path = Path(tmpdir) / "chat_log.json"
 
@@ -44,14 +47,16 @@ class ChatLogModuleTests(unittest.TestCase):
             paths.CHAT_LOG_FILE = str(chat_path)
             try:
                 log_user_message("Hello")
-                data = json.loads(chat_path.read_text(encoding="utf-8"))
+                lines = chat_path.with_suffix(".jsonl").read_text(encoding="utf-8").splitlines()
+                data = [json.loads(line) for line in lines]
                 self.assertEqual(len(data), 1)
                 self.assertEqual(data[0]["speaker"], "user")
                 self.assertEqual(data[0]["content"], "Hello")
             finally:
                 paths.CHAT_LOG_FILE = original_chat_log_file
 
-    def test_log_dialogue_pair_appends_both_messages(self):
+    @patch("memory.chat_log.detect_emotion", return_value="neutral")
+    def test_log_dialogue_pair_appends_both_messages(self, _mock_emotion):
         with tempfile.TemporaryDirectory() as tmpdir:
             chat_path = Path(tmpdir) / "chat_log.json"
 
@@ -60,7 +65,7 @@ class ChatLogModuleTests(unittest.TestCase):
             paths.CHAT_LOG_FILE = str(chat_path)
             try:
                 log_dialogue_pair("Hi", "Hello there", timestamp="2025-01-01T00:00:00Z")
-                entries = json.loads(chat_path.read_text(encoding="utf-8"))
+                entries = load_json(chat_path, default_type=list)
                 self.assertEqual(len(entries), 2)
                 self.assertEqual(entries[0]["speaker"], "user")
                 self.assertEqual(entries[1]["speaker"], "orrin")
@@ -70,7 +75,7 @@ class ChatLogModuleTests(unittest.TestCase):
 
     @patch("memory.chat_log.generate_response", return_value="Short summary")
     def test_summarize_chat_to_long_memory_creates_memory(self, _mock_generate):
-        """Summarization adds one memory and trims the chat log."""
+        """Summarization adds one memory and advances the cursor instead of trimming the log."""
         with tempfile.TemporaryDirectory() as tmpdir:
             chat_log_path = Path(tmpdir) / "chat_log.json"
             long_memory_path = Path(tmpdir) / "long_memory.json"
@@ -93,16 +98,48 @@ class ChatLogModuleTests(unittest.TestCase):
                 )
 
                 # Verify long memory gained one entry
-                long_memory = json.loads(long_memory_path.read_text(encoding="utf-8"))
+                long_memory = long_log_for(long_memory_path).load_all()
                 self.assertEqual(len(long_memory), 1)
                 self.assertEqual(long_memory[0]["content"], "Short summary")
 
-                # Verify chat log trimmed to 10
-                trimmed_chat = json.loads(chat_log_path.read_text(encoding="utf-8"))
-                self.assertEqual(len(trimmed_chat), 10)
+                # The legacy JSON array was migrated; the window moved on by 10
+                self.assertEqual(len(JsonlLog(chat_log_path)), 20)
+                cursor = json.loads((Path(tmpdir) / "chat_log.cursor.json").read_text(encoding="utf-8"))
+                self.assertEqual(cursor, {"cursor": 10})
+
+                # Only 10 unsummarized messages left: nothing happens until 10 more arrive
+                summarize_chat_to_long_memory(10, str(chat_log_path), str(long_memory_path))
+                self.assertEqual(len(long_log_for(long_memory_path).load_all()), 1)
             finally:
                 paths.CHAT_LOG_FILE = original_chat
                 paths.LONG_MEMORY_FILE = original_long
 
+class JsonlLogTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.json_path = Path(self.tempdir.name) / "chat_log.json"
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_reads_by_position_and_drops_prefix(self):
+        log = JsonlLog(self.json_path)
+        log.extend([{"n": i} for i in range(5)])
+        self.assertEqual(log.tail(2), [{"n": 3}, {"n": 4}])
+        self.assertEqual(log.read(1, 3), [{"n": 1}, {"n": 2}])
+        self.assertEqual(log.drop_before(3), 3)
+        log.append({"n": 5})
+        self.assertEqual(JsonlLog(self.json_path).load_all(), [{"n": 3}, {"n": 4}, {"n": 5}])
+
+    def test_reopen_drops_torn_line(self):
+        log = JsonlLog(self.json_path)
+        log.append({"n": 1})
+        with open(log.path, "ab") as f:
+            f.write(b'{"n": 2')
+        reopened = JsonlLog(self.json_path)
+        reopened.append({"n": 3})
+        self.assertEqual(reopened.load_all(), [{"n": 1}, {"n": 3}])
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
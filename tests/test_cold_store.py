@@ -0,0 +1,76 @@
+# test_cold_store.py
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+import utils.knowledge_utils as ku
+from memory.cold_store import ColdArchive, cold_for
+from memory.embedding_store import entry_embedding, externalize_embeddings
+from memory.long_store import long_log_for
+
+
+def _entry(i, vec):
+    return {"id": f"m{i}", "content": f"fact {i}", "importance": 1, "priority": 1,
+            "recall_count": 0, "embedding": list(vec)}
+
+
+class ColdArchiveTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.long_path = Path(self.tempdir.name) / "long_memory.json"
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def _demote(self, entries):
+        externalize_embeddings(entries, self.long_path)
+        return cold_for(self.long_path).demote(entries, self.long_path)
+
+    def test_demoted_entries_are_compressed_and_searchable(self):
+        self.assertEqual(self._demote([_entry(0, [1.0, 0.0]), _entry(1, [0.0, 1.0])]), 2)
+        archive = ColdArchive(self.long_path)  # reopened from the manifest
+        self.assertEqual(len(archive), 2)
+        self.assertEqual([p.suffix for p in archive.dir.glob("seg-*")], [".gz"])
+        hits = archive.search([0.9, 0.1], k=1)
+        self.assertEqual([e["id"] for _, e in hits], ["m0"])
+        self.assertNotIn("embedding_row", hits[0][1])
+        self.assertGreater(hits[0][0], 0.9)
+
+    def test_take_removes_entries_and_returns_vectors(self):
+        self._demote([_entry(0, [1.0, 0.0]), _entry(1, [0.0, 1.0])])
+        archive = cold_for(self.long_path)
+        taken = archive.take(["m0"])
+        self.assertEqual(taken[0]["embedding"], [1.0, 0.0])
+        self.assertEqual([e["id"] for _, e in archive.search([1.0, 0.0], k=5)], ["m1"])
+        archive.take(["m1"])
+        self.assertEqual(list(archive.dir.glob("seg-*")), [])
+
+    def test_recall_falls_back_to_cold_tier_and_rewarms(self):
+        self._demote([_entry(0, [0.0, 1.0])])
+        warm = [_entry(1, [1.0, 0.0])]
+        externalize_embeddings(warm, self.long_path)
+        tmp = Path(self.tempdir.name)
+        with patch.object(ku, "LONG_MEMORY_FILE", self.long_path), \
+                patch.object(ku, "WORKING_MEMORY_FILE", tmp / "working_memory.json"), \
+                patch.object(ku, "KNOWLEDGE", tmp / "knowledge_base.json"):
+            with patch("utils.knowledge_utils.get_embedding", return_value=np.array([1.0, 0.0])):
+                got = ku.recall_relevant_knowledge("q", long_memory=list(warm), working_memory=[], max_items=1)
+            self.assertEqual([m["id"] for m in got], ["m1"])  # warm match is close enough
+            self.assertEqual(len(cold_for(self.long_path)), 1)
+
+            passed = list(warm)
+            with patch("utils.knowledge_utils.get_embedding", return_value=np.array([0.0, 1.0])):
+                got = ku.recall_relevant_knowledge("q", long_memory=passed, working_memory=[], max_items=1)
+            self.assertEqual([m["id"] for m in got], ["m0"])
+            self.assertEqual([m["id"] for m in passed], ["m1"])  # the caller's list is not touched
+            self.assertEqual(len(cold_for(self.long_path)), 0)
+            rewarmed = long_log_for(self.long_path).get("m0")
+            self.assertEqual(rewarmed["recall_count"], 1)
+            self.assertEqual(entry_embedding(rewarmed, self.long_path).tolist(), [0.0, 1.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
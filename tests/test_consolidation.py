@@ -0,0 +1,93 @@
+# test_consolidation.py
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import memory.consolidation as consolidation
+from memory.consolidation import ConsolidationQueue
+
+
+class ConsolidationQueueTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tempdir.name) / "queue.json"
+        self.calls = []
+        handlers = {
+            "record": lambda *a, **kw: self.calls.append((a, kw)),
+            "fail": self._fail,
+        }
+        self._handlers = patch.dict(consolidation.JOB_HANDLERS, handlers)
+        self._handlers.start()
+
+    def tearDown(self):
+        self._handlers.stop()
+        self.tempdir.cleanup()
+
+    def _fail(self):
+        raise RuntimeError("boom")
+
+    def test_jobs_run_in_submission_order(self):
+        q = ConsolidationQueue(self.path)
+        for i in range(3):
+            q.submit("record", i, tag="x")
+        self.assertEqual(q.stats()["depth"], 3)
+        self.assertEqual(q.drain(), 3)
+        self.assertEqual(self.calls, [((0,), {"tag": "x"}), ((1,), {"tag": "x"}), ((2,), {"tag": "x"})])
+        self.assertEqual(q.stats()["depth"], 0)
+        self.assertEqual(q.stats()["max_depth"], 3)
+
+    def test_pending_jobs_survive_a_restart(self):
+        ConsolidationQueue(self.path).submit("record", "kept")
+        q = ConsolidationQueue(self.path)
+        self.assertEqual(len(q), 1)
+        q.drain()
+        self.assertEqual(self.calls, [(("kept",), {})])
+
+    def test_coalesced_jobs_are_not_duplicated(self):
+        q = ConsolidationQueue(self.path)
+        self.assertTrue(q.submit("record", coalesce=True))
+        self.assertFalse(q.submit("record", coalesce=True))
+        self.assertEqual(q.stats()["coalesced"], 1)
+
+    def test_failing_job_blocks_later_jobs_until_dropped(self):
+        q = ConsolidationQueue(self.path)
+        q.submit("fail")
+        q.submit("record", 1)
+        with patch("memory.consolidation.log_error"):
+            for _ in range(consolidation.MAX_ATTEMPTS - 1):
+                self.assertEqual(q.drain(), 0)
+                self.assertEqual(self.calls, [])
+            self.assertEqual(q.drain(), 0)
+        self.assertEqual(q.drain(), 1)
+        self.assertEqual(q.stats()["failed"], consolidation.MAX_ATTEMPTS)
+
+    def test_budget_and_max_jobs_bound_a_drain(self):
+        q = ConsolidationQueue(self.path)
+        for i in range(3):
+            q.submit("record", i)
+        self.assertEqual(q.drain(max_jobs=1), 1)
+        self.assertEqual(q.drain(budget_s=0), 0)
+        self.assertEqual(len(q), 2)
+
+    def test_inline_mode_runs_follow_ups_after_the_current_job(self):
+        q = ConsolidationQueue(self.path)
+        order = []
+
+        def parent():
+            q.submit("child")
+            order.append("parent")
+
+        with patch.dict(consolidation.JOB_HANDLERS, {"parent": parent, "child": lambda: order.append("child")}), \
+                patch.object(consolidation, "CONSOLIDATION_MODE", "inline"):
+            q.submit("parent")
+        self.assertEqual(order, ["parent", "child"])
+        self.assertEqual(len(q), 0)
+
+    def test_unknown_job_is_rejected(self):
+        with self.assertRaises(ValueError):
+            ConsolidationQueue(self.path).submit("nope")
+
+
+if __name__ == "__main__":
+    unittest.main()
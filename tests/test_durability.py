@@ -0,0 +1,70 @@
+# test_durability.py
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import utils.durability as du
+
+
+class DurabilityTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tempdir.name)
+        self.mode = du.durability_mode()
+
+    def tearDown(self):
+        du.set_durability(self.mode)
+        self.tempdir.cleanup()
+
+    def test_group_mode_buffers_streams_until_flushed(self):
+        du.set_durability("group")
+        stream = self.root / "logs" / "activity.txt"
+        du.append_stream(stream, "one\n")
+        du.append_stream(stream, b"two\n")
+        stats = du.durability_stats()
+        self.assertGreaterEqual(stats["pending_bytes"], 8)
+        du.flush_appends(stream)
+        self.assertEqual(stream.read_text(encoding="utf-8"), "one\ntwo\n")
+        self.assertGreaterEqual(du.durability_stats()["flushes"], 1)
+
+    def test_strict_mode_writes_through(self):
+        du.set_durability("strict")
+        stream = self.root / "events.jsonl"
+        with patch.object(du.os, "fsync") as fsync:
+            for _ in range(10):
+                du.append_stream(stream, "{}\n")
+        self.assertEqual(stream.read_text(encoding="utf-8"), "{}\n" * 10)
+        self.assertEqual(du.durability_stats()["pending_bytes"], 0)
+        fsync.assert_not_called()   # streams are never worth a per-line fsync
+
+    def test_group_mode_defers_fsync_of_written_files(self):
+        du.set_durability("group")
+        path = self.root / "state.json"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("{}")
+            du.sync_file(f)
+        self.assertGreaterEqual(du.durability_stats()["pending_syncs"], 1)
+        du.flush_appends()
+        self.assertEqual(du.durability_stats()["pending_syncs"], 0)
+
+    def test_temp_files_are_fsynced_before_replace_in_group_mode(self):
+        du.set_durability("group")
+        path = self.root / "state.json"
+        with patch.object(du.os, "fsync", wraps=du.os.fsync) as fsync:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("{}")
+                du.sync_before_replace(f)
+            self.assertEqual(fsync.call_count, 1)
+        with patch.object(du._FLUSHER, "owe_sync") as owe:
+            du.sync_replaced(path)  # only the directory is owed
+        owe.assert_called_once_with(os.path.abspath(self.root))
+
+    def test_unknown_mode_is_rejected(self):
+        with self.assertRaises(ValueError):
+            du.set_durability("sometimes")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+# test_embed_backends.py
+import subprocess
+import sys
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+import utils.embed_backends as eb
+import utils.embedder as embedder
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+class BackendSelectionTests(unittest.TestCase):
+    def test_missing_optional_packages_fall_back_to_torch(self):
+        with patch.object(eb, "log_error") as logged:
+            with patch.object(eb.importlib.util, "find_spec", return_value=None):
+                self.assertFalse(eb.backend_available("onnx"))
+                self.assertEqual(eb.resolve_backend("onnx"), "torch")
+            self.assertEqual(eb.resolve_backend("no-such-backend"), "torch")
+        self.assertEqual(logged.call_count, 2)
+        self.assertTrue(eb.backend_available("int8"))
+        self.assertEqual(eb.resolve_backend(" INT8 "), "int8")
+
+    def test_registered_backend_is_loadable(self):
+        with patch.dict(eb._BACKENDS), patch.dict(eb._REQUIRES):
+            eb.register_backend("fake", lambda name: f"model:{name}")
+            self.assertIn("fake", eb.backend_names())
+            self.assertEqual(eb.load_backend("fake", "m"), "model:m")
+
+    def test_importing_the_embedder_does_not_load_torch(self):
+        code = "import sys, utils.embedder; print('torch' in sys.modules, 'sentence_transformers' in sys.modules)"
+        out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=120)
+        self.assertEqual(out.stdout.split(), ["False", "False"], out.stderr)
+
+
+class RankingAgreementTests(unittest.TestCase):
+    def test_small_noise_keeps_rankings_large_noise_does_not(self):
+        rng = np.random.default_rng(0)
+        ref = rng.normal(size=(200, 32)).astype(np.float32)
+        same = eb.ranking_agreement(ref, ref * 3.0)  # scale doesn't matter after normalisation
+        self.assertEqual(same["topk_overlap"], 1.0)
+        self.assertLess(same["max_score_drift"], 1e-5)
+        close = eb.ranking_agreement(ref, ref + 0.01 * rng.normal(size=ref.shape))
+        self.assertGreaterEqual(close["topk_overlap"], eb.RANK_AGREEMENT_MIN)
+        unrelated = eb.ranking_agreement(ref, rng.normal(size=ref.shape))
+        self.assertLess(unrelated["topk_overlap"], eb.RANK_AGREEMENT_MIN)
+
+
+class DeferredLoadTests(unittest.TestCase):
+    def test_warm_up_loads_once_in_the_background(self):
+        calls = []
+
+        def slow_loader(name, model_name):
+            calls.append(model_name)
+            time.sleep(0.2)
+            return object()
+
+        with patch.object(embedder, "_model", None), patch.object(embedder, "EMBED_PRELOAD", True), \
+                patch.object(embedder, "load_backend", side_effect=slow_loader):
+            t = time.perf_counter()
+            embedder.warm_up_embedder()
+            self.assertLess(time.perf_counter() - t, 0.1)   # returns immediately
+            model = embedder.get_model()                     # waits for the same load
+            self.assertIs(embedder.get_model(), model)
+            self.assertEqual(calls, [embedder.MODEL_NAME])
+
+
+if __name__ == "__main__":
+    unittest.main()
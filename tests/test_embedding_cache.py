@@ -0,0 +1,127 @@
+# test_embedding_cache.py
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+import utils.embedding_cache as ec
+import utils.embedder as embedder
+
+
+class _FakeModel:
+    def __init__(self, dim=8):
+        self.dim = dim
+        self.calls = []
+
+    def encode(self, texts, normalize_embeddings=True, show_progress_bar=False):
+        self.calls.append(list(texts))
+        out = np.stack([np.random.default_rng(abs(hash(t)) % 2**32).normal(size=self.dim) for t in texts])
+        if normalize_embeddings:
+            out /= np.linalg.norm(out, axis=1, keepdims=True)
+        return out.astype(np.float32)
+
+
+class EmbeddingCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tempdir.name)
+        self.model = _FakeModel()
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def _cache(self, **kw):
+        return ec.EmbeddingCache("org/some-model", True, directory=self.dir, **kw)
+
+    def _encode(self, batch):
+        return self.model.encode(batch)
+
+    def test_only_distinct_misses_are_encoded(self):
+        cache = self._cache()
+        out = cache.encode(["a", "b", "a"], self._encode)
+        self.assertEqual(out.shape, (3, 8))
+        self.assertEqual(self.model.calls, [["a", "b"]])
+        self.assertTrue(np.array_equal(out[0], out[2]))
+
+        again = cache.encode(["b", "c"], self._encode)
+        self.assertEqual(self.model.calls[-1], ["c"])
+        self.assertTrue(np.array_equal(again[0], out[1]))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 3))
+        self.assertEqual(stats["hit_rate"], 0.25)
+        cache.close()
+
+    def test_vectors_persist_across_instances(self):
+        cache = self._cache()
+        first = cache.encode(["core directive"], self._encode)
+        cache.close()
+        reopened = self._cache()
+        self.assertTrue(np.array_equal(reopened.get("core directive"), first[0]))
+        self.assertEqual(reopened.stats()["disk_hits"], 1)
+        self.assertIsNone(reopened.get("never seen"))
+        self.assertEqual(len(self.model.calls), 1)
+        reopened.close()
+
+    def test_torn_tail_is_dropped(self):
+        cache = self._cache()
+        cache.encode(["a", "b"], self._encode)
+        cache.close()
+        with open(cache.path, "ab") as f:
+            f.write(b"partial record")
+        reopened = self._cache()
+        self.assertEqual(reopened.stats()["disk_entries"], 2)
+        self.assertIsNotNone(reopened.get("b"))
+        reopened.encode(["c"], self._encode)
+        reopened.close()
+        self.assertEqual(self._cache().stats()["disk_entries"], 3)
+
+    def test_memory_lru_and_disk_caps(self):
+        cache = self._cache(size=2, disk_rows=4)
+        cache.encode(["a", "b", "c"], self._encode)
+        stats = cache.stats()
+        self.assertEqual((stats["memory_entries"], stats["disk_entries"]), (2, 3))
+        cache.get("a")  # back into the LRU: the most recent record
+        cache.encode(["d", "e"], self._encode)  # 5 > 4 records: keep the newest 2
+        self.assertEqual(cache.stats()["disk_entries"], 2)
+        cache.close()
+        reopened = self._cache(size=2, disk_rows=4)
+        self.assertIsNotNone(reopened.get("e"))
+        self.assertIsNone(reopened.get("b"))
+        reopened.close()
+
+
+class GetEmbeddingTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.model = _FakeModel()
+        self.patches = [
+            patch.object(ec, "EMBEDDING_CACHE_DIR", Path(self.tempdir.name)),
+            patch.object(ec, "_CACHES", {}),
+            patch.object(embedder, "get_model", return_value=self.model),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for c in ec._CACHES.values():
+            c.close()
+        for p in reversed(self.patches):
+            p.stop()
+        self.tempdir.cleanup()
+
+    def test_signature_and_cache_namespaces(self):
+        single = embedder.get_embedding("hello")
+        self.assertEqual(single.shape, (8,))
+        batch = embedder.get_embedding(["hello", "world"])
+        self.assertEqual(batch.shape, (2, 8))
+        self.assertTrue(np.array_equal(batch[0], single))
+        raw = embedder.get_embedding("hello", normalize=False)  # separate cache, encoded again
+        self.assertFalse(np.allclose(raw, single))
+        self.assertEqual(self.model.calls, [["hello"], ["world"], ["hello"]])
+        self.assertEqual(sorted(s["normalize"] for s in ec.embedding_cache_stats()), [False, True])
+
+
+if __name__ == "__main__":
+    unittest.main()
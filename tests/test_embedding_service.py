@@ -0,0 +1,129 @@
+# test_embedding_service.py
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+import utils.embedder as embedder
+import utils.embedding_cache as ec
+import utils.embedding_service as es
+from utils.embedding_service import EmbeddingService
+
+
+class _Encoder:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def __call__(self, texts, normalize):
+        self.batches.append((list(texts), normalize))
+        if self.fail:
+            raise RuntimeError("model exploded")
+        scale = 1.0 if normalize else 10.0
+        return np.array([[len(t), ord(t[0]) * scale] for t in texts], dtype=np.float32)
+
+
+class EmbeddingServiceTests(unittest.TestCase):
+    def test_concurrent_requests_share_one_batch(self):
+        enc = _Encoder()
+        svc = EmbeddingService(enc, window_ms=200)
+        futures = []
+        barrier = threading.Barrier(4)
+
+        def caller(text):
+            barrier.wait()
+            futures.append((text, svc.submit([text])))
+
+        threads = [threading.Thread(target=caller, args=(t,)) for t in ("a", "bb", "ccc", "a")]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for text, fut in futures:
+            np.testing.assert_array_equal(fut.result(timeout=5), [[len(text), ord(text[0])]])
+        self.assertEqual(len(enc.batches), 1)
+        self.assertEqual(sorted(enc.batches[0][0]), ["a", "bb", "ccc"])  # duplicates encoded once
+        self.assertEqual(svc.stats()["requests"], 4)
+        svc.close()
+
+    def test_flush_closes_the_window_and_normalize_is_kept_apart(self):
+        enc = _Encoder()
+        svc = EmbeddingService(enc, window_ms=60_000)
+        a = svc.submit(["x", "y"])
+        b = svc.submit(["x"], normalize=False)
+        t = time.monotonic()
+        svc.flush()
+        self.assertLess(time.monotonic() - t, 5)
+        np.testing.assert_array_equal(a.result(timeout=0), [[1, ord("x")], [1, ord("y")]])
+        np.testing.assert_array_equal(b.result(timeout=0), [[1, ord("x") * 10]])
+        self.assertEqual(sorted(n for _, n in enc.batches), [False, True])
+        svc.close()
+
+    def test_lone_sync_request_skips_the_window(self):
+        enc = _Encoder()
+        svc = EmbeddingService(enc, window_ms=60_000)
+        t = time.monotonic()
+        np.testing.assert_array_equal(svc.encode(["a"]), [[1, ord("a")]])
+        self.assertLess(time.monotonic() - t, 5)
+        fut = svc.submit(["b"])                # async requests still wait for company
+        self.assertFalse(fut.done())
+        svc.flush()
+        self.assertEqual([b[0] for b in enc.batches], [["a"], ["b"]])
+        svc.close()
+
+    def test_max_batch_splits_and_errors_reach_every_caller(self):
+        enc = _Encoder()
+        svc = EmbeddingService(enc, window_ms=60_000, max_batch=2)
+        futs = [svc.submit([t]) for t in ("a", "b", "c")]
+        self.assertEqual(futs[1].result(timeout=5).shape, (1, 2))  # full batch goes without waiting
+        svc.flush()
+        self.assertEqual([len(b[0]) for b in enc.batches], [2, 1])
+        svc.close()
+
+        failing = EmbeddingService(_Encoder(fail=True), window_ms=0)
+        with patch.object(es, "log_error") as logged:
+            futs = [failing.submit(["a"]), failing.submit(["b"])]
+            for f in futs:
+                with self.assertRaises(RuntimeError):
+                    f.result(timeout=5)
+            failing.close()
+        logged.assert_called()
+
+
+class EmbedderServiceTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.enc = _Encoder()
+        self.patches = [
+            patch.object(ec, "EMBEDDING_CACHE_DIR", Path(self.tempdir.name)),
+            patch.object(ec, "_CACHES", {}),
+            patch.object(embedder, "_service", EmbeddingService(self.enc, window_ms=0)),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        embedder._service.close()
+        for c in ec._CACHES.values():
+            c.close()
+        for p in reversed(self.patches):
+            p.stop()
+        self.tempdir.cleanup()
+
+    def test_sync_and_async_paths_share_the_cache(self):
+        vec = embedder.get_embedding("hello")
+        np.testing.assert_array_equal(vec, [5, ord("h")])
+        fut = embedder.embed_async("world")
+        np.testing.assert_array_equal(fut.result(timeout=5), [5, ord("w")])
+        np.testing.assert_array_equal(embedder.get_embedding(["world", "hello"]), [[5, ord("w")], [5, ord("h")]])
+        self.assertTrue(embedder.embed_async("hello").done())
+        self.assertEqual([b[0] for b in self.enc.batches], [["hello"], ["world"]])
+        self.assertEqual(embedder.embedding_stats()["service"]["batches"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+# test_embedding_store.py
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from memory.embedding_store import (
+    EmbeddingStore,
+    entry_embedding,
+    externalize_embeddings,
+    store_for,
+)
+
+
+class EmbeddingStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.json_path = Path(self.tempdir.name) / "long_memory.json"
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_externalize_moves_vectors_out_of_rows(self):
+        entries = [{"id": "a", "embedding": [1.0, 0.0]}, {"id": "b", "embedding": [[0.0, 1.0]]}]
+        self.assertEqual(externalize_embeddings(entries, self.json_path), 2)
+        self.assertEqual([e["embedding_row"] for e in entries], [0, 1])
+        self.assertNotIn("embedding", entries[0])
+        np.testing.assert_allclose(entry_embedding(entries[1], self.json_path), [0.0, 1.0])
+
+    def test_reopen_reads_persisted_matrix(self):
+        store = store_for(self.json_path)
+        store.put("x", [0.5, 0.25, 0.125])
+        reopened = EmbeddingStore(self.json_path)
+        self.assertEqual(len(reopened), 1)
+        np.testing.assert_allclose(reopened.vector({"id": "x"}), [0.5, 0.25, 0.125])
+
+    def test_compact_drops_dead_rows_and_renumbers(self):
+        entries = [{"id": str(i), "embedding": [float(i), 1.0]} for i in range(4)]
+        externalize_embeddings(entries, self.json_path)
+        store = store_for(self.json_path)
+        kept = [entries[3], entries[1]]
+        store.compact(kept)
+
+        self.assertEqual(len(store), 2)
+        self.assertEqual([e["embedding_row"] for e in kept], [0, 1])
+        np.testing.assert_allclose(entry_embedding(kept[0], self.json_path), [3.0, 1.0])
+        self.assertEqual(store.matrix().shape, (2, 2))
+
+    def test_stale_row_falls_back_to_id(self):
+        store = store_for(self.json_path)
+        store.put("a", [1.0, 2.0])
+        store.put("b", [3.0, 4.0])
+        np.testing.assert_allclose(store.vector({"id": "b", "embedding_row": 0}), [3.0, 4.0])
+
+    def test_put_appends_ids_without_rewriting_the_header(self):
+        store = store_for(self.json_path)
+        store.put("a", [1.0, 0.0])
+        header = store.header_path.read_bytes()
+        for i in range(5):
+            store.put(f"n{i}", [0.0, float(i)])
+        self.assertEqual(store.header_path.read_bytes(), header)
+        self.assertEqual(EmbeddingStore(self.json_path).ids, ["a", "n0", "n1", "n2", "n3", "n4"])
+
+        store.compact([{"id": "n4"}, {"id": "a"}])
+        store.put("b", [2.0, 2.0])
+        reopened = EmbeddingStore(self.json_path)
+        self.assertEqual(reopened.ids, ["n4", "a", "b"])
+        np.testing.assert_allclose(reopened.vector({"id": "b"}), [2.0, 2.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+# test_json_codec.py
+import json
+import math
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+
+import utils.json_utils as ju
+
+
+class JsonCodecTests(unittest.TestCase):
+    SAMPLE = {
+        "when": datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        "tags": {"a"},
+        "path": Path("/tmp/x"),
+        1: "int key",
+        "nested": [{"text": "héllo ✓", "score": 0.25, "big": 2 ** 70}],
+    }
+
+    def setUp(self):
+        self._codec = ju._CODEC
+
+    def tearDown(self):
+        ju._CODEC = self._codec
+
+    def _codecs(self):
+        return ["json"] + [c for c in ("orjson", "msgspec") if getattr(ju, c) is not None]
+
+    def test_every_codec_matches_stdlib_default_semantics(self):
+        expected = json.loads(json.dumps(self.SAMPLE, default=ju._json_default))
+        for codec in self._codecs():
+            ju._CODEC = codec
+            for pretty in (False, True):
+                with self.subTest(codec=codec, pretty=pretty):
+                    self.assertEqual(json.loads(ju.dumps_json(self.SAMPLE, pretty=pretty)), expected)
+                    self.assertEqual(ju.loads_json(ju.dumps_json(self.SAMPLE, pretty=pretty)), expected)
+
+    def test_compact_and_pretty_layout(self):
+        ju._CODEC = "json"
+        self.assertEqual(ju.dumps_json({"a": [1, 2]}, pretty=False), b'{"a":[1,2]}')
+        self.assertIn(b'\n  "a"', ju.dumps_json({"a": [1, 2]}, pretty=True))
+
+    def test_loads_falls_back_for_non_standard_tokens(self):
+        for codec in self._codecs():
+            ju._CODEC = codec
+            with self.subTest(codec=codec):
+                self.assertTrue(math.isnan(ju.loads_json(b'{"x": NaN}')["x"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+# test_knowledge_utils.py
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+import utils.knowledge_utils as ku
+from memory.embedding_store import externalize_embeddings
+
+
+class RecallRelevantKnowledgeTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        tmp = Path(self.tempdir.name)
+        self._orig = (ku.KNOWLEDGE, ku.WORKING_MEMORY_FILE, ku.LONG_MEMORY_FILE)
+        ku.KNOWLEDGE = tmp / "knowledge_base.json"
+        ku.WORKING_MEMORY_FILE = tmp / "working_memory.json"
+        ku.LONG_MEMORY_FILE = tmp / "long_memory.json"
+
+    def tearDown(self):
+        ku.KNOWLEDGE, ku.WORKING_MEMORY_FILE, ku.LONG_MEMORY_FILE = self._orig
+        self.tempdir.cleanup()
+
+    def _reference(self, query, entries, k):
+        """Per-item scoring with a stable full sort (the pre-vectorized behaviour)."""
+        scored = []
+        for m in entries:
+            sim = ku.cosine_similarity(query, m["_vec"])
+            scored.append((sim + 0.15 * m["importance"] + 0.10 * m["priority"] + 0.07 * m["recall_count"], m["id"]))
+        scored.sort(key=lambda x: x[0], reverse=True)
+        return [i for _, i in scored[:k]]
+
+    def test_matches_reference_ranking(self):
+        rng = np.random.default_rng(0)
+        query = rng.normal(size=16)
+        long_mem = []
+        for i in range(60):
+            vec = rng.normal(size=16)
+            long_mem.append({
+                "id": f"m{i}", "content": str(i), "embedding": vec.tolist(), "_vec": vec,
+                "importance": int(i % 3), "priority": 1, "recall_count": int(i % 2),
+            })
+        expected = self._reference(query, long_mem, 8)
+        externalize_embeddings(long_mem, ku.LONG_MEMORY_FILE)
+
+        with patch("utils.knowledge_utils.get_embedding", return_value=query):
+            got = ku.recall_relevant_knowledge("q", long_memory=long_mem, working_memory=[], max_items=8)
+        self.assertEqual([m["id"] for m in got], expected)
+
+    def test_ties_keep_input_order_and_mismatched_dims_score_zero(self):
+        wm = [
+            {"id": "a", "embedding": [1.0, 0.0], "importance": 1, "priority": 1, "recall_count": 0},
+            {"id": "b", "embedding": [1.0, 0.0], "importance": 1, "priority": 1, "recall_count": 0},
+            {"id": "c", "embedding": [1.0, 0.0, 0.0], "importance": 1, "priority": 1, "recall_count": 0},
+        ]
+        with patch("utils.knowledge_utils.get_embedding", return_value=np.array([1.0, 0.0])):
+            got = ku.recall_relevant_knowledge("q", long_memory=[], working_memory=wm, max_items=2)
+        self.assertEqual([m["id"] for m in got], ["a", "b"])
+        self.assertEqual([m["recall_count"] for m in got], [1, 1])
+
+    def test_shortlist_reads_only_those_long_memories(self):
+        log = ku.long_log_for(ku.LONG_MEMORY_FILE)
+        log.extend([
+            {"id": f"m{i}", "content": str(i), "embedding": [1.0, float(i)], "importance": 1, "priority": 1, "recall_count": 0}
+            for i in range(6)
+        ])
+        with patch("utils.knowledge_utils.get_embedding", return_value=np.array([1.0, 0.0])), \
+                patch.object(ku, "_ann_shortlist", return_value={"m4", "m1"}), \
+                patch.object(ku, "load_json", wraps=ku.load_json) as loads:
+            got = ku.recall_relevant_knowledge("q", working_memory=[], max_items=8)
+        self.assertEqual(sorted(m["id"] for m in got), ["m1", "m4"])
+        log.flush()   # pending recall counts, before the temp dir goes away
+        self.assertNotIn(ku.LONG_MEMORY_FILE, [c.args[0] for c in loads.call_args_list])
+
+
+if __name__ == "__main__":
+    unittest.main()
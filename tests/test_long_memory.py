@@ -1,11 +1,12 @@
 # test_long_memory.py
-import json
 import tempfile
 import unittest
 from pathlib import Path
 from unittest.mock import patch
 
 import memory.long_memory as longmem
+import utils.log as ulog
+from utils.json_utils import load_json
 import memory.remember as remember_mod  # so we can patch its LONG_MEMORY_FILE separately
 from memory.remember import remember
 
@@ -23,6 +24,8 @@ class LongMemoryTests(unittest.TestCase):
         self._orig_priv_longmem = longmem.PRIVATE_THOUGHTS_FILE
         longmem.LONG_MEMORY_FILE = str(self.long_path)
         longmem.PRIVATE_THOUGHTS_FILE = str(self.priv_path)
+        self._log = patch.object(ulog, "PRIVATE_THOUGHTS_FILE", self.priv_path)
+        self._log.start()
 
         self._orig_long_remember = remember_mod.LONG_MEMORY_FILE
         remember_mod.LONG_MEMORY_FILE = str(self.long_path)
@@ -31,13 +34,14 @@ class LongMemoryTests(unittest.TestCase):
         longmem.LONG_MEMORY_FILE = self._orig_long_longmem
         longmem.PRIVATE_THOUGHTS_FILE = self._orig_priv_longmem
         remember_mod.LONG_MEMORY_FILE = self._orig_long_remember
+        self._log.stop()
         self.tempdir.cleanup()
 
     @patch("memory.long_memory.get_embedding", return_value=[0.0, 0.0])
     @patch("memory.long_memory.detect_emotion", return_value="neutral")
     def test_update_long_memory_adds_entry(self, mock_emotion, mock_embed):
         longmem.update_long_memory("My first memory")
-        data = json.loads(self.long_path.read_text(encoding="utf-8"))
+        data = load_json(self.long_path, default_type=list)
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]["content"], "My first memory")
 
@@ -46,14 +50,37 @@ class LongMemoryTests(unittest.TestCase):
     def test_update_long_memory_skips_duplicates(self, mock_emotion, mock_embed):
         longmem.update_long_memory("Repeat me")
         longmem.update_long_memory("Repeat me")
-        data = json.loads(self.long_path.read_text(encoding="utf-8"))
+        data = load_json(self.long_path, default_type=list)
         self.assertEqual(len(data), 1)
 
+    @patch("memory.long_memory.get_embedding", return_value=[0.0, 0.0])
+    @patch("memory.long_memory.detect_emotion", return_value="neutral")
+    def test_old_duplicates_are_skipped_before_embedding(self, mock_emotion, mock_embed):
+        for i in range(12):
+            longmem.update_long_memory(f"Note {i}")
+        longmem.update_long_memory("  note   0 ")  # normalized match, far outside any recent window
+        self.assertEqual(mock_embed.call_count, 12)
+        self.assertEqual(mock_emotion.call_count, 12)
+        self.assertEqual(len(load_json(self.long_path, default_type=list)), 12)
+        longmem.update_long_memory("Note 0", event_type="lesson")  # other event_type is kept
+        self.assertEqual(len(load_json(self.long_path, default_type=list)), 13)
+
+    @patch("memory.long_memory.detect_emotion", return_value="neutral")
+    def test_near_duplicate_check_is_optional(self, mock_emotion):
+        vectors = iter([[1.0, 0.0], [0.99, 0.01], [0.99, 0.01]])
+        with patch("memory.long_memory.get_embedding", side_effect=lambda _t: next(vectors)):
+            longmem.update_long_memory("The sky is blue")
+            longmem.update_long_memory("Sky looks blue")
+            with patch.object(longmem, "NEAR_DUPLICATE_COSINE", 0.97):
+                longmem.update_long_memory("The sky seems blue")
+        contents = [m["content"] for m in load_json(self.long_path, default_type=list)]
+        self.assertEqual(contents, ["The sky is blue", "Sky looks blue"])
+
     @patch("memory.remember.get_embedding", return_value=[0.0, 0.0])
     @patch("memory.remember.detect_emotion", return_value="neutral")
     def test_remember_adds_entry(self, mock_emotion, mock_embed):
         remember("An interesting event")
-        data = json.loads(self.long_path.read_text(encoding="utf-8"))
+        data = load_json(self.long_path, default_type=list)
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]["content"], "An interesting event")
 
@@ -63,17 +90,59 @@ class LongMemoryTests(unittest.TestCase):
         for i in range(8):
             longmem.update_long_memory(f"Mem {i}")
         longmem.prune_long_memory(max_total=5)
-        data = json.loads(self.long_path.read_text(encoding="utf-8"))
+        data = load_json(self.long_path, default_type=list)
         # 5 kept, plus optionally a summary entry
         self.assertTrue(5 <= len(data) <= 6)
 
+    @patch("memory.long_memory.summarize_memories", return_value="")
+    @patch("memory.long_memory.get_embedding", return_value=[0.0, 0.0])
+    @patch("memory.long_memory.detect_emotion", return_value="neutral")
+    def test_prune_removes_lowest_scores_in_batches(self, mock_emotion, mock_embed, mock_summary):
+        longmem.update_long_memory("Keep me", importance=1, priority=1, pin=True)
+        for i in range(6):
+            longmem.update_long_memory(f"Weak {i}", importance=1, priority=1)
+        longmem.update_long_memory("Lesson: strong", importance=5, priority=5)
+        longmem.prune_long_memory(max_total=2, batch=3)
+        contents = [m["content"] for m in load_json(self.long_path, default_type=list)]
+        # Oldest of the equally weak entries go first, at most one batch per call
+        self.assertEqual(contents, ["Keep me", "Weak 3", "Weak 4", "Weak 5", "Lesson: strong"])
+        self.assertEqual(mock_summary.call_count, 1)
+
+    @patch("memory.long_memory.summarize_memories", return_value="")
+    @patch("memory.long_memory.get_embedding", return_value=[0.0, 0.0])
+    @patch("memory.long_memory.detect_emotion", return_value="neutral")
+    def test_prune_batch_does_not_rewrite_the_vector_matrix(self, mock_emotion, mock_embed, mock_summary):
+        for i in range(8):
+            longmem.update_long_memory(f"Mem {i}")
+        store = longmem.store_for(self.long_path)
+        generation = store.generation
+        longmem.prune_long_memory(max_total=5)
+        # Dead rows stay until they outnumber live ones (maybe_compact), not once per batch
+        self.assertEqual(store.generation, generation)
+        self.assertEqual(len(load_json(self.long_path, default_type=list)), 5)
+
+    @patch("memory.long_memory.get_embedding", return_value=[0.0, 0.0])
+    @patch("memory.long_memory.detect_emotion", return_value="neutral")
+    def test_prune_scores_are_cached_until_entries_change(self, mock_emotion, mock_embed):
+        for i in range(4):
+            longmem.update_long_memory(f"Mem {i}")
+        log = longmem.long_log_for(self.long_path)
+        cache = longmem._ScoreCache()
+        cache.refresh(log)
+        with patch.object(log, "get_many", wraps=log.get_many) as reads:
+            cache.refresh(log)
+            self.assertEqual(reads.call_args[0][0], [])
+            longmem.update_long_memory("Mem 4")
+            cache.refresh(log)
+            self.assertEqual(len(reads.call_args[0][0]), 1)
+
     @patch("memory.long_memory.get_embedding", return_value=[0.0, 0.0])
     @patch("memory.long_memory.detect_emotion", return_value="neutral")
     def test_reevaluate_memory_significance(self, mock_emotion, mock_embed):
         longmem.update_long_memory("Lesson: study hard", importance=3, priority=3)
         longmem.update_long_memory("Casual note", importance=1, priority=1)
         longmem.reevaluate_memory_significance()
-        data = json.loads(self.long_path.read_text(encoding="utf-8"))
+        data = load_json(self.long_path, default_type=list)
         for mem in data:
             self.assertIn("effectiveness_score", mem)
 
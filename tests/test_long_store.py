@@ -0,0 +1,149 @@
+# test_long_store.py
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import utils.json_utils as ju
+import utils.log as ulog
+import utils.summarizers as summarizers
+from memory.long_store import LongMemoryLog, long_log_for
+
+
+class LongMemoryLogTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.json_path = Path(self.tempdir.name) / "long_memory.json"
+        self._log = patch.object(ulog, "ERROR_FILE", Path(self.tempdir.name) / "error_log.txt")
+        self._log.start()
+        ju.STATE_STORE.invalidate()
+
+    def tearDown(self):
+        ju.STATE_STORE.invalidate()
+        self._log.stop()
+        self.tempdir.cleanup()
+
+    def _segment_lines(self, log):
+        return sum(len(p.read_bytes().splitlines()) for p in log.dir.glob("seg-*.jsonl"))
+
+    def test_append_and_load_recent(self):
+        log = LongMemoryLog(self.json_path)
+        for i in range(5):
+            log.append({"id": str(i), "content": f"m{i}"})
+        self.assertEqual(log.count(), 5)
+        self.assertEqual([m["content"] for m in log.load_recent(2)], ["m3", "m4"])
+        self.assertEqual(self._segment_lines(log), 5)
+
+    def test_reopen_replays_past_index_watermark(self):
+        log = LongMemoryLog(self.json_path)
+        log.append({"id": "a", "content": "first"})
+        log.flush()
+        log.append({"id": "b", "content": "second"})  # not in the saved index yet
+        ju.STATE_STORE.invalidate()
+        reopened = LongMemoryLog(self.json_path)
+        self.assertEqual([m["content"] for m in reopened.load_all()], ["first", "second"])
+
+    def test_replace_all_writes_only_changes(self):
+        log = LongMemoryLog(self.json_path)
+        log.extend([{"id": str(i), "content": f"m{i}"} for i in range(4)])
+        rows = log.load_all()
+        rows[1]["content"] = "edited"
+        del rows[2]
+        log.replace_all(rows)
+        # one tombstone + one re-put on top of the four originals
+        self.assertEqual(self._segment_lines(log), 6)
+        self.assertEqual([m["content"] for m in log.load_all()], ["m0", "edited", "m3"])
+
+    def test_compaction_drops_dead_records(self):
+        log = LongMemoryLog(self.json_path)
+        log.extend([{"id": str(i), "content": f"m{i}"} for i in range(6)])
+        log.delete(["0", "1", "2"])
+        log.append({"id": "4", "content": "m4 again"})
+        self.assertTrue(log.compact())
+        self.assertEqual(self._segment_lines(log), 3)
+        ju.STATE_STORE.invalidate()
+        reopened = LongMemoryLog(self.json_path)
+        self.assertEqual([m["content"] for m in reopened.load_all()], ["m3", "m4 again", "m5"])
+
+    def test_fingerprints_survive_reopen_and_deletes(self):
+        log = LongMemoryLog(self.json_path)
+        log.extend([{"id": "a", "content": "Hello  World", "event_type": "note"},
+                    {"id": "b", "content": "other", "event_type": "note"}])
+        log.flush()
+        log.delete(["b"])
+        ju.STATE_STORE.invalidate()
+        reopened = LongMemoryLog(self.json_path)
+        self.assertEqual(reopened.find_duplicate("hello world", "note"), "a")
+        self.assertIsNone(reopened.find_duplicate("hello world", "summary"))
+        self.assertIsNone(reopened.find_duplicate("other", "note"))
+
+    def test_query_uses_secondary_indexes(self):
+        log = LongMemoryLog(self.json_path)
+        log.extend([
+            {"id": "a", "content": "x", "event_type": "reflection", "emotion": {"emotion": "Joy"},
+             "agent": "orrin", "timestamp": "2024-01-01T00:00:00+00:00"},
+            {"id": "b", "content": "y", "event_type": "note", "emotion": "fear",
+             "timestamp": "2024-01-02T00:00:00+00:00", "pin": True},
+            {"id": "c", "content": "z", "event_type": "reflection", "emotion": "joy",
+             "agent": "Orrin", "timestamp": "2024-01-03T00:00:00+00:00"},
+        ])
+        self.assertEqual([m["id"] for m in log.query(event_type="reflection")], ["c", "a"])
+        self.assertEqual(log.query_ids(emotion="joy", agent="orrin", order="oldest"), ["a", "c"])
+        self.assertEqual(log.query_ids(since="2024-01-02T00:00:00+00:00", limit=1), ["c"])
+        self.assertEqual(log.query_ids(pinned=True), ["b"])
+        self.assertEqual(log.query_ids(pinned=False, until="2024-01-02T12:00:00+00:00"), ["a"])
+
+        log.append({"id": "c", "content": "z", "event_type": "note"})  # re-put moves it between indexes
+        log.delete(["a"])
+        log.flush()
+        ju.STATE_STORE.invalidate()
+        reopened = LongMemoryLog(self.json_path)
+        self.assertEqual(reopened.query_ids(event_type="reflection"), [])
+        self.assertEqual(reopened.query_ids(event_type="note"), ["c", "b"])
+        with self.assertRaises(ValueError):
+            reopened.query_ids(since="yesterday")
+
+    def test_summary_skips_entries_without_content_before_limiting(self):
+        log = long_log_for(self.json_path)
+        log.extend([{"id": "a", "content": "older thought", "event_type": "reflection"}]
+                   + [{"id": f"x{i}", "event_type": "reflection"} for i in range(5)])
+        self.assertEqual([m["id"] for m in log.iter_query(batch=2, event_type="reflection")][-2:], ["x0", "a"])
+        with patch.object(summarizers, "LONG_MEMORY_FILE", self.json_path):
+            summary = summarizers.summarize_recent_thoughts(n=2, event_type_filter="reflection")
+        self.assertIn("older thought", summary)
+
+    def test_recall_bumps_are_merged_on_read_and_written_on_flush(self):
+        log = LongMemoryLog(self.json_path)
+        log.extend([{"id": "a", "content": "x", "recall_count": 2}, {"id": "b", "content": "y"}])
+        lines = self._segment_lines(log)
+        self.assertEqual(log.bump_recall(["a", "a", "b", "missing"]), 2)
+        self.assertEqual(self._segment_lines(log), lines)  # nothing written yet
+        self.assertEqual([m["recall_count"] for m in log.load_all()], [3, 1])
+
+        log.flush()
+        self.assertEqual(self._segment_lines(log), lines + 2)
+        ju.STATE_STORE.invalidate()
+        reopened = LongMemoryLog(self.json_path)
+        self.assertEqual(reopened.get("a")["recall_count"], 3)
+
+        # A writer that read the merged count and saves it back must not double it
+        reopened.bump_recall(["b"])
+        rows = reopened.load_all()
+        reopened.replace_all(rows)
+        reopened.flush()
+        self.assertEqual(reopened.get("b")["recall_count"], 2)
+
+    def test_legacy_file_is_migrated(self):
+        self.json_path.write_text(json.dumps([{"content": "old", "embedding": [1.0, 0.0]}]), encoding="utf-8")
+        log = long_log_for(self.json_path)
+        rows = ju.load_json(self.json_path, default_type=list)
+        self.assertEqual(len(rows), 1)
+        self.assertIn("id", rows[0])
+        self.assertNotIn("embedding", rows[0])
+        self.assertFalse(self.json_path.exists())
+        self.assertEqual(log.count(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
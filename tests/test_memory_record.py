@@ -0,0 +1,85 @@
+# test_memory_record.py
+import json
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+
+import utils.json_utils as ju
+from memory.long_store import LongMemoryLog
+from memory.record import MemoryRecord
+
+
+def _roundtrip(entry):
+    return MemoryRecord.from_dict(json.loads(json.dumps(entry))).to_dict()
+
+
+class MemoryRecordTests(unittest.TestCase):
+    def test_round_trip_is_lossless(self):
+        now = datetime.now(timezone.utc).isoformat()
+        entries = [
+            {"id": "a", "timestamp": now, "content": "x", "emotion": "joy", "event_type": "note",
+             "agent": "orrin", "importance": 2, "priority": 1, "referenced": 0, "pin": False,
+             "related_memory_ids": ["b", "c"], "recall_count": 3, "context": {"k": [1, {"z": None}]},
+             "embedding_row": 7},
+            {"id": "b", "timestamp": "2024-01-01T00:00:00+00:00", "content": "y"},
+            {"id": "c", "timestamp": "2024-01-01T02:00:00+02:00", "content": "offset kept"},
+            {"id": "d", "timestamp": "2024-01-01T00:00:00", "content": "naive kept"},
+            {"id": "e", "timestamp": "yesterday", "emotion": {"emotion": "fear", "intensity": 0.4}},
+            {"id": "f", "timestamp": 1700000000.5, "custom": {"nested": True}, "tags": []},
+            {"id": "g", "timestamp": None, "decay": 0.25},
+            {"content": "no id or timestamp"},
+        ]
+        for entry in entries:
+            self.assertEqual(_roundtrip(entry), entry)
+            self.assertEqual(json.dumps(_roundtrip(entry), sort_keys=True), json.dumps(entry, sort_keys=True))
+
+    def test_timestamp_float_and_get(self):
+        rec = MemoryRecord.from_dict({"id": "a", "timestamp": "2024-01-01T00:00:00+00:00", "extra": 1})
+        self.assertEqual(rec.ts, datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp())
+        self.assertEqual(rec.get("timestamp"), "2024-01-01T00:00:00+00:00")
+        self.assertEqual(rec.get("extra"), 1)
+        self.assertIsNone(rec.get("content"))
+        self.assertEqual(rec.get("pin", False), False)
+
+    def test_names_are_interned_and_output_is_a_copy(self):
+        a = MemoryRecord.from_dict(json.loads('{"event_type": "reflection", "emotion": "joy", "context": {"k": 1}}'))
+        b = MemoryRecord.from_dict(json.loads('{"event_type": "reflection", "emotion": "joy"}'))
+        self.assertIs(a.event_type, b.event_type)
+        self.assertIs(a.emotion, b.emotion)
+        out = a.to_dict()
+        out["context"]["k"] = 2
+        self.assertEqual(a.to_dict()["context"], {"k": 1})
+
+
+class LongStoreRecordCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.json_path = Path(self.tempdir.name) / "long_memory.json"
+        ju.STATE_STORE.invalidate()
+
+    def tearDown(self):
+        ju.STATE_STORE.invalidate()
+        self.tempdir.cleanup()
+
+    def test_cached_reads_match_disk_reads(self):
+        entries = [{"id": str(i), "timestamp": datetime.now(timezone.utc).isoformat(), "content": f"m{i}",
+                    "emotion": {"emotion": "joy"}, "related_memory_ids": [], "odd": [i]} for i in range(5)]
+        log = LongMemoryLog(self.json_path)
+        log.extend(entries)
+        cold = [log.get(str(i)) for i in range(5)]
+        self.assertEqual(log.load_all(), entries)  # fills the record cache
+        self.assertTrue(all(isinstance(r, MemoryRecord) for r in log._live.values()))
+        self.assertEqual([log.get(str(i)) for i in range(5)], cold)
+        self.assertEqual(log.load_recent(2), entries[3:])
+
+        log.append({"id": "1", "content": "edited"})
+        self.assertEqual(log.get("1"), {"id": "1", "content": "edited"})
+        rows = log.load_all()
+        rows[0]["odd"].append(99)  # callers get copies
+        self.assertEqual(log.get("0")["odd"], [0])
+        self.assertEqual(log.export_state()["entries"][0], entries[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
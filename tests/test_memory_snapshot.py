@@ -0,0 +1,101 @@
+# test_memory_snapshot.py
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+import memory.ann_index as ann
+import memory.embedding_store as es
+import memory.long_store as ls
+import memory.working_store as ws
+import utils.json_utils as ju
+import utils.log as ulog
+from memory.snapshot import load_memory_snapshot, save_memory_snapshot
+
+
+def _restart(*paths):
+    """Forget every open store for `paths`, as a new process would."""
+    ju.STATE_STORE.invalidate()
+    for p in paths:
+        key = str(Path(p).resolve())
+        for registry in (ls._LOGS, ws._MEMORIES, es._STORES, ann._INDEXES):
+            registry.pop(key, None)
+
+
+class MemorySnapshotTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        root = Path(self.tempdir.name).resolve()
+        self.long_path = root / "long_memory.json"
+        self.working_path = root / "working_memory.json"
+        self.snap = root / "memory_snapshot.bin"
+        self._log = patch.object(ulog, "ERROR_FILE", root / "error_log.txt")
+        self._log.start()
+        ju.STATE_STORE.invalidate()
+
+    def tearDown(self):
+        _restart(self.long_path, self.working_path)
+        self._log.stop()
+        self.tempdir.cleanup()
+
+    def _save(self):
+        return save_memory_snapshot(self.snap, self.long_path, self.working_path)
+
+    def _load(self):
+        return load_memory_snapshot(self.snap, self.long_path, self.working_path)
+
+    def _populate(self, n=60):
+        rng = np.random.default_rng(0)
+        vecs = rng.normal(size=(n, 8)).astype(np.float32)
+        log = ls.long_log_for(self.long_path)
+        log.extend([{"id": f"m{i}", "content": f"fact {i}"} for i in range(n)])
+        store = es.store_for(self.long_path)
+        for i, v in enumerate(vecs):
+            store.put(f"m{i}", v)
+        ws.working_memory_for(self.working_path).add(
+            {"id": "w0", "content": "recent", "timestamp": "2024-01-01T00:00:00"}, max_entries=10)
+        return vecs
+
+    @patch.object(ann, "ANN_MIN_ROWS", 20)
+    def test_round_trip_skips_reading_records(self):
+        vecs = self._populate()
+        ann.index_for(self.long_path).rebuild()
+        self.assertTrue(self._save())
+        _restart(self.long_path, self.working_path)
+
+        with patch.object(ls.LongMemoryLog, "_open", side_effect=AssertionError("full open")):
+            used = self._load()
+        self.assertTrue(used["long"])
+        self.assertTrue(used["working"])
+        self.assertTrue(used["index"])
+        self.assertEqual(used["vectors"], 1)
+
+        log = ls.long_log_for(self.long_path)
+        self.assertEqual([e["content"] for e in log.load_all()][:2], ["fact 0", "fact 1"])
+        self.assertEqual(ws.working_memory_for(self.working_path).rows()[0]["content"], "recent")
+        unit = es.store_for(self.long_path).normalized()
+        self.assertTrue(np.allclose(unit[5], vecs[5] / np.linalg.norm(vecs[5])))
+        self.assertIn("m7", ann.index_for(self.long_path).search_ids(unit[7], k=5))
+
+    def test_changed_files_fall_back_to_normal_load(self):
+        self._populate(5)
+        self.assertTrue(self._save())
+        ls.long_log_for(self.long_path).append({"id": "late", "content": "after the snapshot"})
+        ju.flush_state()
+        _restart(self.long_path, self.working_path)
+
+        used = self._load()
+        self.assertFalse(used["long"])
+        contents = [e["content"] for e in ls.long_log_for(self.long_path).load_all()]
+        self.assertIn("after the snapshot", contents)
+
+    def test_missing_or_foreign_file_is_ignored(self):
+        self.assertFalse(self._load()["long"])
+        self.snap.write_bytes(b"not a snapshot at all, just bytes")
+        self.assertFalse(self._load()["working"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+# test_ring_buffer.py
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import utils.json_utils as ju
+from utils.ring_buffer import RingBuffer, register_ring, ring_for
+
+
+class RingBufferTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.json_path = Path(self.tempdir.name) / "history.json"
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_keeps_last_capacity_records_across_rotation(self):
+        ring = RingBuffer(self.json_path, capacity=3)
+        ring.extend([{"n": i} for i in range(7)])
+        self.assertEqual(len(ring), 3)
+        self.assertEqual(ring.load_all(), [{"n": 4}, {"n": 5}, {"n": 6}])
+        self.assertEqual(ring.tail(2), [{"n": 5}, {"n": 6}])
+        # Nothing ever grows past two generations
+        self.assertLessEqual(len(ring.path.read_bytes().splitlines()), 3)
+        self.assertLessEqual(len(ring.prev_path.read_bytes().splitlines()), 3)
+
+    def test_reopen_drops_torn_line(self):
+        ring = RingBuffer(self.json_path, capacity=5)
+        ring.extend([{"n": 1}, {"n": 2}])
+        with open(ring.path, "ab") as f:
+            f.write(b'{"n": 3')  # crash mid-append
+        reopened = RingBuffer(self.json_path, capacity=5)
+        reopened.append({"n": 4})
+        self.assertEqual(reopened.load_all(), [{"n": 1}, {"n": 2}, {"n": 4}])
+
+    def test_replace_rewrites_in_place(self):
+        ring = RingBuffer(self.json_path, capacity=2)
+        ring.extend([{"n": i} for i in range(3)])
+        ring.replace([{"n": 9}])
+        self.assertFalse(ring.prev_path.exists())
+        self.assertEqual(ring.load_all(), [{"n": 9}])
+
+    def test_legacy_file_is_migrated_and_routed(self):
+        self.json_path.write_text(json.dumps([{"n": i} for i in range(10)]), encoding="utf-8")
+        register_ring(self.json_path, 4)
+        self.assertEqual(ring_for(self.json_path).capacity, 4)
+        self.assertEqual(ju.load_json(self.json_path, default_type=list), [{"n": i} for i in range(6, 10)])
+        self.assertFalse(self.json_path.exists())
+        ju.save_json(self.json_path, [{"n": 0}])
+        self.assertEqual(ju.load_tail(self.json_path, 3), [{"n": 0}])
+
+
+if __name__ == "__main__":
+    unittest.main()
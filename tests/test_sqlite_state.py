@@ -0,0 +1,59 @@
+# test_sqlite_state.py
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import utils.json_utils as ju
+from utils.sqlite_state import SQLiteState
+
+
+class SQLiteStateTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tempdir.name)
+        self.history = self.root / "history.json"
+        self.backend = SQLiteState(self.root / "state.db", root=self.root, row_paths=[self.history])
+        ju.set_state_backend(self.backend)
+
+    def tearDown(self):
+        ju.set_write_back(False)
+        ju.set_state_backend(None)
+        self.backend.close()
+        self.tempdir.cleanup()
+
+    def _rows(self, path):
+        key = self.backend.key(path)
+        return self.backend._conn.execute("SELECT seq FROM rows WHERE key=? ORDER BY seq", (key,)).fetchall()
+
+    def test_round_trip_without_files(self):
+        ju.save_json(self.root / "state.json", {"mood": "calm"})
+        ju.STATE_STORE.invalidate()
+        self.assertEqual(ju.load_json(self.root / "state.json"), {"mood": "calm"})
+        self.assertFalse((self.root / "state.json").exists())
+
+    def test_list_files_only_touch_changed_rows(self):
+        ju.save_json(self.history, [{"n": i} for i in range(5)])
+        ju.save_json(self.history, [{"n": i} for i in range(2, 7)])  # trim front, append two
+        self.assertEqual([s for (s,) in self._rows(self.history)], [2, 3, 4, 5, 6])
+        self.assertEqual(ju.load_tail(self.history, 2), [{"n": 5}, {"n": 6}])
+        self.assertEqual(self.backend.query(self.history, "n", 3), [{"n": 3}])
+
+    def test_existing_file_is_imported(self):
+        self.history.write_text(json.dumps([{"n": 1}]), encoding="utf-8")
+        self.assertEqual(ju.load_json(self.history, default_type=list), [{"n": 1}])
+        ju.append_jsonl(self.root / "events.jsonl", {"e": 1})
+        self.assertEqual(ju.load_tail(self.root / "events.jsonl", 5), [{"e": 1}])
+
+    def test_flush_commits_cycle_atomically(self):
+        ju.set_write_back(True)
+        ju.save_json(self.root / "a.json", {"v": 1})
+        ju.save_json(self.root / "b.json", {"v": 1})
+        self.assertEqual(ju.flush_state(), 2)
+        reader = SQLiteState(self.root / "state.db", root=self.root)
+        self.assertEqual(reader.load(self.root / "b.json"), (True, {"v": 1}))
+        reader.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
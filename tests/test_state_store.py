@@ -0,0 +1,240 @@
+# test_state_store.py
+import json
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import utils.json_utils as ju
+import utils.log as ulog
+from utils.state_store import clone_json, NotJSONNative
+
+
+class StateStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tempdir.name) / "state.json"
+        self._log = patch.object(ulog, "MODEL_FAILURE", Path(self.tempdir.name) / "model_failures.txt")
+        self._log.start()
+        ju.STATE_STORE.invalidate()
+
+    def tearDown(self):
+        ju.set_write_back(False)
+        ju.STATE_STORE.invalidate()
+        self._log.stop()
+        self.tempdir.cleanup()
+
+    def test_loaded_copies_are_private(self):
+        ju.save_json(self.path, {"items": [1, 2]})
+        first = ju.load_json(self.path)
+        first["items"].append(3)
+        self.assertEqual(ju.load_json(self.path), {"items": [1, 2]})
+
+    def test_external_change_invalidates_cache(self):
+        ju.save_json(self.path, [1])
+        self.assertEqual(ju.load_json(self.path, default_type=list), [1])
+        self.path.write_text(json.dumps([1, 2, 3]), encoding="utf-8")
+        self.assertEqual(ju.load_json(self.path, default_type=list), [1, 2, 3])
+
+    def test_write_back_buffers_until_flush(self):
+        ju.set_write_back(True)
+        ju.save_json(self.path, {"count": 1})
+        ju.save_json(self.path, {"count": 2})
+        self.assertFalse(self.path.exists())
+        self.assertEqual(ju.load_json(self.path), {"count": 2})
+
+        self.assertEqual(ju.flush_state(), 1)
+        self.assertEqual(json.loads(self.path.read_text(encoding="utf-8")), {"count": 2})
+        self.assertEqual(ju.STATE_STORE.pending(), 0)
+
+    def test_transaction_commits_last_write_per_file(self):
+        other = self.path.with_name("other.json")
+        with ju.StateTransaction() as txn:
+            for i in range(5):
+                ju.save_json(self.path, {"count": i})
+            ju.save_json(other, [1])
+            self.assertFalse(self.path.exists())
+        self.assertEqual(txn.committed, 2)
+        self.assertEqual(json.loads(self.path.read_text(encoding="utf-8")), {"count": 4})
+        self.assertFalse(ju.STATE_STORE.write_back)
+
+    def test_group_commit_fsyncs_staged_files_not_the_host(self):
+        other = self.path.with_name("other.json")
+        with patch.object(ju, "durability_mode", return_value="strict"), \
+                patch.object(ju.os, "sync", create=True) as host_sync, \
+                patch.object(ju.os, "fsync", wraps=os.fsync) as fsync:
+            with ju.StateTransaction():
+                ju.save_json(self.path, {"count": 1})
+                ju.save_json(other, [1])
+        host_sync.assert_not_called()
+        self.assertGreaterEqual(fsync.call_count, 3)  # two staged files + their directory
+        self.assertEqual(json.loads(other.read_text(encoding="utf-8")), [1])
+
+    def test_transaction_rolls_back_on_error(self):
+        ju.save_json(self.path, {"count": 1})
+        with self.assertRaises(RuntimeError):
+            with ju.StateTransaction():
+                ju.save_json(self.path, {"count": 2})
+                raise RuntimeError("cycle crashed")
+        self.assertEqual(ju.load_json(self.path), {"count": 1})
+        self.assertEqual(json.loads(self.path.read_text(encoding="utf-8")), {"count": 1})
+
+    def test_transaction_commits_on_keyboard_interrupt(self):
+        ju.save_json(self.path, {"count": 1})
+        with self.assertRaises(KeyboardInterrupt):
+            with ju.StateTransaction():
+                ju.save_json(self.path, {"count": 2})
+                raise KeyboardInterrupt
+        self.assertEqual(json.loads(self.path.read_text(encoding="utf-8")), {"count": 2})
+
+    def test_append_json_extends_cached_list(self):
+        ju.append_json(self.path, {"n": 1})
+        self.assertEqual(json.loads(self.path.read_text(encoding="utf-8")), [{"n": 1}])
+        ju.set_write_back(True)
+        for i in range(2, 5):
+            ju.append_json(self.path, {"n": i})
+        self.assertEqual(len(json.loads(self.path.read_text(encoding="utf-8"))), 1)
+        self.assertEqual(len(ju.load_json(self.path, default_type=list)), 4)
+        ju.flush_state()
+        self.assertEqual([r["n"] for r in json.loads(self.path.read_text(encoding="utf-8"))], [1, 2, 3, 4])
+
+    def test_append_json_leaves_non_lists_alone(self):
+        ju.save_json(self.path, {"a": 1})
+        ju.append_json(self.path, {"n": 1})
+        self.assertEqual(ju.load_json(self.path), {"a": 1})
+
+    def test_non_native_values_match_disk(self):
+        ju.save_json(self.path, {"tags": {"a"}, 1: "one"})
+        self.assertEqual(ju.load_json(self.path), {"tags": ["a"], "1": "one"})
+
+    def test_clone_rejects_non_native(self):
+        self.assertEqual(clone_json({"a": (1, [2.0, None])}), {"a": [1, [2.0, None]]})
+        with self.assertRaises(NotJSONNative):
+            clone_json({"when": os})
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
+class TransactionRollbackTests(unittest.TestCase):
+    """A failed cycle leaves the resident stores matching their files."""
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tempdir.name)
+        self._log = patch.object(ulog, "MODEL_FAILURE", self.root / "model_failures.txt")
+        self._log.start()
+        ju.STATE_STORE.invalidate()
+
+    def tearDown(self):
+        ju.set_write_back(False)
+        ju.STATE_STORE.invalidate()
+        self._log.stop()
+        self.tempdir.cleanup()
+
+    def test_rollback_restores_working_memory_rings_long_memory_and_queue(self):
+        from memory.consolidation import ConsolidationQueue
+        from memory.long_store import LongMemoryLog
+        from memory.working_store import WorkingMemory
+        from utils.ring_buffer import RingBuffer
+
+        wm = WorkingMemory(self.root / "working.json")
+        ring = RingBuffer(self.root / "history.json", 5)
+        log = LongMemoryLog(self.root / "long.json")
+        queue = ConsolidationQueue(self.root / "queue.json")
+        state = self.root / "state.json"
+
+        wm.add({"content": "kept", "event_type": "thought"}, max_entries=10)
+        ring.extend([{"n": 1}, {"n": 2}])
+        log.extend([{"id": "a", "content": "old"}, {"id": "b", "content": "gone?"}])
+        queue.submit("prune_long_memory")
+        ju.save_json(state, {"cycle": 1})
+        before = (wm.rows(), ring.load_all(), log.load_all(), len(queue))
+
+        with self.assertRaises(RuntimeError):
+            with ju.StateTransaction():
+                wm.add({"content": "lost", "event_type": "thought"}, max_entries=10)
+                ring.append({"n": 3})
+                ring.replace([{"n": 9}])
+                log.append({"id": "a", "content": "new"})
+                log.append({"id": "c", "content": "added"})
+                log.delete(["b"])
+                log.bump_recall(["a"])
+                queue.submit("cluster_long_memory")
+                queue.drain(max_jobs=0)
+                ju.save_json(state, {"cycle": 2})
+                self.assertEqual(len(ring), 1)
+                raise RuntimeError("cycle crashed")
+
+        self.assertEqual(ju.load_json(state), {"cycle": 1})
+        self.assertEqual((wm.rows(), ring.load_all(), log.load_all(), len(queue)), before)
+        # ... and so do fresh readers of the files
+        self.assertEqual(WorkingMemory(self.root / "working.json").rows(), before[0])
+        self.assertEqual(RingBuffer(self.root / "history.json", 5).load_all(), before[1])
+        self.assertEqual(LongMemoryLog(self.root / "long.json").load_all(), before[2])
+        self.assertEqual(len(ConsolidationQueue(self.root / "queue.json")), 1)
+
+    def test_commit_writes_held_ring_lines_and_jobs(self):
+        from memory.consolidation import ConsolidationQueue
+        from utils.ring_buffer import RingBuffer
+
+        ring = RingBuffer(self.root / "history.json", 5)
+        queue = ConsolidationQueue(self.root / "queue.json")
+        with ju.StateTransaction():
+            ring.append({"n": 1})
+            queue.submit("prune_long_memory")
+            self.assertEqual(RingBuffer(self.root / "history.json", 5).load_all(), [])
+            self.assertEqual(ring.load_all(), [{"n": 1}])
+        self.assertEqual(RingBuffer(self.root / "history.json", 5).load_all(), [{"n": 1}])
+        self.assertEqual(len(ConsolidationQueue(self.root / "queue.json")), 1)
+
+
+class ThreadScopedWriteBackTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tempdir.name) / "state.json"
+        self._log = patch.object(ulog, "MODEL_FAILURE", Path(self.tempdir.name) / "model_failures.txt")
+        self._log.start()
+        ju.STATE_STORE.invalidate()
+
+    def tearDown(self):
+        ju.set_write_back(False)
+        ju.STATE_STORE.invalidate()
+        self._log.stop()
+        self.tempdir.cleanup()
+
+    def test_other_threads_write_through_and_survive_rollback(self):
+        worker = self.path.with_name("worker.json")
+        with self.assertRaises(RuntimeError):
+            with ju.StateTransaction():
+                ju.save_json(self.path, {"cycle": 1})
+                t = threading.Thread(target=ju.save_json, args=(worker, {"done": True}))
+                t.start()
+                t.join()
+                self.assertFalse(self.path.exists())
+                self.assertEqual(json.loads(worker.read_text(encoding="utf-8")), {"done": True})
+                raise RuntimeError("cycle crashed")
+        self.assertFalse(self.path.exists())
+        self.assertEqual(ju.load_json(worker), {"done": True})
+
+    def test_worker_dequeue_is_not_rolled_back(self):
+        from memory import consolidation
+        from memory.consolidation import ConsolidationQueue
+
+        ran = []
+        queue = ConsolidationQueue(self.path.with_name("queue.json"))
+        with patch.dict(consolidation.JOB_HANDLERS, {"record": ran.append}):
+            queue.submit("record", 1)
+            with self.assertRaises(RuntimeError):
+                with ju.StateTransaction():
+                    queue.submit("record", 2)
+                    t = threading.Thread(target=queue.drain)
+                    t.start()
+                    t.join()
+                    raise RuntimeError("cycle crashed")
+            self.assertEqual(ran, [1])
+            self.assertEqual(len(queue), 0)
+            self.assertEqual(len(ConsolidationQueue(self.path.with_name("queue.json"))), 0)
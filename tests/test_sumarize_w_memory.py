@@ -6,12 +6,13 @@ from unittest.mock import patch
 import memory.summarize_w_memory as swwm
 
 class SummarizeWorkingMemoryTests(unittest.TestCase):
+    @patch("memory.summarize_w_memory.log_private")
     @patch("memory.summarize_w_memory.update_long_memory")
     @patch("memory.summarize_w_memory.get_embedding", return_value=[0.0])
     @patch("memory.summarize_w_memory.detect_emotion", return_value="neutral")
     @patch("memory.summarize_w_memory.summarize_memories", return_value="summary text")
     def test_summary_promotes_entry(
-        self, mock_summarize, mock_emotion, mock_embedding, mock_update
+        self, mock_summarize, mock_emotion, mock_embedding, mock_update, _mock_log
     ):
         """Ensure that summarising working memory generates a summary entry and calls update_long_memory."""
         memories = [
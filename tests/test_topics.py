@@ -0,0 +1,79 @@
+# test_topics.py
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+import memory.topics as tp
+from memory.embedding_store import store_for
+from memory.long_store import long_log_for
+
+
+def _clustered(rows, dim=16, topics=6, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(topics, dim))
+    labels = rng.integers(0, topics, size=rows)
+    x = centers[labels] + 0.1 * rng.normal(size=(rows, dim))
+    return (x / np.linalg.norm(x, axis=1, keepdims=True)).astype(np.float32), labels
+
+
+class MiniBatchKMeansTests(unittest.TestCase):
+    def test_recovers_separated_clusters(self):
+        unit, labels = _clustered(600)
+        cents = tp.minibatch_kmeans(unit, 6, batch=128, iters=40)
+        self.assertEqual(cents.shape, (6, 16))
+        self.assertTrue(np.allclose(np.linalg.norm(cents, axis=1), 1.0, atol=1e-5))
+        found = np.argmax(unit @ cents.T, axis=1)
+        # every true cluster maps onto a single centroid
+        for c in range(6):
+            self.assertEqual(len(set(found[labels == c].tolist())), 1)
+
+
+class TopicModelTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.json_path = Path(self.tempdir.name) / "long_memory.json"
+        self.unit, self.labels = _clustered(300)
+        log = long_log_for(self.json_path)
+        log.extend([{"id": f"m{i}", "content": f"topic {c} note {i}"} for i, c in enumerate(self.labels)])
+        store = store_for(self.json_path)
+        for i, v in enumerate(self.unit):
+            store.put(f"m{i}", v)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_rebuild_persists_centroids_and_summaries(self):
+        model = tp.TopicModel(self.json_path)
+        self.assertTrue(model.stale())
+        k = model.rebuild()
+        self.assertGreaterEqual(k, 4)
+        self.assertFalse(model.stale())
+        self.assertEqual(sum(t["size"] for t in model.topics), 300)
+        self.assertTrue(all(t["summary"].startswith("- topic") for t in model.topics if t["size"]))
+
+        reloaded = tp.TopicModel(self.json_path)
+        self.assertEqual(len(reloaded), k)
+        self.assertEqual(reloaded.topic_of(["m0", "m1"]), model.topic_of(["m0", "m1"]))
+
+    @patch.object(tp, "TOPIC_RECALL_MIN_ROWS", 100)
+    def test_two_level_search_returns_the_query_topic(self):
+        model = tp.TopicModel(self.json_path)
+        self.assertIsNone(model.search_ids(self.unit[0]))  # not clustered yet
+        model.rebuild()
+        ids = model.search_ids(self.unit[0], probe=1)
+        same_topic = {f"m{i}" for i in np.flatnonzero(self.labels == self.labels[0])}
+        self.assertTrue(same_topic <= set(ids))
+        self.assertLess(len(ids), 300)
+
+    def test_new_rows_are_assigned_without_retraining(self):
+        model = tp.TopicModel(self.json_path)
+        model.rebuild()
+        store_for(self.json_path).put("late", self.unit[5])
+        self.assertEqual(model.topic_of(["late"])["late"], model.topic_of(["m5"])["m5"])
+
+
+if __name__ == "__main__":
+    unittest.main()
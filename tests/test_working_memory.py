@@ -7,22 +7,32 @@ from unittest.mock import patch
 
 # System under test
 import memory.working_memory as wm
+import memory.consolidation as consolidation
+import utils.log as ulog
+from memory.embedding_store import entry_embedding
 from paths import WORKING_JSON  # <-- import the test filename constant
 
 class UpdateWorkingMemoryTests(unittest.TestCase):
     def setUp(self):
         # Use a temporary file for working memory
         self.tempdir = tempfile.TemporaryDirectory()
-        self.mem_path = Path(self.tempdir.name) / WORKING_JSON
+        self.mem_path = Path(self.tempdir.name) / WORKING_JSON.name
         self.mem_path.write_text("[]", encoding="utf-8")
 
         # Override the module’s WORKING_MEMORY_FILE constant
         self._orig_path = wm.WORKING_MEMORY_FILE
         wm.WORKING_MEMORY_FILE = str(self.mem_path)
+        self._queue = patch.object(consolidation, "_QUEUE",
+                                   consolidation.ConsolidationQueue(Path(self.tempdir.name) / "queue.json"))
+        self._queue.start()
+        self._log = patch.object(ulog, "PRIVATE_THOUGHTS_FILE", Path(self.tempdir.name) / "private_thoughts.txt")
+        self._log.start()
 
     def tearDown(self):
         # Restore the original constant and clean up
         wm.WORKING_MEMORY_FILE = self._orig_path
+        self._queue.stop()
+        self._log.stop()
         self.tempdir.cleanup()
 
     @patch("memory.working_memory.get_embedding", return_value=[0.0])
@@ -34,15 +44,17 @@ class UpdateWorkingMemoryTests(unittest.TestCase):
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]["content"], "hello")
         self.assertEqual(data[0]["emotion"], "neutral")
-        self.assertEqual(data[0]["embedding"], [0.0])
+        # Vector lives in the sidecar store; the JSON row only references it
+        self.assertNotIn("embedding", data[0])
+        self.assertEqual(entry_embedding(data[0], self.mem_path).tolist(), [0.0])
 
     @patch("memory.working_memory.get_embedding", return_value=[0.0])
     @patch("memory.working_memory.detect_emotion", return_value="neutral")
-    @patch("memory.working_memory.summarize_and_promote_working_memory")
+    @patch("memory.summarize_w_memory.summarize_and_promote_working_memory")
     def test_prune_and_promote(self, mock_summary, mock_emotion, mock_embedding):
         """
         When working memory exceeds MAX_WORKING_LOGS, older non-pinned entries should be
-        summarised and promoted.
+        queued, then summarised and promoted when the queue is drained.
         """
         # Temporarily reduce MAX_WORKING_LOGS to force pruning
         original_max = wm.MAX_WORKING_LOGS
@@ -52,7 +64,11 @@ class UpdateWorkingMemoryTests(unittest.TestCase):
                 wm.update_working_memory(f"msg {i}")
             data = json.loads(self.mem_path.read_text(encoding="utf-8"))
             self.assertLessEqual(len(data), 3)
-            self.assertTrue(mock_summary.called)
+            self.assertFalse(mock_summary.called)
+            self.assertEqual(consolidation.consolidation_stats()["depth"], 2)
+            self.assertEqual(consolidation.drain_consolidation(), 2)
+            promoted = [call.args[0][0]["content"] for call in mock_summary.call_args_list]
+            self.assertEqual(promoted, ["msg 0", "msg 1"])
         finally:
             wm.MAX_WORKING_LOGS = original_max
 
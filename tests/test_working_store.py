@@ -0,0 +1,97 @@
+# test_working_store.py
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import utils.json_utils as ju
+from memory.working_store import DECAY_STEP, WorkingMemory, working_memory_for
+
+
+def _row(i, **kw):
+    row = {"id": f"m{i}", "content": f"c{i}", "timestamp": f"2024-01-01T00:00:{i:02d}",
+           "priority": 1, "importance": 1, "decay": 1.0, "referenced": 0}
+    row.update(kw)
+    return row
+
+
+class WorkingMemoryTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tempdir.name) / "working_memory.json"
+
+    def tearDown(self):
+        ju.set_write_back(False)
+        self.tempdir.cleanup()
+
+    def _file(self):
+        return json.loads(self.path.read_text(encoding="utf-8"))
+
+    def test_decay_is_applied_lazily_on_read(self):
+        wm = WorkingMemory(self.path)
+        wm.add(_row(0), max_entries=10)
+        wm.add(_row(1), max_entries=10)
+        wm.add(_row(2, pin=True), max_entries=10)
+        decay = {r["id"]: r["decay"] for r in wm.rows()}
+        self.assertAlmostEqual(decay["m0"], 1.0 - 2 * DECAY_STEP)
+        self.assertAlmostEqual(decay["m1"], 1.0 - DECAY_STEP)
+        self.assertEqual(decay["m2"], 1.0)
+
+    def test_inserts_do_not_rewrite_other_rows_decay(self):
+        wm = WorkingMemory(self.path)
+        for i in range(3):
+            wm.add(_row(i), max_entries=10)
+        on_disk = self._file()
+        self.assertEqual([r["decay"] for r in on_disk], [1.0, 1.0, 1.0])
+        self.assertEqual([r["decay_epoch"] for r in on_disk], [1, 2, 3])
+        reopened = WorkingMemory(self.path)
+        self.assertEqual([r["decay"] for r in reopened.rows()], [r["decay"] for r in wm.rows()])
+        self.assertNotIn("decay_epoch", reopened.rows()[0])
+
+    def test_legacy_rows_are_backfilled(self):
+        self.path.write_text(json.dumps([_row(0, decay=0.7)]), encoding="utf-8")
+        wm = WorkingMemory(self.path)
+        self.assertEqual(self._file()[0]["decay_epoch"], 0)
+        wm.add(_row(1), max_entries=10)
+        self.assertAlmostEqual(wm.rows()[0]["decay"], 0.7 - DECAY_STEP)
+
+    def test_same_content_reinforces_existing_entry(self):
+        wm = WorkingMemory(self.path)
+        wm.add(_row(0, decay=0.5), max_entries=10)
+        wm.add(_row(1, content="c0", referenced=2), max_entries=10)
+        first = wm.rows()[0]
+        self.assertEqual(first["referenced"], 2)
+        self.assertAlmostEqual(first["decay"], 0.5 - DECAY_STEP + 0.1)
+
+    def test_eviction_drops_weakest_and_keeps_pins(self):
+        wm = WorkingMemory(self.path)
+        wm.add(_row(0, pin=True, priority=0), max_entries=3)
+        wm.add(_row(1, priority=5), max_entries=3)
+        wm.add(_row(2, priority=0), max_entries=3)
+        dropped = wm.add(_row(3, priority=3), max_entries=3)
+        self.assertEqual([r["id"] for r in dropped], ["m2"])
+        self.assertEqual([r["id"] for r in self._file()], ["m0", "m1", "m3"])
+
+    def test_recall_bumps_wait_for_flush(self):
+        wm = WorkingMemory(self.path)
+        wm.add(_row(0), max_entries=10)
+        self.assertEqual(wm.bump_recall(["m0", "nope"]), 1)
+        self.assertEqual(wm.rows()[0]["recall_count"], 1)
+        self.assertNotIn("recall_count", self._file()[0])
+        wm.flush()
+        self.assertEqual(self._file()[0]["recall_count"], 1)
+
+    def test_write_back_defers_file_until_flush(self):
+        self.path.write_text("[]", encoding="utf-8")
+        working_memory_for(self.path)
+        ju.set_write_back(True)
+        ju.save_json(self.path, [_row(0)])
+        working_memory_for(self.path).add(_row(1), max_entries=10)
+        self.assertEqual(self._file(), [])
+        ju.flush_state()
+        self.assertEqual([r["id"] for r in self._file()], ["m0", "m1"])
+        self.assertEqual(len(ju.load_json(self.path, default_type=list)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,6 +4,7 @@ import time
 import json
 
 from utils.log import log_model_issue
+from utils.durability import append_stream
 from utils.json_utils import load_json  # ⬅️ read-only
 from paths import COGNITIVE_FUNCTIONS_LIST_FILE, BEHAVIORAL_FUNCTIONS_LIST_FILE
 
@@ -27,8 +28,7 @@ def emit_trace(**payload) -> None:
     """Append a single JSON line of telemetry to trace.jsonl (never crash)."""
     try:
         payload.setdefault("ts", time.time())
-        with open("trace.jsonl", "a", encoding="utf-8") as _f:
-            _f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+        append_stream("trace.jsonl", json.dumps(payload, ensure_ascii=False) + "\n")
     except Exception as _e:
         log_model_issue(f"Trace emit failed: {_e}")
 
@@ -5,7 +5,8 @@ from utils.knowledge_utils import recall_relevant_knowledge
 from think.think_utils.user_input import handle_user_input
 from emotion.reward_signals.reward_signals import release_reward_signal
 from paths import EMOTION_MODEL_FILE, ATTENTION_HISTORY
-from utils.json_utils import save_json
+from utils.json_utils import load_tail
+from utils.ring_buffer import ring_for
 from utils.signal_utils import gather_signals  # <-- added
 
 
@@ -90,12 +91,10 @@ def process_inputs(context, raw_signals=None):
     goal_words = [w.lower() for w in directive.get("motivations", []) if isinstance(w, str)]
 
     # === Novelty Context — last 20 signal contents ===
-    recent_signals = load_json(ATTENTION_HISTORY, default_type=list)
-    if not isinstance(recent_signals, list):
-        recent_signals = []
+    recent_signals = load_tail(ATTENTION_HISTORY, 20)
     recent_contents = [
         (r.get("content") or "").lower()
-        for r in recent_signals[-20:]
+        for r in recent_signals
         if isinstance(r, dict)
     ]
 
@@ -225,11 +224,7 @@ def process_inputs(context, raw_signals=None):
 
     log_activity(f"[Thalamus] Routed {len(top_signals)} signals | Attention mode: {attention_state}")
 
-    # === Persist attention history (cap to last 500) ===
-    history = load_json(ATTENTION_HISTORY, default_type=list)
-    if not isinstance(history, list):
-        history = []
-
+    # === Persist attention history (ring buffer keeps the last 500) ===
     new_records = []
     for s in top_signals:
         new_records.append({
@@ -244,10 +239,7 @@ def process_inputs(context, raw_signals=None):
             "routing_target": s.get("routing_target", "general"),
         })
 
-    history.extend(new_records)
-    if len(history) > 500:
-        history = history[-500:]
-    save_json(ATTENTION_HISTORY, history)
+    ring_for(ATTENTION_HISTORY).extend(new_records)
 
     # === Inject back into context ===
     context["top_signals"] = top_signals
@@ -23,7 +23,7 @@ from emotion.emotion_learning import update_emotion_function_map
 
 from paths import (
     SELF_MODEL_FILE, LONG_MEMORY_FILE, TOOL_REQUESTS_FILE,
-    COGNITION_STATE_FILE, COGNITION_HISTORY_FILE, RELATIONSHIPS_FILE,
+    COGNITION_STATE_FILE, RELATIONSHIPS_FILE,
     COGNITIVE_FUNCTIONS_LIST_FILE,  # ← from paths (not registry)
 )
 
@@ -60,7 +60,6 @@ def think(context: Dict[str, Any]) -> Dict[str, Any]:
         long_memory     = load_json(LONG_MEMORY_FILE,       default_type=list)
         tool_requests   = load_json(TOOL_REQUESTS_FILE,     default_type=list)
         cognition_state = load_json(COGNITION_STATE_FILE,   default_type=dict)
-        cognition_log   = load_json(COGNITION_HISTORY_FILE, default_type=list)
         relationships   = load_json(RELATIONSHIPS_FILE,     default_type=dict)
 
         context["relationships"] = relationships
@@ -5,6 +5,7 @@ from typing import Dict, Any, Optional
 from utils.json_utils import load_json, save_json
 from utils.log import log_model_issue, log_activity
 from memory.working_memory import update_working_memory
+from memory.long_store import long_log_for
 from paths import GOALS_FILE, LONG_MEMORY_FILE
 from emotion.emotion import detect_emotion  # <-- fix import
 from utils.self_model import get_self_model, save_self_model, ensure_self_model_integrity
@@ -21,14 +22,12 @@ def _safe_load_list(path: str) -> list:
 
 
 def _append_long_memory(content: str, event_type: str, ts: Optional[str] = None) -> None:
-    records = _safe_load_list(LONG_MEMORY_FILE)
-    records.append({
+    long_log_for(LONG_MEMORY_FILE).append({
         "content": content,
         "timestamp": ts or _utc_now_iso(),
         "emotion": detect_emotion(content),
         "event_type": event_type
     })
-    save_json(LONG_MEMORY_FILE, records)
 
 
 def _reward(context: Optional[dict], *, signal: str, actual: float, expected: float, effort: float, mode: str, source: str) -> None:
@@ -6,6 +6,7 @@ from utils.generate_response import generate_response
 from emotion.emotion import detect_emotion  # fixed import
 from utils.timing import get_time_since_last_active
 from utils.feedback_log import log_feedback
+from utils.ring_buffer import ring_for
 from utils.log import log_private, log_model_issue
 from utils.core_utils import rate_satisfaction
 from utils.events import emit_event, DECISION
@@ -171,15 +172,11 @@ def finalize_cycle(context, user_input, next_function, reason, context_hash, spe
     last_choice = cog_state.get("last_cognition_choice")
     repeat_count = (cog_state.get("repeat_count", 0) + 1) if last_choice == next_function else 1
 
-    cognition_log = load_json(COGNITION_HISTORY_FILE, default_type=list)
-    if not isinstance(cognition_log, list):
-        cognition_log = []
-    cognition_log.append({
+    ring_for(COGNITION_HISTORY_FILE).append({
         "choice": next_function,
         "reason": reason,  # keep raw (dict or string) for fidelity
         "timestamp": _utc_now()
     })
-    save_json(COGNITION_HISTORY_FILE, cognition_log)
 
     # 🧭 recent_picks tracking (feeds novelty/boredom in select_function)
     try:
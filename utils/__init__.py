@@ -0,0 +1,6 @@
+# Capped histories (attention, reward trace, cognition history) are stored as on-disk
+# rings (utils/ring_buffer.py); plain load_json/save_json calls on them are routed there.
+from utils.ring_buffer import RING_FILES as _RING_FILES, register_ring as _register_ring
+
+for _path, _capacity in _RING_FILES.items():
+    _register_ring(_path, _capacity)
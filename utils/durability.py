@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import atexit
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Union
+
+# How hard writes try to reach the disk before returning (ORRIN_DURABILITY):
+#   strict  every state/record write is written and fsynced before the call returns
+#           (default); non-critical streams are appended in place without an fsync
+#   group   state/record appends land immediately, but their fsync is owed to a background
+#           flusher that syncs everything every GROUP_COMMIT_MS; non-critical streams
+#           (activity log, events, traces, prompt log) are buffered and written by it too.
+#           A temp file is still fsynced before it is renamed over live state
+#           (sync_before_replace); only the rename's directory fsync is deferred.
+#   os      like group, but nothing is fsynced: the OS page cache decides
+# A crash can lose up to GROUP_COMMIT_MS of appends/renames in group mode (never leaving a
+# torn state file), and more, including torn renamed files, in os mode.
+
+DURABILITY_MODES = ("strict", "group", "os")
+DURABILITY: str = os.getenv("ORRIN_DURABILITY", "strict").strip().lower()
+GROUP_COMMIT_MS: float = float(os.getenv("ORRIN_GROUP_COMMIT_MS", "200"))
+MAX_PENDING_BYTES: int = 1024 * 1024   # wake the flusher early past this much buffered data
+
+if DURABILITY not in DURABILITY_MODES:
+    DURABILITY = "strict"
+
+PathLike = Union[str, Path]
+
+
+def _fsync_path(path: str) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return  # removed since it was written (or a directory we can't open)
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class _Flusher:
+    """Buffers stream appends and owed fsyncs; a daemon thread settles them periodically."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()       # guards the pending state below
+        self._io_lock = threading.Lock()    # one drain at a time, so appends stay in order
+        self._buffers: Dict[str, List[bytes]] = {}
+        self._pending_bytes = 0
+        self._syncs: Set[str] = set()
+        self._dir_syncs: Set[str] = set()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.flushes = 0
+        self.bytes_written = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="durability-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(GROUP_COMMIT_MS / 1000.0)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                from utils.log import log_model_issue
+                log_model_issue(f"[durability] background flush failed: {e}")
+
+    def buffer(self, path: str, data: bytes) -> None:
+        with self._lock:
+            self._buffers.setdefault(path, []).append(data)
+            self._pending_bytes += len(data)
+            over = self._pending_bytes >= MAX_PENDING_BYTES
+            self._ensure_thread()
+        if over:
+            self._wake.set()
+
+    def owe_sync(self, path: str, directory: Optional[str] = None) -> None:
+        with self._lock:
+            self._syncs.add(path)
+            if directory:
+                self._dir_syncs.add(directory)
+            self._ensure_thread()
+
+    def flush(self, path: Optional[str] = None) -> int:
+        """Write buffered appends (only `path`'s if given) and settle owed fsyncs. Returns bytes."""
+        with self._io_lock:
+            t0 = time.perf_counter()
+            with self._lock:
+                if path is None:
+                    buffers, self._buffers = self._buffers, {}
+                    syncs, self._syncs = self._syncs, set()
+                    dir_syncs, self._dir_syncs = self._dir_syncs, set()
+                else:
+                    chunks = self._buffers.pop(path, None)
+                    buffers = {path: chunks} if chunks else {}
+                    syncs, dir_syncs = set(), set()
+                written = sum(len(c) for chunks in buffers.values() for c in chunks)
+                self._pending_bytes -= written
+            if not buffers and not syncs and not dir_syncs:
+                return 0
+
+            sync = DURABILITY != "os"
+            for p, chunks in buffers.items():
+                try:
+                    Path(p).parent.mkdir(parents=True, exist_ok=True)
+                    with open(p, "ab") as f:
+                        f.write(b"".join(chunks))
+                        if sync and path is None:
+                            f.flush()
+                            os.fsync(f.fileno())
+                except OSError as e:
+                    from utils.log import log_model_issue
+                    log_model_issue(f"[durability] could not write {p}: {e}")
+            if sync and path is not None:
+                with self._lock:
+                    self._syncs.update(buffers)  # a reader only needs the bytes; sync later
+            elif sync:
+                for p in syncs - set(buffers):
+                    _fsync_path(p)
+                for d in dir_syncs:
+                    _fsync_path(d)
+
+            ms = (time.perf_counter() - t0) * 1e3
+            with self._lock:
+                self.flushes += 1
+                self.bytes_written += written
+                self.last_flush_ms = ms
+                self.max_flush_ms = max(self.max_flush_ms, ms)
+                self.total_flush_ms += ms
+            return written
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": DURABILITY,
+                "interval_ms": GROUP_COMMIT_MS,
+                "pending_bytes": self._pending_bytes,
+                "pending_files": len(self._buffers),
+                "pending_syncs": len(self._syncs) + len(self._dir_syncs),
+                "flushes": self.flushes,
+                "bytes_written": self.bytes_written,
+                "last_flush_ms": round(self.last_flush_ms, 3),
+                "max_flush_ms": round(self.max_flush_ms, 3),
+                "avg_flush_ms": round(self.total_flush_ms / self.flushes, 3) if self.flushes else 0.0,
+            }
+
+
+_FLUSHER = _Flusher()
+atexit.register(lambda: _FLUSHER.flush())
+
+
+def set_durability(mode: str) -> None:
+    """Switch policy at runtime (settles everything pending under the old one first)."""
+    global DURABILITY
+    if mode not in DURABILITY_MODES:
+        raise ValueError(f"unknown durability mode: {mode!r}")
+    _FLUSHER.flush()
+    DURABILITY = mode
+
+
+def durability_mode() -> str:
+    return DURABILITY
+
+
+def append_stream(path: PathLike, data: Union[str, bytes]) -> None:
+    """
+    Append to a non-critical stream (logs, telemetry). Never fsynced: written in place
+    under the strict policy, else buffered off the calling thread (readers in this
+    process should call flush_appends(path)).
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    key = os.path.abspath(os.fspath(path))
+    if DURABILITY != "strict":
+        _FLUSHER.buffer(key, data)
+        return
+    Path(key).parent.mkdir(parents=True, exist_ok=True)
+    with open(key, "ab") as f:
+        f.write(data)
+
+
+def sync_file(f: Any, path: Optional[PathLike] = None) -> None:
+    """
+    Make a just-written file object durable per the policy: fsync now (strict), owe an
+    fsync of `path` (or the file's own name) to the flusher (group), or nothing (os).
+    """
+    f.flush()
+    if DURABILITY == "strict":
+        os.fsync(f.fileno())
+    elif DURABILITY == "group":
+        _FLUSHER.owe_sync(os.path.abspath(os.fspath(path if path is not None else f.name)))
+
+
+def sync_before_replace(f: Any) -> None:
+    """
+    Make a temp file that is about to be os.replace()d over `path` durable. Unlike
+    sync_file this is never deferred (except in os mode): renaming an un-synced file
+    over good state can leave it empty or torn after a crash.
+    """
+    f.flush()
+    if DURABILITY != "os":
+        os.fsync(f.fileno())
+
+
+def sync_replaced(path: PathLike) -> None:
+    """After an atomic rename onto `path`: owe an fsync of its directory (group)."""
+    if DURABILITY == "group":
+        _FLUSHER.owe_sync(os.path.dirname(os.path.abspath(os.fspath(path))))
+
+
+def flush_appends(path: Optional[PathLike] = None) -> int:
+    """Write out buffered stream appends now (all, or just `path`'s). Returns bytes written."""
+    return _FLUSHER.flush(None if path is None else os.path.abspath(os.fspath(path)))
+
+
+def durability_stats() -> Dict[str, Any]:
+    """Pending bytes/files/fsyncs and flush latency of the background flusher."""
+    return _FLUSHER.stats()
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import importlib.util
+import os
+from typing import Any, Callable, Dict, Sequence
+
+import numpy as np
+
+from utils.log import log_error
+
+# Pluggable loaders for the sentence-embedding model. A backend is a function
+# model_name -> encoder, where the encoder has SentenceTransformer's
+# .encode(texts, normalize_embeddings=..., show_progress_bar=...). Nothing here imports
+# torch or sentence_transformers until a loader actually runs.
+#   torch   fp32 SentenceTransformer (the reference)
+#   int8    torch dynamic int8 quantization of every Linear layer (no extra packages)
+#   onnx    SentenceTransformer on ONNX Runtime (needs onnxruntime + optimum; the model is
+#           exported on first load)
+# ORRIN_EMBED_BACKEND picks one. An unavailable choice falls back to torch at import,
+# before any vectors are cached under its name. scripts/bench_embedder.py compares
+# startup, latency, throughput and ranking agreement against torch.
+
+EMBED_BACKEND_DEFAULT = "torch"
+RANK_AGREEMENT_MIN: float = 0.9   # mean top-k overlap with torch a backend must keep
+
+Loader = Callable[[str], Any]
+
+
+def _load_torch(model_name: str) -> Any:
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+def _load_int8(model_name: str) -> Any:
+    import torch
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_name, device="cpu")   # quantized kernels are CPU-only
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def _load_onnx(model_name: str) -> Any:
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name, device="cpu", backend="onnx")
+
+
+_BACKENDS: Dict[str, Loader] = {"torch": _load_torch, "int8": _load_int8, "onnx": _load_onnx}
+_REQUIRES: Dict[str, Sequence[str]] = {"onnx": ("onnxruntime", "optimum")}
+
+
+def register_backend(name: str, loader: Loader, requires: Sequence[str] = ()) -> None:
+    """Make `name` selectable through ORRIN_EMBED_BACKEND / load_backend()."""
+    _BACKENDS[name] = loader
+    _REQUIRES[name] = tuple(requires)
+
+
+def backend_names() -> list:
+    return list(_BACKENDS)
+
+
+def backend_available(name: str) -> bool:
+    """Registered, and its optional packages are installed (checked without importing them)."""
+    return name in _BACKENDS and all(importlib.util.find_spec(m) is not None for m in _REQUIRES.get(name, ()))
+
+
+def resolve_backend(name: str) -> str:
+    """`name` if it can run here, else the torch default (with a logged reason)."""
+    name = (name or EMBED_BACKEND_DEFAULT).strip().lower()
+    if backend_available(name):
+        return name
+    missing = [m for m in _REQUIRES.get(name, ()) if importlib.util.find_spec(m) is None]
+    reason = f"missing {', '.join(missing)}" if missing else "unknown backend"
+    log_error(f"[embed_backends] {name!r} unavailable ({reason}); using {EMBED_BACKEND_DEFAULT}.")
+    return EMBED_BACKEND_DEFAULT
+
+
+def load_backend(name: str, model_name: str) -> Any:
+    return _BACKENDS[name](model_name)
+
+
+EMBED_BACKEND: str = resolve_backend(os.getenv("ORRIN_EMBED_BACKEND", EMBED_BACKEND_DEFAULT))
+
+
+def ranking_agreement(reference: np.ndarray, candidate: np.ndarray, queries: int = 50, k: int = 10) -> Dict[str, float]:
+    """
+    How closely `candidate` embeddings of a corpus rank neighbours like `reference` does.
+    The first `queries` rows are used as queries against every row. Returns the mean
+    top-k overlap (1.0 = same neighbour sets) and the largest cosine-score drift.
+    """
+    def unit(x: np.ndarray) -> np.ndarray:
+        x = np.asarray(x, dtype=np.float32)
+        return x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+
+    ref, cand = unit(reference), unit(candidate)
+    q = min(queries, len(ref))
+    k = min(k, len(ref) - 1)
+    if q == 0 or k <= 0:
+        return {"topk_overlap": 1.0, "max_score_drift": 0.0}
+    s_ref = ref[:q] @ ref.T
+    s_cand = cand[:q] @ cand.T
+    overlap = []
+    for i in range(q):
+        s_ref[i, i] = s_cand[i, i] = -np.inf   # a text is not its own neighbour
+        a = set(np.argpartition(-s_ref[i], k - 1)[:k].tolist())
+        b = set(np.argpartition(-s_cand[i], k - 1)[:k].tolist())
+        overlap.append(len(a & b) / k)
+    finite = np.isfinite(s_ref)
+    return {
+        "topk_overlap": float(np.mean(overlap)),
+        "max_score_drift": float(np.max(np.abs(s_ref[finite] - s_cand[finite]))),
+    }
@@ -1,28 +1,115 @@
-from typing import Union, List
-from sentence_transformers import SentenceTransformer
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Union, List
+
+from utils.embed_backends import EMBED_BACKEND, load_backend
+from utils.embedding_cache import EMBED_CACHE_SIZE, cache_for, embedding_cache_stats
+from utils.embedding_service import EmbeddingService
+from utils.log import log_error
+
+MODEL_NAME = 'all-mpnet-base-v2'
+# Vectors differ per backend, so non-reference backends get their own cache namespace
+CACHE_NAME = MODEL_NAME if EMBED_BACKEND == "torch" else f"{MODEL_NAME}@{EMBED_BACKEND}"
+# Load the model in the background at startup (warm_up_embedder) instead of on first use
+EMBED_PRELOAD = os.getenv("ORRIN_EMBED_PRELOAD", "1") == "1"
 
 _model = None
+_model_lock = threading.Lock()
+_service = None
+_service_lock = threading.Lock()
 
-def get_model() -> SentenceTransformer:
+def get_model() -> Any:
+    """The embedding model for EMBED_BACKEND, loaded (and torch imported) on first call."""
     global _model
-    if _model is None:
-        _model = SentenceTransformer('all-mpnet-base-v2')
-    return _model
+    with _model_lock:
+        if _model is None:
+            _model = load_backend(EMBED_BACKEND, MODEL_NAME)
+        return _model
+
+def warm_up_embedder() -> None:
+    """Start loading the model on a daemon thread; callers that need it first just wait."""
+    if not EMBED_PRELOAD or _model is not None:
+        return
+
+    def _load() -> None:
+        try:
+            get_model()
+        except Exception as e:
+            log_error(f"[embedder] background model load failed: {e}")
+
+    threading.Thread(target=_load, name="embedder-warmup", daemon=True).start()
+
+def _encode_batch(texts: List[str], normalize: bool):
+    return get_model().encode(
+        texts,
+        normalize_embeddings=normalize,
+        show_progress_bar=False
+    )
+
+def embedding_service() -> EmbeddingService:
+    """The process-wide micro-batching service in front of the model."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = EmbeddingService(_encode_batch)
+        return _service
+
+def flush_embeddings() -> None:
+    """Encode any queued embedding requests now (call at cycle phase boundaries)."""
+    if _service is not None:
+        _service.flush()
+
+def embedding_stats() -> dict:
+    """Batching and cache counters, for the cycle trace."""
+    return {
+        "backend": EMBED_BACKEND,
+        "service": _service.stats() if _service is not None else None,
+        "caches": embedding_cache_stats(),
+    }
 
 def get_embedding(texts: Union[str, List[str]], normalize: bool = True):
     """
     Takes a string or list of strings and returns their embeddings.
     If normalize=True, embeddings are L2-normalized (better for cosine similarity).
     Returns a single vector if input is a string.
+    Repeated texts are served from the embedding cache (utils/embedding_cache.py); the
+    rest are encoded in a batch with any concurrent requests (utils/embedding_service.py).
     """
-    model = get_model()
     is_single = isinstance(texts, str)
     if is_single:
         texts = [texts]
 
-    embeddings = model.encode(
-        texts,
-        normalize_embeddings=normalize,
-        show_progress_bar=False
-    )
-    return embeddings[0] if is_single else embeddings
\ No newline at end of file
+    def encode(batch):
+        return embedding_service().encode(batch, normalize)
+
+    if EMBED_CACHE_SIZE > 0 and len(texts):
+        embeddings = cache_for(CACHE_NAME, normalize).encode(texts, encode)
+    else:
+        embeddings = encode(texts)
+    return embeddings[0] if is_single else embeddings
+
+def embed_async(text: str, normalize: bool = True) -> Future:
+    """
+    Start embedding `text` and return a Future of its vector, so the encode can overlap
+    other work (and batch with other requests) until .result() is needed.
+    """
+    cache = cache_for(CACHE_NAME, normalize) if EMBED_CACHE_SIZE > 0 else None
+    out: Future = Future()
+    hit = cache.get(text) if cache is not None else None
+    if hit is not None:
+        out.set_result(hit)
+        return out
+
+    def _done(fut: Future) -> None:
+        try:
+            vecs = fut.result()
+        except Exception as e:
+            out.set_exception(e)
+            return
+        if cache is not None:
+            cache.put_many([text], vecs)
+        out.set_result(vecs[0])
+
+    embedding_service().submit([text], normalize).add_done_callback(_done)
+    return out
@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import struct
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from paths import EMBEDDING_CACHE_DIR
+from utils.log import log_error
+
+# Content-addressed cache in front of the sentence-transformer: the same strings (the core
+# directive, duplicate memory contents) get embedded again and again. One cache per
+# (model name, normalize flag), keyed by sha256(text):
+#   - an in-memory LRU of EMBED_CACHE_SIZE vectors
+#   - backed by <dir>/<model>.<norm|raw>.bin: a 16-byte header (magic, dim) followed by
+#     fixed-size records [32-byte digest][dim x float32], append-only
+# When the file passes EMBED_CACHE_DISK_ROWS records it is rewritten with the most
+# recently used half. A torn last record (crash mid-append) is truncated on open.
+
+EMBED_CACHE_SIZE: int = int(os.getenv("ORRIN_EMBED_CACHE_SIZE", "4096"))              # 0 disables the cache
+EMBED_CACHE_DISK_ROWS: int = int(os.getenv("ORRIN_EMBED_CACHE_DISK_ROWS", "50000"))    # 0 keeps it in memory only
+
+_MAGIC = b"ORREMB1\0"
+_HEADER = struct.Struct("<8sII")   # magic, dim, reserved
+_DIGEST = 32
+
+
+def text_key(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8", "surrogatepass")).digest()
+
+
+class EmbeddingCache:
+    """sha256(text) -> float32 vector for one embedding model and normalize setting."""
+
+    def __init__(
+        self,
+        model_name: str,
+        normalize: bool,
+        directory: Union[str, Path, None] = None,
+        size: Optional[int] = None,
+        disk_rows: Optional[int] = None,
+    ) -> None:
+        self.model_name = model_name
+        self.normalize = bool(normalize)
+        self.size = EMBED_CACHE_SIZE if size is None else int(size)
+        self.disk_rows = EMBED_CACHE_DISK_ROWS if disk_rows is None else int(disk_rows)
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name).strip("._") or "model"
+        self.path = Path(directory or EMBEDDING_CACHE_DIR) / f"{slug}.{'norm' if normalize else 'raw'}.bin"
+        self._lock = threading.RLock()
+        self._mem: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._rows: Dict[bytes, int] = {}    # digest -> record number in the file, append order
+        self._file: Optional[Any] = None
+        self.dim = 0
+        self.hits = 0         # served from memory
+        self.disk_hits = 0    # served from the file
+        self.misses = 0
+        if self.disk_rows > 0:
+            self._open()
+
+    # ---- file ----
+    @property
+    def _record_bytes(self) -> int:
+        return _DIGEST + 4 * self.dim
+
+    def _open(self) -> None:
+        self._rows = {}
+        self.dim = 0
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a+b")
+            self._file.seek(0)
+            head = self._file.read(_HEADER.size)
+            if len(head) < _HEADER.size:
+                self._file.truncate(0)
+                return
+            magic, dim, _ = _HEADER.unpack(head)
+            if magic != _MAGIC or dim <= 0:
+                log_error(f"[embedding_cache] {self.path.name} is not a cache file; starting over.")
+                self._file.truncate(0)
+                return
+            self.dim = int(dim)
+            body = self._file.read()
+            rec = self._record_bytes
+            n = len(body) // rec
+            if len(body) != n * rec:
+                self._file.truncate(_HEADER.size + n * rec)
+            for i in range(n):
+                self._rows[body[i * rec:i * rec + _DIGEST]] = i
+        except OSError as e:
+            log_error(f"[embedding_cache] could not open {self.path}: {e}")
+            self._file = None
+
+    def _read_row(self, row: int) -> Optional[np.ndarray]:
+        try:
+            self._file.seek(_HEADER.size + row * self._record_bytes + _DIGEST)
+            raw = self._file.read(4 * self.dim)
+        except (OSError, ValueError) as e:
+            log_error(f"[embedding_cache] read failed in {self.path.name}: {e}")
+            return None
+        if len(raw) != 4 * self.dim:
+            return None
+        return np.frombuffer(raw, dtype=np.float32).copy()
+
+    def _append(self, items: List[Tuple[bytes, np.ndarray]]) -> None:
+        if self._file is None or not items:
+            return
+        try:
+            if self.dim == 0:
+                self.dim = int(items[0][1].size)
+                self._file.truncate(0)
+                self._file.write(_HEADER.pack(_MAGIC, self.dim, 0))
+            self._file.seek(0, os.SEEK_END)
+            n = (self._file.tell() - _HEADER.size) // self._record_bytes
+            out = []
+            for key, vec in items:
+                if key in self._rows or vec.size != self.dim:
+                    continue
+                out.append(key + vec.tobytes())
+                self._rows[key] = n
+                n += 1
+            self._file.write(b"".join(out))
+            self._file.flush()
+        except OSError as e:
+            log_error(f"[embedding_cache] append failed in {self.path.name}: {e}")
+            return
+        if len(self._rows) > self.disk_rows:
+            self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        """Rewrite the file with the most recently used half of its records."""
+        keep_n = max(1, self.disk_rows // 2)
+        # File order is insertion order; anything in the memory LRU counts as recent
+        order = [k for k in self._rows if k not in self._mem] + [k for k in self._mem if k in self._rows]
+        keep = order[-keep_n:]
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with open(tmp, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, self.dim, 0))
+                for key in keep:
+                    vec = self._mem.get(key)
+                    if vec is None:
+                        vec = self._read_row(self._rows[key])
+                    if vec is not None:
+                        f.write(key + vec.tobytes())
+            self._file.close()
+            os.replace(tmp, self.path)
+        except OSError as e:
+            log_error(f"[embedding_cache] compaction of {self.path.name} failed: {e}")
+            return
+        self._open()
+
+    # ---- lookups ----
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Cached vector for `text` (a private copy), or None."""
+        key = text_key(text)
+        with self._lock:
+            vec = self._lookup(key)
+            if vec is None:
+                self.misses += 1
+            return None if vec is None else vec.copy()
+
+    def _lookup(self, key: bytes) -> Optional[np.ndarray]:
+        vec = self._mem.get(key)
+        if vec is not None:
+            self._mem.move_to_end(key)
+            self.hits += 1
+            return vec
+        row = self._rows.get(key)
+        if row is None:
+            return None
+        vec = self._read_row(row)
+        if vec is not None:
+            self.disk_hits += 1
+            self._remember(key, vec)
+        return vec
+
+    def _remember(self, key: bytes, vec: np.ndarray) -> None:
+        self._mem[key] = vec
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.size:
+            self._mem.popitem(last=False)
+
+    def put_many(self, texts: Sequence[str], vectors: Any) -> None:
+        with self._lock:
+            items = []
+            for text, vec in zip(texts, vectors):
+                vec = np.array(vec, dtype=np.float32).reshape(-1)
+                key = text_key(text)
+                self._remember(key, vec)
+                items.append((key, vec))
+            self._append(items)
+
+    def encode(self, texts: Sequence[str], encode_fn: Callable[[List[str]], Any]) -> np.ndarray:
+        """
+        (len(texts), dim) float32 embeddings, calling encode_fn once on the distinct
+        texts that aren't cached.
+        """
+        texts = list(texts)
+        with self._lock:
+            keys = [text_key(t) for t in texts]
+            found: Dict[bytes, np.ndarray] = {}
+            missing: Dict[bytes, str] = {}
+            for key, text in zip(keys, texts):
+                if key in found or key in missing:
+                    continue
+                vec = self._lookup(key)
+                if vec is None:
+                    missing[key] = text
+                else:
+                    found[key] = vec
+            self.misses += len(missing)
+        if missing:
+            fresh = np.asarray(encode_fn(list(missing.values())), dtype=np.float32)
+            self.put_many(list(missing.values()), fresh)
+            found.update(zip(missing, fresh))
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.stack([found[k] for k in keys])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.disk_hits + self.misses
+            return {
+                "model": self.model_name,
+                "normalize": self.normalize,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / total, 4) if total else 0.0,
+                "memory_entries": len(self._mem),
+                "disk_entries": len(self._rows),
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_CACHES: Dict[Tuple[str, bool], EmbeddingCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def cache_for(model_name: str, normalize: bool) -> EmbeddingCache:
+    """The (process-wide) cache for one model and normalize setting."""
+    key = (model_name, bool(normalize))
+    with _CACHES_LOCK:
+        cache = _CACHES.get(key)
+        if cache is None:
+            cache = EmbeddingCache(model_name, normalize)
+            _CACHES[key] = cache
+        return cache
+
+
+def embedding_cache_stats() -> List[Dict[str, Any]]:
+    """Hit/miss counters of every cache opened in this process."""
+    with _CACHES_LOCK:
+        caches = list(_CACHES.values())
+    return [c.stats() for c in caches]
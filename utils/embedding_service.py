@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import Future, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.log import log_error
+
+# Micro-batching in front of the embedding model: a transformer on CPU costs about the
+# same for a batch of 8 short texts as for one, so requests are queued and encoded
+# together. The worker takes the first pending request, keeps collecting for
+# EMBED_BATCH_WINDOW_MS (or until EMBED_MAX_BATCH texts / a flush() at a phase
+# boundary), then runs one encode per normalize setting and resolves each caller's
+# Future with its own rows. Requests that arrive while a batch is encoding queue up
+# for the next one. A synchronous encode() that finds the queue empty goes straight
+# to the model: with no other producer pending there is nothing to wait for.
+
+EMBED_BATCH_WINDOW_MS: float = float(os.getenv("ORRIN_EMBED_BATCH_MS", "2"))
+EMBED_MAX_BATCH: int = int(os.getenv("ORRIN_EMBED_MAX_BATCH", "64"))
+
+EncodeFn = Callable[[List[str], bool], Any]
+
+
+class EmbeddingService:
+    """Queue of embedding requests served in batches by one daemon thread."""
+
+    def __init__(
+        self,
+        encode_fn: EncodeFn,
+        window_ms: Optional[float] = None,
+        max_batch: Optional[int] = None,
+    ) -> None:
+        self.encode_fn = encode_fn
+        self.window_s = max(0.0, EMBED_BATCH_WINDOW_MS if window_ms is None else float(window_ms)) / 1000.0
+        self.max_batch = max(1, EMBED_MAX_BATCH if max_batch is None else int(max_batch))
+        self._cond = threading.Condition()
+        self._pending: List[Tuple[List[str], bool, Future]] = []
+        self._pending_texts = 0
+        self._first_at = 0.0
+        self._lone_sync = False
+        self._flush = False
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self.batches = 0
+        self.texts = 0
+        self.requests = 0
+        self.largest_batch = 0
+
+    def submit(self, texts: Sequence[str], normalize: bool = True) -> Future:
+        """Queue `texts`; the Future resolves to their (len(texts), dim) float32 embeddings."""
+        return self._enqueue(texts, normalize, sync=False)
+
+    def encode(self, texts: Sequence[str], normalize: bool = True) -> np.ndarray:
+        """Synchronous submit(): blocks until the batch holding `texts` is encoded."""
+        return self._enqueue(texts, normalize, sync=True).result()
+
+    def _enqueue(self, texts: Sequence[str], normalize: bool, sync: bool) -> Future:
+        fut: Future = Future()
+        texts = [str(t) for t in texts]
+        if not texts:
+            fut.set_result(np.zeros((0, 0), dtype=np.float32))
+            return fut
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("embedding service is closed")
+            self._lone_sync = sync and not self._pending
+            if not self._pending:
+                self._first_at = time.monotonic()
+            self._pending.append((texts, bool(normalize), fut))
+            self._pending_texts += len(texts)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+        return fut
+
+    def flush(self) -> None:
+        """Phase boundary: encode everything queued now and wait for it."""
+        with self._cond:
+            futures = [f for _, _, f in self._pending]
+            if not futures:
+                return
+            self._flush = True
+            self._cond.notify_all()
+        wait(futures)
+
+    def close(self) -> None:
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "requests": self.requests,
+                "texts": self.texts,
+                "batches": self.batches,
+                "mean_batch": round(self.texts / self.batches, 2) if self.batches else 0.0,
+                "largest_batch": self.largest_batch,
+                "pending": self._pending_texts,
+            }
+
+    # ---- worker ----
+    def _take(self) -> Optional[List[Tuple[List[str], bool, Future]]]:
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return None
+            while (
+                not self._flush and not self._closed and not self._lone_sync
+                and self._pending_texts < self.max_batch
+            ):
+                remaining = self._first_at + self.window_s - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, n = [], 0
+            while self._pending and (not batch or n + len(self._pending[0][0]) <= self.max_batch):
+                req = self._pending.pop(0)
+                batch.append(req)
+                n += len(req[0])
+            self._pending_texts -= n
+            self._lone_sync = False
+            if not self._pending:
+                self._flush = False
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take()
+            if batch is None:
+                return
+            self._encode(batch)
+
+    def _encode(self, batch: List[Tuple[List[str], bool, Future]]) -> None:
+        for normalize in (True, False):
+            reqs = [r for r in batch if r[1] is normalize]
+            if not reqs:
+                continue
+            unique = list(dict.fromkeys(t for texts, _, _ in reqs for t in texts))
+            try:
+                out = np.asarray(self.encode_fn(unique, normalize), dtype=np.float32)
+                if out.ndim != 2 or len(out) != len(unique):
+                    raise ValueError(f"encoder returned shape {out.shape} for {len(unique)} texts")
+            except Exception as e:
+                log_error(f"[embedding_service] batch of {len(unique)} failed: {e}")
+                for _, _, fut in reqs:
+                    fut.set_exception(e)
+                continue
+            row = {t: i for i, t in enumerate(unique)}
+            for texts, _, fut in reqs:
+                fut.set_result(out[[row[t] for t in texts]])
+            with self._cond:
+                self.batches += 1
+                self.requests += len(reqs)
+                self.texts += len(unique)
+                self.largest_batch = max(self.largest_batch, len(unique))
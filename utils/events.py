@@ -5,6 +5,7 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, Union
 from paths import EVENTS_FILE as _EVENTS_FILE
+from utils.durability import append_stream
 
 # Event types
 DECISION = "DECISION"
@@ -27,9 +28,7 @@ def emit_event(event_type: str, payload: Dict[str, Any] | None) -> None:
         "payload": payload or {},
     }
     try:
-        EVENTS_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with EVENTS_FILE.open("a", encoding="utf-8", newline="\n") as f:
-            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        append_stream(EVENTS_FILE, json.dumps(entry, ensure_ascii=False) + "\n")
     except Exception as e:
         # Optional: avoid raising during telemetry
         # from utils.log import log_error
@@ -6,6 +6,7 @@ from collections import deque
 from pathlib import Path
 from typing import List, Dict, Any
 from paths import EVENTS_FILE  # may be Path or str
+from utils.durability import flush_appends
 
 def _as_path(p) -> Path:
     return p if isinstance(p, Path) else Path(p)
@@ -31,6 +32,7 @@ def last_n_events(n: int = 400) -> List[Dict[str, Any]]:
     out: deque[Dict[str, Any]] = deque(maxlen=max(1, n))
     try:
         path = _as_path(EVENTS_FILE)
+        flush_appends(path)  # events are buffered; make ours visible first
         with path.open("r", encoding="utf-8", errors="ignore") as f:
             for line in f:
                 obj = _parse_line(line)
@@ -116,9 +116,8 @@ def log_feedback(
             mode=mode,
         ) or ctx  # in case the function mutates-in-place and returns None
 
-        # 5) Persist mutated state
+        # 5) Persist mutated state (release_reward_signal already appended to the trace ring)
         save_json(EMOTIONAL_STATE_FILE, new_ctx.get("emotional_state", emotional_state))
-        save_json(REWARD_TRACE_JSON, new_ctx.get(_REWARD_TRACE, reward_trace))
 
     except Exception:
         # Telemetry should never break the main flow
@@ -3,7 +3,6 @@ from __future__ import annotations
 import os
 import time
 from datetime import datetime, timezone
-from pathlib import Path
 from typing import Any, Dict, Optional
 
 from openai import OpenAI
@@ -13,6 +12,7 @@ from utils.json_utils import load_json
 from utils.coerce_to_string import coerce_to_string
 from cognition.selfhood.identity import build_system_prompt
 from utils.log import log_model_issue
+from utils.durability import append_stream
 from core.config.settings import model_roles
 from paths import MODEL_CONFIG_FILE, LLM_PROMPT
 from utils.self_model import get_self_model
@@ -132,15 +132,13 @@ def generate_response(
             if not isinstance(msg["content"], str):
                 raise TypeError(f"messages[{i}]['content'] must be str, got {type(msg['content'])!r}")
 
-        # Ensure prompt log directory exists
-        lp = Path(LLM_PROMPT)
-        lp.parent.mkdir(parents=True, exist_ok=True)
-
         # Log request
-        with lp.open("a", encoding="utf-8") as f:
-            f.write(f"\n\n=== {datetime.now(timezone.utc).isoformat()} ===\n")
-            f.write("SYSTEM PROMPT:\n" + system_prompt + "\n\n")
-            f.write("USER PROMPT:\n" + user_prompt + "\n\n")
+        append_stream(
+            LLM_PROMPT,
+            f"\n\n=== {datetime.now(timezone.utc).isoformat()} ===\n"
+            "SYSTEM PROMPT:\n" + system_prompt + "\n\n"
+            "USER PROMPT:\n" + user_prompt + "\n\n",
+        )
 
         client = _get_client()
 
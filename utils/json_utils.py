@@ -2,11 +2,17 @@ import re
 import json
 import tempfile
 import os
+import atexit
 import platform
+import threading
+import weakref
+from contextlib import nullcontext
 from pathlib import Path, PurePath
 from datetime import datetime, date
 from typing import Any, Callable, TypeVar, Union, Optional
 from utils.log import log_model_issue
+from utils.durability import durability_mode, sync_before_replace, sync_file, sync_replaced
+from utils.state_store import StateStore, NotJSONNative, clone_json, file_signature
 
 # fcntl is POSIX-only; make it optional
 try:
@@ -14,6 +20,16 @@ try:
 except Exception:
     fcntl = None  # type: ignore
 
+# Faster JSON codecs are optional; stdlib json is always the fallback
+try:
+    import orjson  # type: ignore
+except Exception:
+    orjson = None  # type: ignore
+try:
+    import msgspec  # type: ignore
+except Exception:
+    msgspec = None  # type: ignore
+
 T = TypeVar("T")
 
 # ------------------------------
@@ -276,13 +292,75 @@ def _json_default(o: Any):
     return str(o)
 
 
-def save_json(filepath: Union[str, Path], data: Any) -> None:
+# ------------------------------
+# Codec
+# ------------------------------
+
+JSON_CODEC: str = os.getenv("ORRIN_JSON_CODEC", "auto").lower()   # auto | orjson | msgspec | json
+JSON_PRETTY: bool = os.getenv("ORRIN_JSON_PRETTY", "0") == "1"    # indent=2 on disk (default: compact)
+GLOBAL_SYNC: bool = os.getenv("ORRIN_GLOBAL_SYNC", "0") == "1"    # group commit via os.sync() (whole host)
+
+
+def _pick_codec(name: str) -> str:
+    if name in ("auto", "orjson") and orjson is not None:
+        return "orjson"
+    if name in ("auto", "msgspec") and msgspec is not None:
+        return "msgspec"
+    if name not in ("auto", "json"):
+        log_model_issue(f"[json_utils] JSON codec {name!r} not installed; using stdlib json.")
+    return "json"
+
+
+_CODEC: str = _pick_codec(JSON_CODEC)
+
+
+def dumps_json(obj: Any, pretty: Optional[bool] = None, native: bool = False) -> bytes:
+    """
+    Serialize `obj` to UTF-8 JSON bytes with the fastest available codec.
+    Non-native values (sets, datetimes, paths, int keys...) come out exactly as with
+    json.dumps(default=_json_default): they are converted by _to_native first, unless
+    `native=True` says the caller already holds a JSON-native snapshot.
+    """
+    pretty = JSON_PRETTY if pretty is None else pretty
+    if _CODEC != "json":
+        try:
+            if not native:
+                obj = _to_native(obj)
+            if _CODEC == "orjson":
+                return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+            out = msgspec.json.encode(obj)
+            return msgspec.json.format(out, indent=2) if pretty else out
+        except Exception:
+            pass  # e.g. integers beyond 64 bits: the stdlib handles those
+    if pretty:
+        text = json.dumps(obj, indent=2, ensure_ascii=False, default=_json_default)
+    else:
+        text = json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_json_default)
+    return text.encode("utf-8")
+
+
+def loads_json(data: Union[bytes, str]) -> Any:
+    """Parse JSON with the fastest available codec (stdlib for anything it rejects, e.g. NaN)."""
+    if _CODEC == "orjson":
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    elif _CODEC == "msgspec":
+        try:
+            return msgspec.json.decode(data)
+        except msgspec.DecodeError:
+            pass
+    return json.loads(data)
+
+
+def _write_json_atomic(path: Path, data: Any, native: bool = False) -> bool:
     """
     Atomically write JSON to disk.
-    - Write to a temp file in the same dir, fsync, then os.replace(...) atomically.
+    - Write to a temp file in the same dir, fsync it (every policy but "os"), then
+      os.replace(...) atomically; the directory fsync follows the durability policy.
     - Serialize writers via a well-known .lock file on POSIX (advisory).
     """
-    path = Path(filepath)
     path.parent.mkdir(parents=True, exist_ok=True)
 
     lock_fd = None
@@ -296,16 +374,16 @@ def save_json(filepath: Union[str, Path], data: Any) -> None:
             fcntl.flock(lock_fd, fcntl.LOCK_EX)
 
         # Write to temp in the same dir to guarantee atomic rename
-        with tempfile.NamedTemporaryFile(
-            mode="w", delete=False, dir=str(path.parent), encoding="utf-8"
-        ) as tmp:
+        payload = dumps_json(data, native=native)
+        with tempfile.NamedTemporaryFile(mode="wb", delete=False, dir=str(path.parent)) as tmp:
             tmp_name = tmp.name
-            json.dump(data, tmp, indent=2, ensure_ascii=False, default=_json_default)
-            tmp.flush()
-            os.fsync(tmp.fileno())
+            tmp.write(payload)
+            sync_before_replace(tmp)
 
         # Atomic replace (POSIX/Windows)
         os.replace(tmp_name, path)
+        sync_replaced(path)
+        return True
 
     except Exception as e:
         # Clean up stray temp if we created one
@@ -314,7 +392,8 @@ def save_json(filepath: Union[str, Path], data: Any) -> None:
                 os.unlink(tmp_name)
         except Exception:
             pass
-        log_model_issue(f"[save_json] Failed to save {filepath}: {e}")
+        log_model_issue(f"[save_json] Failed to save {path}: {e}")
+        return False
     finally:
         if fcntl is not None and lock_fd:
             try:
@@ -330,44 +409,452 @@ def save_json(filepath: Union[str, Path], data: Any) -> None:
                         pass
 
 
+def _stage_json(path: Path, data: Any) -> Optional[str]:
+    """Write native `data` to a temp file next to `path` (not yet synced/renamed). Returns its name."""
+    tmp_name: Optional[str] = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = dumps_json(data, native=True)
+        with tempfile.NamedTemporaryFile(mode="wb", delete=False, dir=str(path.parent)) as tmp:
+            tmp_name = tmp.name
+            tmp.write(payload)
+        return tmp_name
+    except Exception as e:
+        if tmp_name and os.path.exists(tmp_name):
+            try:
+                os.unlink(tmp_name)
+            except Exception:
+                pass
+        log_model_issue(f"[save_json] Failed to save {path}: {e}")
+        return None
+
+
+def _sync_barrier(tmp_names: list) -> None:
+    """
+    Make every staged file durable: fsync each one (the renames' directories are synced
+    after). os.sync() flushes every filesystem on the host, so it is opt-in only
+    (ORRIN_GLOBAL_SYNC=1, for hosts where many small fsyncs cost more than that).
+    """
+    if durability_mode() == "os":
+        return
+    if GLOBAL_SYNC and hasattr(os, "sync"):
+        os.sync()
+        return
+    for name in tmp_names:
+        fd = os.open(name, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def _fsync_dir(directory: str) -> None:
+    """Persist renames in `directory` (POSIX; a no-op where directories can't be opened)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _write_json_group(items: list) -> list:
+    """
+    Group commit for a batch of (path, data): stage every file, fsync them all (the sync
+    barrier), then atomic renames and one fsync per directory, so no rename happens
+    before every file in the batch is durable.
+    Backend-held paths are written through the backend (inside flush_state's transaction).
+    """
+    results = [False] * len(items)
+    staged = []
+    for i, (path, data) in enumerate(items):
+        backend = _backend_for(path)
+        if backend is not None:
+            results[i] = backend.save(path, data)
+            continue
+        tmp_name = _stage_json(path, data)
+        if tmp_name is not None:
+            staged.append((i, path, tmp_name))
+    if not staged:
+        return results
+    try:
+        _sync_barrier([t for _, _, t in staged])
+    except Exception as e:
+        log_model_issue(f"[flush_state] sync barrier failed, files left unchanged: {e}")
+        for _, _, tmp_name in staged:
+            try:
+                os.unlink(tmp_name)
+            except Exception:
+                pass
+        return results
+    dirs = set()
+    for i, path, tmp_name in staged:
+        try:
+            os.replace(tmp_name, path)
+            results[i] = True
+            dirs.add(str(path.parent))
+        except Exception as e:
+            log_model_issue(f"[save_json] Failed to save {path}: {e}")
+            try:
+                os.unlink(tmp_name)
+            except Exception:
+                pass
+    if durability_mode() != "os":
+        for d in dirs:
+            _fsync_dir(d)
+    return results
+
+
+# ------------------------------
+# Optional SQLite backend (paths.STATE_BACKEND, see utils/sqlite_state.py)
+# ------------------------------
+
+_BACKEND: Any = None
+_BACKEND_READY = False
+
+
+def state_backend() -> Optional[Any]:
+    """The SQLite state backend if enabled (ORRIN_STATE_BACKEND=sqlite), else None."""
+    global _BACKEND, _BACKEND_READY
+    if not _BACKEND_READY:
+        _BACKEND_READY = True
+        try:
+            import paths
+            if paths.STATE_BACKEND == "sqlite":
+                from utils.sqlite_state import SQLiteState
+                _BACKEND = SQLiteState(
+                    paths.STATE_DB_FILE, root=paths.DATA_DIR, row_paths=paths.ROW_STATE_FILES,
+                    encode=lambda o: dumps_json(o, pretty=False).decode("utf-8"),
+                )
+            elif paths.STATE_BACKEND != "json":
+                log_model_issue(f"[json_utils] Unknown ORRIN_STATE_BACKEND={paths.STATE_BACKEND!r}; using json files.")
+        except Exception as e:
+            log_model_issue(f"[json_utils] SQLite state backend unavailable, using json files: {e}")
+            _BACKEND = None
+    return _BACKEND
+
+
+def set_state_backend(backend: Optional[Any]) -> None:
+    """Swap the state backend (None = json files). Drops everything cached."""
+    global _BACKEND, _BACKEND_READY
+    flush_state()
+    STATE_STORE.invalidate()
+    _BACKEND, _BACKEND_READY = backend, True
+
+
+def _backend_for(path: Union[str, Path]) -> Optional[Any]:
+    backend = state_backend()
+    return backend if backend is not None and backend.handles(path) else None
+
+
+def _write_state(path: Path, data: Any) -> bool:
+    backend = _backend_for(path)
+    if backend is not None:
+        return backend.save(path, data)
+    return _write_json_atomic(path, data, native=True)
+
+
+def _state_signature(path: Union[str, Path]):
+    backend = _backend_for(path)
+    return backend.signature() if backend is not None else file_signature(path)
+
+
+# Process-wide parsed-state cache behind load_json/save_json (see utils/state_store.py)
+STATE_STORE = StateStore(writer=_write_state, signer=_state_signature)
+
+# Paths whose storage is not a single JSON document (e.g. the long-memory log).
+# An adapter provides load(default_type) / save(data) and optionally flush().
+_ADAPTERS: dict = {}
+
+
+def register_adapter(filepath: Union[str, Path], adapter: Any) -> None:
+    """Route load_json/save_json for `filepath` to `adapter` instead of the JSON file."""
+    _ADAPTERS[STATE_STORE.key(filepath)] = adapter
+
+
+def get_adapter(filepath: Union[str, Path]) -> Optional[Any]:
+    return _ADAPTERS.get(STATE_STORE.key(filepath)) if _ADAPTERS else None
+
+
+def _to_native(data: Any) -> Any:
+    """Private JSON-native snapshot of `data`, exactly as it would read back from disk."""
+    try:
+        return clone_json(data)
+    except NotJSONNative:
+        # Sets, datetimes, int keys, numpy scalars...: let the serializer decide
+        return json.loads(json.dumps(data, ensure_ascii=False, default=_json_default))
+
+
+def save_json(filepath: Union[str, Path], data: Any) -> None:
+    """
+    Save JSON through the state store.
+    - Default: written through immediately (atomic temp file + fsync + rename).
+    - Write-back mode (see set_write_back): buffered in memory until flush_state().
+    """
+    adapter = get_adapter(filepath)
+    if adapter is not None:
+        try:
+            adapter.save(data)
+        except Exception as e:
+            log_model_issue(f"[save_json] Failed to save {filepath}: {e}")
+        return
+    path = Path(filepath)
+    if not path.is_file() and path.exists():
+        # Devices/FIFOs (e.g. /dev/null) are never cached or buffered
+        _write_json_atomic(path, data)
+        return
+    try:
+        snapshot = _to_native(data)
+    except Exception as e:
+        log_model_issue(f"[save_json] Failed to save {filepath}: {e}")
+        return
+    STATE_STORE.save(path, snapshot)
+
+
 def load_json(filepath: Union[str, Path], default_type: Callable[[], T] = dict) -> T:
     """
     Load JSON from file, returning default_type() on error or missing/empty file.
+    Parsed content is cached until the file's mtime/inode/size changes
+    (or, under the SQLite backend, until another process commits).
     """
     try:
+        adapter = get_adapter(filepath)
+        if adapter is not None:
+            return adapter.load(default_type)
+        hit, data = STATE_STORE.lookup(filepath)
+        if hit:
+            return data
         path = Path(filepath)
-        if not path.exists() or path.stat().st_size == 0:
+        found, data, sig = _read_stored(path)
+        if not found:
             return default_type()
-        with path.open("r", encoding="utf-8") as f:
-            return json.load(f)
+        STATE_STORE.remember(path, data, sig)
+        return clone_json(data)
     except Exception as e:
         log_model_issue(f"[load_json] Failed to load {filepath}: {e}")
         return default_type()
 
 
+def _read_stored(path: Path) -> tuple:
+    """(found, parsed data, signature) straight from the backend or the file, bypassing the cache."""
+    backend = _backend_for(path)
+    if backend is not None:
+        sig = backend.signature()
+        found, data = backend.load(path)
+        return found, data, sig
+    sig = file_signature(path)
+    if sig is None or sig[2] == 0:
+        return False, None, sig
+    return True, loads_json(path.read_bytes()), sig
+
+
+def load_tail(filepath: Union[str, Path], n: int) -> list:
+    """
+    Last `n` items of a list-shaped file. The SQLite backend and tail-aware adapters
+    (ring buffers) read only those rows.
+    """
+    if n <= 0:
+        return []
+    try:
+        adapter = get_adapter(filepath)
+        if adapter is not None and hasattr(adapter, "tail"):
+            return adapter.tail(n)
+        hit, data = STATE_STORE.lookup(filepath)
+        backend = None if hit else _backend_for(filepath)
+        if backend is not None and get_adapter(filepath) is None:
+            found, data = backend.tail(filepath, n)
+            return data if found else []
+        if not hit:
+            data = load_json(filepath, default_type=list)
+        return data[-n:] if isinstance(data, list) else []
+    except Exception as e:
+        log_model_issue(f"[load_tail] Failed to load {filepath}: {e}")
+        return []
+
+
+def append_json(filepath: Union[str, Path], item: Any) -> None:
+    """
+    Append one item to a list-shaped file without loading, copying and re-saving the list:
+    - adapters with append() (JSONL logs, rings, the long-memory log) write one record
+    - otherwise the state store extends its cached list in place, buffered under
+      write-back (one write per flush) or written through
+    Adapters without append() fall back to load + save.
+    """
+    try:
+        adapter = get_adapter(filepath)
+        if adapter is not None:
+            if hasattr(adapter, "append"):
+                adapter.append(item)
+            else:
+                data = adapter.load(list)
+                adapter.save((data if isinstance(data, list) else []) + [item])
+            return
+        path = Path(filepath)
+
+        def _load() -> list:
+            found, data, _ = _read_stored(path)
+            return data if found else []
+
+        if not STATE_STORE.append(path, _to_native(item), _load):
+            log_model_issue(f"[append_json] {filepath} does not contain a list; left unchanged")
+    except Exception as e:
+        log_model_issue(f"[append_json] Failed to append to {filepath}: {e}")
+
+
+# Stores that keep state outside STATE_STORE (resident working memory, rings, the
+# long-memory log, the cold archive, embedding stores, the consolidation queue) take part
+# in StateTransaction through optional hooks, called on the transaction's thread:
+#   begin()     the transaction starts (everything before it has been flushed)
+#   commit()    its buffered files were written
+#   rollback()  they were discarded: undo what this thread changed since begin()
+_PARTICIPANTS: "weakref.WeakSet" = weakref.WeakSet()
+_TXN_OWNER: Optional[int] = None   # thread id of the open StateTransaction
+
+
+def join_transactions(store: Any) -> None:
+    """Have StateTransaction call `store`'s begin/commit/rollback hooks (held weakly)."""
+    _PARTICIPANTS.add(store)
+
+
+def in_transaction() -> bool:
+    """True on the thread that has a StateTransaction open."""
+    return _TXN_OWNER is not None and _TXN_OWNER == threading.get_ident()
+
+
+def _call_hooks(name: str) -> None:
+    for store in list(_PARTICIPANTS):
+        hook = getattr(store, name, None)
+        if not callable(hook):
+            continue
+        try:
+            hook()
+        except Exception as e:
+            log_model_issue(f"[StateTransaction] {type(store).__name__}.{name}() failed: {e}")
+
+
+def set_write_back(enabled: bool) -> None:
+    """Buffer this thread's save_json calls in memory (True) or write them through (False, default)."""
+    if not enabled:
+        flush_state()
+    STATE_STORE.write_back = bool(enabled)
+
+
+def flush_state() -> int:
+    """Write all buffered save_json calls to disk. Returns the number of files written."""
+    for adapter in list(_ADAPTERS.values()):
+        try:
+            flush = getattr(adapter, "flush", None)
+            if callable(flush):
+                flush()
+        except Exception as e:
+            log_model_issue(f"[flush_state] Adapter flush failed: {e}")
+    try:
+        # Under the SQLite backend everything buffered this cycle lands in one commit
+        backend = state_backend()
+        return STATE_STORE.flush(
+            batch=backend.transaction if backend is not None else nullcontext,
+            group_writer=_write_json_group,
+        )
+    except Exception as e:
+        log_model_issue(f"[flush_state] Flush failed: {e}")
+        return 0
+
+
+# Never lose buffered state on a normal interpreter exit
+atexit.register(flush_state)
+
+
+class StateTransaction:
+    """
+    Scope for one unit of work (e.g. a cognition cycle):
+
+        with StateTransaction():
+            ...  # every save_json is buffered; repeated saves of a path keep only the last
+
+    On a clean exit all buffered files are committed together (see flush_state: one sync
+    barrier, or one SQLite transaction). KeyboardInterrupt/SystemExit count as a clean
+    exit, so a stop keeps everything the cycle wrote. If the body raises an Exception,
+    the buffered files are discarded and every participating store (join_transactions)
+    undoes what this thread did to it, so working memory, rings, the long-memory log and
+    the consolidation queue match the JSON files again. Nested scopes join the outer one.
+    Only the opening thread's saves are buffered: other threads (the consolidation worker)
+    write through, so their work survives a rollback.
+    Logs (append_jsonl, the chat log, utils/durability.py streams) are not rolled back.
+    """
+
+    def __init__(self) -> None:
+        self.outer = False
+        self.committed = 0
+        self.discarded = 0
+
+    def __enter__(self) -> "StateTransaction":
+        global _TXN_OWNER
+        # Nested scopes join the outer one; a scope opened on another thread while one is
+        # open writes through (write-back belongs to the thread that opened it)
+        if STATE_STORE.write_back_thread is None:
+            flush_state()  # anything written before the scope is not ours to roll back
+            STATE_STORE.write_back = True
+            _TXN_OWNER = threading.get_ident()
+            self.outer = True
+            _call_hooks("begin")
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if not self.outer:
+            return False
+        try:
+            if exc_type is None or not issubclass(exc_type, Exception):
+                self.committed = flush_state()
+                self._close()
+                _call_hooks("commit")
+            else:
+                self.discarded = STATE_STORE.discard()
+                self._close()   # the undo below is written straight through
+                _call_hooks("rollback")
+                log_model_issue(f"[StateTransaction] rolled back {self.discarded} buffered file(s) after {exc_type.__name__}")
+        finally:
+            self._close()
+        return False
+
+    @staticmethod
+    def _close() -> None:
+        global _TXN_OWNER
+        STATE_STORE.write_back = False
+        _TXN_OWNER = None
+
+
 def append_jsonl(filepath: Union[str, Path], obj: Any) -> None:
     """
     Append one JSON-serialized line to a .jsonl file.
     - Ensures parent directory exists.
     - Uses advisory flock on Unix to avoid interleaved writes.
-    - fsyncs to reduce data loss on crash.
+    - fsyncs to reduce data loss on crash (now, or batched by the background flusher,
+      per the utils/durability.py policy).
     """
     try:
+        backend = _backend_for(filepath)
+        if backend is not None:
+            STATE_STORE.invalidate(filepath)
+            backend.append(filepath, obj)
+            return
         path = Path(filepath)
         path.parent.mkdir(parents=True, exist_ok=True)
-        line = json.dumps(obj, ensure_ascii=False, default=_json_default) + "\n"
+        line = dumps_json(obj, pretty=False) + b"\n"
 
         # Open in append mode; create if missing
-        with open(path, "a", encoding="utf-8") as f:
+        with open(path, "ab") as f:
             if fcntl is not None and platform.system() != "Windows":
                 try:
                     fcntl.flock(f, fcntl.LOCK_EX)  # type: ignore[name-defined]
                 except Exception:
                     pass  # don't fail logging if flock not available
             f.write(line)
-            f.flush()
             try:
-                os.fsync(f.fileno())
+                sync_file(f, path)
             except Exception:
                 pass
             if fcntl is not None and platform.system() != "Windows":
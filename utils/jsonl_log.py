@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from utils.durability import sync_before_replace, sync_file, sync_replaced
+from utils.json_utils import dumps_json, get_adapter, loads_json, register_adapter
+from utils.log import log_error, log_model_issue
+
+# Unbounded list files (the chat log) kept as append-only JSONL instead of a JSON array
+# rewritten on every message:
+#   <stem>.jsonl   one record per line, appended in place
+# The byte offset of every line is indexed in memory (one scan on open), so appends,
+# tails and reads from a position never touch the rest of the file. Dropping an
+# already-processed prefix (drop_before) is the only rewrite.
+
+
+def _line_offsets(data: bytes) -> List[int]:
+    offsets = []
+    start = 0
+    while True:
+        end = data.find(b"\n", start)
+        if end < 0:
+            return offsets
+        offsets.append(start)
+        start = end + 1
+
+
+class JsonlLog:
+    """Append-only list of records for one (former JSON array) file, indexed by line."""
+
+    def __init__(self, json_path: Union[str, Path]) -> None:
+        base = Path(json_path)
+        self.json_path = base
+        self.path = base.with_suffix(".jsonl")
+        self._lock = threading.Lock()
+        self._offsets: List[int] = []
+        self._end = 0
+        self._scan()
+        if not self._offsets and base.is_file() and base != self.path:
+            self._migrate()
+
+    def _scan(self) -> None:
+        """Index line starts; a torn final line (crash mid-append) is cut off."""
+        try:
+            with open(self.path, "rb+") as f:
+                data = f.read()
+                end = data.rfind(b"\n") + 1
+                if end != len(data):
+                    f.truncate(end)
+        except FileNotFoundError:
+            data, end = b"", 0
+        self._offsets = _line_offsets(data[:end])
+        self._end = end
+
+    def _migrate(self) -> None:
+        """Import the old JSON array once, then move it aside."""
+        try:
+            data = loads_json(self.json_path.read_bytes()) if self.json_path.stat().st_size else []
+        except (OSError, ValueError) as e:
+            log_model_issue(f"[jsonl_log] could not read {self.json_path}: {e}")
+            return
+        if not isinstance(data, list):
+            log_model_issue(f"[jsonl_log] {self.json_path} is not a list; starting empty")
+            data = []
+        self.replace(data)
+        try:
+            os.replace(self.json_path, self.json_path.with_name(self.json_path.name + ".migrated"))
+        except OSError as e:
+            log_error(f"[jsonl_log] could not move {self.json_path} aside: {e}")
+
+    # ---- writes ----
+    def append(self, record: Any) -> None:
+        self.extend([record])
+
+    def extend(self, records: Iterable[Any]) -> None:
+        lines = [dumps_json(r, pretty=False) + b"\n" for r in records]
+        if not lines:
+            return
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "ab") as f:
+                f.write(b"".join(lines))
+                sync_file(f, self.path)
+            for line in lines:
+                self._offsets.append(self._end)
+                self._end += len(line)
+
+    def replace(self, records: List[Any]) -> None:
+        """Rewrite the whole file with `records`."""
+        data = b"".join(dumps_json(r, pretty=False) + b"\n" for r in records)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp, "wb") as f:
+                f.write(data)
+                sync_before_replace(f)
+            os.replace(tmp, self.path)
+            sync_replaced(self.path)
+            self._offsets = _line_offsets(data)
+            self._end = len(data)
+
+    def drop_before(self, index: int) -> int:
+        """Drop the first `index` records (e.g. once they were summarized). Returns how many."""
+        index = min(max(0, int(index)), len(self))
+        if index:
+            self.replace(self.read(index))
+        return index
+
+    # ---- reads ----
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def read(self, start: int = 0, stop: Optional[int] = None) -> List[Any]:
+        """Records [start:stop), reading only their bytes."""
+        with self._lock:
+            start, stop, _ = slice(start, stop).indices(len(self._offsets))
+            if start >= stop:
+                return []
+            end = self._offsets[stop] if stop < len(self._offsets) else self._end
+            try:
+                with open(self.path, "rb") as f:
+                    f.seek(self._offsets[start])
+                    data = f.read(end - self._offsets[start])
+            except FileNotFoundError:
+                return []
+        out = []
+        for line in data.splitlines():
+            try:
+                out.append(loads_json(line))
+            except ValueError:
+                continue
+        return out
+
+    def tail(self, n: int) -> List[Any]:
+        """The newest `n` records, oldest first."""
+        return self.read(max(0, len(self) - max(0, int(n)))) if n > 0 else []
+
+    def load_all(self) -> List[Any]:
+        return self.read()
+
+
+_LOGS: Dict[str, JsonlLog] = {}
+_LOGS_LOCK = threading.Lock()
+
+
+class _JsonView:
+    """Lets existing load_json/save_json/append_json callers keep treating the log as a list file."""
+
+    def __init__(self, json_path: Union[str, Path]) -> None:
+        self.json_path = json_path
+
+    def load(self, default_type: type = list) -> List[Any]:
+        return jsonl_log_for(self.json_path).load_all()
+
+    def tail(self, n: int) -> List[Any]:
+        return jsonl_log_for(self.json_path).tail(n)
+
+    def append(self, record: Any) -> None:
+        jsonl_log_for(self.json_path).append(record)
+
+    def save(self, data: Any) -> None:
+        if not isinstance(data, list):
+            log_error(f"[jsonl_log] refusing to save non-list data to {self.json_path}")
+            return
+        jsonl_log_for(self.json_path).replace(data)
+
+
+def register_jsonl_log(json_path: Union[str, Path]) -> None:
+    """Route load_json/save_json for `json_path` through its JSONL log (idempotent, opens nothing)."""
+    if get_adapter(json_path) is None:
+        register_adapter(json_path, _JsonView(json_path))
+
+
+def jsonl_log_for(json_path: Union[str, Path]) -> JsonlLog:
+    """The (process-wide) JsonlLog that replaces `json_path`."""
+    key = os.path.abspath(os.fspath(json_path))
+    with _LOGS_LOCK:
+        log = _LOGS.get(key)
+        # Re-open if the files were removed (e.g. temp dirs) or a legacy file appeared
+        if log is None or (len(log) and not log.path.parent.is_dir()) or (
+                not len(log) and Path(key).is_file()):
+            log = JsonlLog(key)
+            _LOGS[key] = log
+    register_jsonl_log(key)
+    return log
@@ -1,7 +1,13 @@
 import numpy as np
 from typing import Any, Dict, List, Sequence, Optional, Tuple
-from utils.json_utils import load_json, save_json
+from utils.json_utils import load_json
 from utils.embedder import get_embedding
+from memory.embedding_store import store_for
+from memory.ann_index import ANN_CANDIDATES, index_for
+from memory.cold_store import COLD_RECALL_THRESHOLD, cold_for
+from memory.long_store import long_log_for
+from memory.topics import topics_for
+from memory.working_store import working_memory_for
 from paths import KNOWLEDGE, WORKING_MEMORY_FILE, LONG_MEMORY_FILE
 
 def cosine_similarity(vec1: np.ndarray, vec2: np.ndarray) -> float:
@@ -20,6 +26,118 @@ def _to_1d(v: Any) -> np.ndarray:
         a = a[0]
     return a.ravel()
 
+def _num(v: Any, default: float) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return default
+
+def _similarities(
+    context_emb: np.ndarray,
+    sources: List[Tuple[str, Dict[str, Any]]],
+) -> np.ndarray:
+    """
+    Cosine similarity of every candidate in one pass (matmul against unit-normalized rows).
+    Vectors of a different dimension (or missing) score 0 similarity.
+    """
+    n = len(sources)
+    sims = np.zeros(n, dtype=np.float64)
+    q = np.asarray(context_emb, dtype=np.float32).ravel()
+    q_norm = float(np.linalg.norm(q))
+    if n and q_norm > 0.0:
+        q = q / q_norm
+        stores = {
+            "working": store_for(WORKING_MEMORY_FILE),
+            "long": store_for(LONG_MEMORY_FILE),
+            "cold": store_for(cold_for(LONG_MEMORY_FILE).vector_path),
+        }
+        by_store: Dict[str, Tuple[List[int], List[int]]] = {src: ([], []) for src in stores}
+        inline_idx: List[int] = []
+        inline_vecs: List[np.ndarray] = []
+
+        for i, (src, m) in enumerate(sources):
+            store = stores.get(src)
+            if store is not None and "embedding" not in m:
+                mid = str(m.get("id"))
+                r = m.get("embedding_row")
+                if not (isinstance(r, int) and 0 <= r < len(store.ids) and store.ids[r] == mid):
+                    r = store.row_of(mid)
+                if r is not None:
+                    idx, rows = by_store[src]
+                    idx.append(i)
+                    rows.append(r)
+            else:
+                v = _to_1d(m.get("embedding", []))
+                if v.size == q.size:
+                    inline_idx.append(i)
+                    inline_vecs.append(v)
+
+        # Sidecar-backed rows: one gather + matmul per store (rows are cached pre-normalized)
+        for src, (idx, rows) in by_store.items():
+            if idx and stores[src].dim == q.size:
+                sims[idx] = stores[src].normalized()[np.asarray(rows)] @ q
+
+        # Inline vectors (knowledge base, legacy rows): stack, normalize, one matmul
+        if inline_idx:
+            mat = np.vstack(inline_vecs).astype(np.float32, copy=False)
+            norms = np.linalg.norm(mat, axis=1)
+            dots = mat @ q
+            sims[inline_idx] = np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
+    return sims
+
+def _score_sources(
+    context_emb: np.ndarray,
+    sources: List[Tuple[str, Dict[str, Any]]],
+    sims: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Score every candidate: cosine similarity (see _similarities) plus
+    0.15*importance + 0.10*priority + 0.07*recall_count.
+    """
+    n = len(sources)
+    if sims is None:
+        sims = _similarities(context_emb, sources)
+    importance = np.fromiter((_num(m.get("importance", 1), 1.0) for _, m in sources), dtype=np.float64, count=n)
+    priority = np.fromiter((_num(m.get("priority", 1), 1.0) for _, m in sources), dtype=np.float64, count=n)
+    recalls = np.fromiter((_num(m.get("recall_count", 0), 0.0) for _, m in sources), dtype=np.float64, count=n)
+
+    # lightweight scoring; drop constant time_bonus (or compute from timestamp if desired)
+    return sims + 0.15 * importance + 0.10 * priority + 0.07 * recalls
+
+def _top_k(scores: np.ndarray, k: int) -> List[int]:
+    """
+    Indices of the k best scores, best first; ties keep input order (same as a stable sort).
+    argpartition narrows the candidates so only ~k items are ever sorted.
+    """
+    n = int(scores.size)
+    k = min(max(0, int(k)), n)
+    if k == 0:
+        return []
+    if k < n:
+        part = np.argpartition(-scores, k - 1)[:k]
+        cand = np.flatnonzero(scores >= scores[part].min())  # keep boundary ties in order
+    else:
+        cand = np.arange(n)
+    order = cand[np.argsort(-scores[cand], kind="stable")]
+    return order[:k].tolist()
+
+def _ann_shortlist(context_emb: np.ndarray, max_items: int) -> Optional[set]:
+    """
+    Candidate long-memory ids from the ANN index or, on stores too small for it, the
+    members of the nearest topic clusters; None to score everything exactly.
+    """
+    try:
+        q = np.asarray(context_emb, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(q))
+        if norm == 0.0:
+            return None
+        ids = index_for(LONG_MEMORY_FILE).search_ids(q / norm, k=max(ANN_CANDIDATES, 8 * int(max_items)))
+        if ids is None:
+            ids = topics_for(LONG_MEMORY_FILE).search_ids(q / norm)
+        return None if ids is None else set(ids)
+    except Exception:
+        return None
+
 def recall_relevant_knowledge(
     context: Any = "",
     long_memory: Optional[List[Dict[str, Any]]] = None,
@@ -28,7 +146,9 @@ def recall_relevant_knowledge(
 ) -> List[Dict[str, Any]]:
     """
     Return the most relevant memories (knowledge, working, long), sorted by semantic similarity to `context`.
-    Increments `recall_count` on retrieved memories (and persists updates for working/long memories).
+    The cold archive is searched too when no working/long memory reaches COLD_RECALL_THRESHOLD.
+    Increments `recall_count` on retrieved memories; working/long memory persist the
+    increments with their next flush instead of rewriting both files per recall.
     """
     if not context:
         return []
@@ -59,56 +179,72 @@ def recall_relevant_knowledge(
         if isinstance(working_memory, list) else
         load_json(WORKING_MEMORY_FILE, default_type=list)
     )
-    lm_list: List[Dict[str, Any]] = (
-        long_memory
-        if isinstance(long_memory, list) else
-        load_json(LONG_MEMORY_FILE, default_type=list)
-    )
+    # Very large long memory: the ANN index shortlists rows; only those get the full score,
+    # and only those are read from the log when the caller didn't pass a list
+    shortlist = _ann_shortlist(context_emb, max_items)
+    if isinstance(long_memory, list):
+        lm_list: List[Dict[str, Any]] = long_memory
+    elif shortlist is not None:
+        lm_list = long_log_for(LONG_MEMORY_FILE).get_many(sorted(shortlist))
+    else:
+        lm_list = load_json(LONG_MEMORY_FILE, default_type=list)
 
     sources: List[Tuple[str, Dict[str, Any]]] = []
     for m in kb:
         if isinstance(m, dict) and "embedding" in m:
             sources.append(("knowledge", m))
     for m in wm_list:
-        if isinstance(m, dict) and "embedding" in m:
+        if isinstance(m, dict) and ("embedding" in m or "embedding_row" in m):
             sources.append(("working", m))
     for m in lm_list:
-        if isinstance(m, dict) and "embedding" in m:
-            sources.append(("long", m))
+        if isinstance(m, dict) and ("embedding" in m or "embedding_row" in m):
+            if shortlist is None or "embedding" in m or str(m.get("id")) in shortlist:
+                sources.append(("long", m))
 
-    results: List[Tuple[float, Dict[str, Any], str]] = []
-    for src_name, m in sources:
-        emb = _to_1d(m.get("embedding", []))
-        sim = cosine_similarity(context_emb, emb) if emb.size else 0.0
+    sims = _similarities(context_emb, sources)
 
-        importance = float(m.get("importance", 1))
-        priority = float(m.get("priority", 1))
-        recall_count = float(m.get("recall_count", 0))
-
-        # lightweight scoring; drop constant time_bonus (or compute from timestamp if desired)
-        score = sim + 0.15 * importance + 0.10 * priority + 0.07 * recall_count
-        results.append((score, m, src_name))
+    # Cold tier: archived long memories are only searched when nothing in working or
+    # long memory is similar enough
+    warm = [i for i, (src, _) in enumerate(sources) if src in ("working", "long")]
+    if not warm or float(sims[warm].max()) < COLD_RECALL_THRESHOLD:
+        try:
+            cold = [("cold", m) for _, m in cold_for(LONG_MEMORY_FILE).search(context_emb, max_items)]
+        except Exception:
+            cold = []
+        if cold:
+            sources += cold
+            sims = np.concatenate([sims, _similarities(context_emb, cold)])
 
-    results.sort(key=lambda x: x[0], reverse=True)
-    selected = results[: max(0, int(max_items))]
+    scores = _score_sources(context_emb, sources, sims)
+    selected = [(float(scores[i]), sources[i][1], sources[i][0]) for i in _top_k(scores, max_items)]
 
-    # Increment recall_count on selected and persist where applicable
-    wm_updated = False
-    lm_updated = False
+    # Increment recall_count on selected; the stores keep the increments as pending
+    # counters (merged on read, written at flush) so a recall rewrites nothing
+    recalled: Dict[str, List[str]] = {"working": [], "long": []}
+    rewarm: List[Dict[str, Any]] = []
     for _, m, src in selected:
         try:
             m["recall_count"] = int(m.get("recall_count", 0)) + 1
-            if src == "working":
-                wm_updated = True
-            elif src == "long":
-                lm_updated = True
+            if src in recalled and m.get("id") is not None:
+                recalled[src].append(str(m["id"]))
+            elif src == "cold":
+                rewarm.append(m)
         except Exception:
             # keep going even if a record is oddly shaped
             continue
+    if recalled["working"]:
+        working_memory_for(WORKING_MEMORY_FILE).bump_recall(recalled["working"])
+    if recalled["long"]:
+        long_log_for(LONG_MEMORY_FILE).bump_recall(recalled["long"])
 
-    if wm_updated:
-        save_json(WORKING_MEMORY_FILE, wm_list)
-    if lm_updated:
-        save_json(LONG_MEMORY_FILE, lm_list)
+    # Recalled cold entries move back into long memory (pruning demotes them again if needed)
+    if rewarm:
+        counts = {str(m.get("id")): m["recall_count"] for m in rewarm}
+        warmed = cold_for(LONG_MEMORY_FILE).take(counts)
+        for entry in warmed:
+            entry["recall_count"] = counts[str(entry.get("id"))]
+        if warmed:
+            long_log_for(LONG_MEMORY_FILE).extend([dict(e) for e in warmed])
+            index_for(LONG_MEMORY_FILE).sync()
 
     return [m for _, m, _ in selected]
\ No newline at end of file
@@ -5,6 +5,7 @@ from pathlib import Path
 from typing import List, Union, Dict, Any
 
 from paths import ERROR_FILE, MODEL_FAILURE, ACTIVITY_LOG, PRIVATE_THOUGHTS_FILE
+from utils.durability import append_stream
 
 # --- helpers ---
 def _ts() -> str:
@@ -16,6 +17,9 @@ def _append_line(p: Path, line: str) -> None:
         f.write(line)
 
 # --- writers ---
+# Errors and private thoughts are written inline (errors must survive a crash, and other
+# modules append to the private thoughts file directly); the activity log is a
+# non-critical stream buffered by utils/durability.py.
 def log_error(content: Any) -> None:
     _append_line(ERROR_FILE, f"\n[{_ts()}] {str(content)}\n")
 
@@ -23,7 +27,7 @@ def log_model_issue(message: Any) -> None:
     _append_line(MODEL_FAILURE, f"[{_ts()}] {str(message)}\n")
 
 def log_activity(message: Any) -> None:
-    _append_line(ACTIVITY_LOG, f"[{_ts()}] {str(message)}\n")
+    append_stream(ACTIVITY_LOG, f"[{_ts()}] {str(message)}\n")
 
 def log_private(message: Any) -> None:
     _append_line(PRIVATE_THOUGHTS_FILE, f"[{_ts()}] {str(message)}\n")
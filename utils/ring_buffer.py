@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from paths import ATTENTION_HISTORY, COGNITION_HISTORY_FILE, REWARD_TRACE
+from utils.durability import sync_before_replace, sync_file, sync_replaced
+from utils.json_utils import (
+    dumps_json, get_adapter, in_transaction, join_transactions, loads_json, register_adapter,
+)
+from utils.log import log_error, log_model_issue
+
+# Capped histories kept as on-disk rings instead of JSON arrays rewritten on every event:
+#   <stem>.ring.jsonl     current generation, one record per line, appended in place
+#   <stem>.ring.1.jsonl   previous generation
+# When the current file holds `capacity` lines it becomes the previous generation and a
+# fresh file is started, so appends never rewrite anything and the newest `capacity`
+# records are always the tail of (previous + current). Tail reads walk the files
+# backwards and only touch the last k lines. Inside a StateTransaction, writes from its
+# thread are held in memory until it commits (flush) and dropped if it rolls back.
+
+RING_READ_BLOCK: int = 64 * 1024
+DEFAULT_RING_CAPACITY: int = 500
+
+# path -> capacity for the histories that are stored as rings
+RING_FILES: Dict[Path, int] = {
+    ATTENTION_HISTORY: 500,
+    REWARD_TRACE: 50,
+    COGNITION_HISTORY_FILE: 1000,
+}
+
+
+def _count_lines(path: Path) -> int:
+    """Complete lines in `path`; a torn final line (crash mid-append) is cut off."""
+    try:
+        with open(path, "rb+") as f:
+            data = f.read()
+            end = data.rfind(b"\n") + 1
+            if end != len(data):
+                f.truncate(end)
+            return data.count(b"\n", 0, end)
+    except FileNotFoundError:
+        return 0
+
+
+def _tail_lines(path: Path, k: int) -> List[bytes]:
+    """Last `k` lines of `path`, read backwards block by block."""
+    if k <= 0:
+        return []
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return []
+    with f:
+        pos = f.seek(0, os.SEEK_END)
+        buf = b""
+        while pos > 0 and buf.count(b"\n") <= k:
+            step = min(RING_READ_BLOCK, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+    lines = buf.splitlines()
+    return lines[-k:]
+
+
+class RingBuffer:
+    """The newest `capacity` records of one history file, with O(1) appends and O(k) tails."""
+
+    def __init__(self, json_path: Union[str, Path], capacity: int) -> None:
+        base = Path(json_path)
+        self.json_path = base
+        self.capacity = max(1, int(capacity))
+        self.path = base.with_name(f"{base.stem}.ring.jsonl")
+        self.prev_path = base.with_name(f"{base.stem}.ring.1.jsonl")
+        self._lock = threading.Lock()
+        self._count = _count_lines(self.path)
+        self._prev_count = _count_lines(self.prev_path)
+        self._pending: List[bytes] = []           # appends held for the open transaction
+        self._staged: Optional[List[bytes]] = None  # a replace held for it (the kept lines)
+        if not self._count and not self._prev_count and base.is_file():
+            self._migrate()
+        join_transactions(self)
+
+    # ---- writes ----
+    def append(self, record: Any) -> None:
+        self.extend([record])
+
+    def extend(self, records: Iterable[Any]) -> None:
+        lines = [dumps_json(r, pretty=False) + b"\n" for r in records]
+        if not lines:
+            return
+        with self._lock:
+            if in_transaction():
+                self._pending.extend(lines)
+                return
+            self._append(lines)
+
+    def _append(self, lines: List[bytes]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        while lines:
+            if self._count >= self.capacity:
+                self._rotate()
+            room = self.capacity - self._count
+            chunk, lines = lines[:room], lines[room:]
+            with open(self.path, "ab") as f:
+                f.write(b"".join(chunk))
+                sync_file(f, self.path)
+            self._count += len(chunk)
+
+    def replace(self, records: List[Any]) -> None:
+        """Rewrite the ring with `records` (for edits that touch every entry, e.g. decay)."""
+        keep = [dumps_json(r, pretty=False) + b"\n" for r in list(records)[-self.capacity:]]
+        with self._lock:
+            if in_transaction():
+                self._staged, self._pending = keep, []
+                return
+            self._rewrite(keep)
+
+    def _rewrite(self, keep: List[bytes]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(b"".join(keep))
+            sync_before_replace(f)
+        os.replace(tmp, self.path)
+        sync_replaced(self.path)
+        self._count = len(keep)
+        if self._prev_count:
+            self.prev_path.unlink(missing_ok=True)
+            self._prev_count = 0
+
+    def flush(self) -> None:
+        """Write what the open transaction held back (StateTransaction commit)."""
+        with self._lock:
+            staged, pending = self._staged, self._pending
+            self._staged, self._pending = None, []
+            if staged is not None:
+                self._rewrite(staged)
+            if pending:
+                self._append(pending)
+
+    def commit(self) -> None:
+        """StateTransaction hook: rings behind a _JsonView were flushed with the state files already."""
+        self.flush()
+
+    def rollback(self) -> None:
+        """StateTransaction hook: forget the held-back writes."""
+        with self._lock:
+            self._staged, self._pending = None, []
+
+    def _rotate(self) -> None:
+        os.replace(self.path, self.prev_path)
+        sync_replaced(self.prev_path)
+        self._prev_count, self._count = self._count, 0
+
+    def _migrate(self) -> None:
+        """Import the old JSON array once, then move it aside."""
+        try:
+            data = loads_json(self.json_path.read_bytes())
+        except (OSError, ValueError) as e:
+            log_model_issue(f"[ring_buffer] could not read {self.json_path}: {e}")
+            return
+        if not isinstance(data, list):
+            log_model_issue(f"[ring_buffer] {self.json_path} is not a list; starting empty")
+            data = []
+        self.replace(data)
+        try:
+            os.replace(self.json_path, self.json_path.with_name(self.json_path.name + ".migrated"))
+        except OSError as e:
+            log_error(f"[ring_buffer] could not move {self.json_path} aside: {e}")
+
+    # ---- reads ----
+    def __len__(self) -> int:
+        stored = len(self._staged) if self._staged is not None else self._count + self._prev_count
+        return min(self.capacity, stored + len(self._pending))
+
+    def tail(self, k: int) -> List[Any]:
+        """The newest `k` records, oldest first."""
+        k = min(max(0, int(k)), self.capacity)
+        with self._lock:
+            lines = self._pending[-k:] if k else []
+            need = k - len(lines)
+            if need and self._staged is not None:
+                lines = self._staged[-need:] + lines
+            elif need:
+                older = _tail_lines(self.path, need)
+                if len(older) < need:
+                    older = _tail_lines(self.prev_path, need - len(older)) + older
+                lines = older + lines
+        out = []
+        for line in lines:
+            try:
+                out.append(loads_json(line))
+            except ValueError:
+                continue
+        return out
+
+    def load_all(self) -> List[Any]:
+        return self.tail(self.capacity)
+
+
+_RINGS: Dict[str, RingBuffer] = {}
+_RINGS_LOCK = threading.Lock()
+
+
+class _JsonView:
+    """Lets existing load_json/save_json callers keep treating a ring as a list file."""
+
+    def __init__(self, json_path: Union[str, Path], capacity: int) -> None:
+        self.json_path = json_path
+        self.capacity = capacity
+
+    def load(self, default_type: type = list) -> List[Any]:
+        return ring_for(self.json_path).load_all()
+
+    def tail(self, n: int) -> List[Any]:
+        return ring_for(self.json_path).tail(n)
+
+    def append(self, record: Any) -> None:
+        ring_for(self.json_path).append(record)
+
+    def flush(self) -> None:
+        ring = _RINGS.get(os.path.abspath(os.fspath(self.json_path)))
+        if ring is not None:
+            ring.flush()
+
+    def save(self, data: Any) -> None:
+        if not isinstance(data, list):
+            log_error(f"[ring_buffer] refusing to save non-list data to {self.json_path}")
+            return
+        ring_for(self.json_path).replace(data)
+
+
+def register_ring(json_path: Union[str, Path], capacity: int) -> None:
+    """Route load_json/save_json for `json_path` through a ring (idempotent, opens nothing)."""
+    if get_adapter(json_path) is None:
+        register_adapter(json_path, _JsonView(json_path, capacity))
+
+
+def ring_for(json_path: Union[str, Path], capacity: Optional[int] = None) -> RingBuffer:
+    """The (process-wide) RingBuffer that replaces `json_path`."""
+    key = os.path.abspath(os.fspath(json_path))
+    if capacity is None:
+        capacity = getattr(get_adapter(key), "capacity", None) or next(
+            (c for p, c in RING_FILES.items() if os.path.abspath(p) == key), DEFAULT_RING_CAPACITY)
+    with _RINGS_LOCK:
+        ring = _RINGS.get(key)
+        # Re-open if the files were removed (e.g. temp dirs) or a legacy file appeared
+        if ring is None or (len(ring) and not ring.path.parent.is_dir()) or (
+                not len(ring) and Path(key).is_file()):
+            ring = RingBuffer(key, capacity)
+            _RINGS[key] = ring
+    register_ring(key, capacity)
+    return ring
@@ -0,0 +1,242 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+from utils.log import log_model_issue
+
+# Optional storage for load_json/save_json/append_jsonl (enable with ORRIN_STATE_BACKEND=sqlite).
+# Every .json/.jsonl path under the data dir becomes a key in one WAL-mode database:
+#   known(key, kind)          kind is "doc" (whole JSON value) or "rows" (one row per list item)
+#   docs(key, body)
+#   rows(key, seq, body)      list-shaped files: appends/trims only touch the changed rows
+# A path's old file is imported the first time the key is touched and then left alone.
+
+SQLITE_SYNCHRONOUS: str = "FULL"     # one fsync per commit; flush_state() commits once per cycle
+SQLITE_BUSY_TIMEOUT_S: float = 5.0
+
+_FIELD_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_MISSING = object()
+
+
+class SQLiteState:
+    """Key/row store standing in for the JSON files under `root`."""
+
+    def __init__(
+        self,
+        db_path: Union[str, Path],
+        root: Union[str, Path],
+        row_paths: Iterable[Union[str, Path]] = (),
+        encode: Callable[[Any], str] = json.dumps,
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.root = os.path.abspath(os.fspath(root))
+        self._encode = encode
+        self._row_keys = {k for k in (self.key(p) for p in row_paths) if k}
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._indexed: set = set()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(self.db_path), timeout=SQLITE_BUSY_TIMEOUT_S,
+            check_same_thread=False, isolation_level=None,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS known (key TEXT PRIMARY KEY, kind TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS docs (key TEXT PRIMARY KEY, body TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS rows (
+                key TEXT NOT NULL, seq INTEGER NOT NULL, body TEXT NOT NULL,
+                PRIMARY KEY (key, seq)
+            ) WITHOUT ROWID;
+            """
+        )
+
+    # ---- keys ----
+    def key(self, path: Union[str, Path]) -> Optional[str]:
+        p = os.path.abspath(os.fspath(path))
+        if not p.startswith(self.root + os.sep):
+            return None
+        return Path(os.path.relpath(p, self.root)).as_posix()
+
+    def handles(self, path: Union[str, Path]) -> bool:
+        return Path(path).suffix in (".json", ".jsonl") and self.key(path) is not None
+
+    def signature(self) -> Tuple[str, int]:
+        """Changes whenever another connection commits (so cached reads can be dropped)."""
+        with self._lock:
+            return ("sqlite", int(self._conn.execute("PRAGMA data_version").fetchone()[0]))
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """One atomic commit for everything written inside; nested calls are savepoints."""
+        with self._lock:
+            depth = self._depth
+            self._conn.execute("BEGIN IMMEDIATE" if depth == 0 else f"SAVEPOINT sp{depth}")
+            self._depth += 1
+            try:
+                yield
+            except BaseException:
+                self._depth -= 1
+                if depth == 0:
+                    self._conn.execute("ROLLBACK")
+                else:
+                    self._conn.execute(f"ROLLBACK TO sp{depth}")
+                    self._conn.execute(f"RELEASE sp{depth}")
+                raise
+            self._depth -= 1
+            self._conn.execute("COMMIT" if depth == 0 else f"RELEASE sp{depth}")
+
+    # ---- internals ----
+    def _kind(self, key: str, path: Union[str, Path]) -> Optional[str]:
+        row = self._conn.execute("SELECT kind FROM known WHERE key=?", (key,)).fetchone()
+        if row:
+            return row[0]
+        data = self._read_legacy(Path(path))
+        if data is _MISSING:
+            return None
+        with self.transaction():
+            return self._write(key, data)
+
+    def _read_legacy(self, path: Path) -> Any:
+        try:
+            if not path.is_file() or path.stat().st_size == 0:
+                return _MISSING
+            text = path.read_text(encoding="utf-8")
+            if path.suffix == ".jsonl":
+                out = []
+                for line in text.splitlines():
+                    try:
+                        out.append(json.loads(line))
+                    except ValueError:
+                        continue
+                return out
+            return json.loads(text)
+        except Exception as e:
+            log_model_issue(f"[sqlite_state] could not import {path}: {e}")
+            return _MISSING
+
+    def _is_rows(self, key: str, data: Any) -> bool:
+        return isinstance(data, list) and (key in self._row_keys or key.endswith(".jsonl"))
+
+    def _write(self, key: str, data: Any) -> str:
+        if self._is_rows(key, data):
+            self._write_rows(key, [self._encode(x) for x in data])
+            self._conn.execute("DELETE FROM docs WHERE key=?", (key,))
+            kind = "rows"
+        else:
+            self._conn.execute("INSERT OR REPLACE INTO docs (key, body) VALUES (?, ?)", (key, self._encode(data)))
+            self._conn.execute("DELETE FROM rows WHERE key=?", (key,))
+            kind = "doc"
+        self._conn.execute("INSERT OR REPLACE INTO known (key, kind) VALUES (?, ?)", (key, kind))
+        return kind
+
+    def _write_rows(self, key: str, bodies: List[str]) -> None:
+        """
+        Replace a key's rows with `bodies`, touching only what changed. Lines the old rows up
+        with the new list (front trims + appends, the usual history-file edit) and rewrites
+        everything only when nothing matches.
+        """
+        old = self._conn.execute("SELECT seq, body FROM rows WHERE key=? ORDER BY seq", (key,)).fetchall()
+        k = 0
+        if old and bodies and old[0][1] != bodies[0]:
+            k = next((i for i, (_, b) in enumerate(old) if b == bodies[0]), len(old))
+        elif old and not bodies:
+            k = len(old)
+        p = 0
+        while k + p < len(old) and p < len(bodies) and old[k + p][1] == bodies[p]:
+            p += 1
+
+        if k >= len(old) and old:
+            self._conn.execute("DELETE FROM rows WHERE key=?", (key,))
+        elif k:
+            self._conn.execute("DELETE FROM rows WHERE key=? AND seq<?", (key, old[k][0]))
+        if k + p < len(old):
+            self._conn.execute("DELETE FROM rows WHERE key=? AND seq>=?", (key, old[k + p][0]))
+        seq = old[k + p - 1][0] + 1 if p else (old[-1][0] + 1 if old else 0)
+        self._conn.executemany(
+            "INSERT INTO rows (key, seq, body) VALUES (?, ?, ?)",
+            ((key, seq + i, b) for i, b in enumerate(bodies[p:])),
+        )
+
+    # ---- API used by utils/json_utils.py ----
+    def load(self, path: Union[str, Path]) -> Tuple[bool, Any]:
+        key = self.key(path)
+        with self._lock:
+            kind = self._kind(key, path)
+            if kind == "rows":
+                cur = self._conn.execute("SELECT body FROM rows WHERE key=? ORDER BY seq", (key,))
+                return True, [json.loads(b) for (b,) in cur]
+            row = self._conn.execute("SELECT body FROM docs WHERE key=?", (key,)).fetchone()
+            return (True, json.loads(row[0])) if row else (False, None)
+
+    def save(self, path: Union[str, Path], data: Any) -> bool:
+        try:
+            with self.transaction():
+                self._write(self.key(path), data)
+            return True
+        except Exception as e:
+            log_model_issue(f"[sqlite_state] Failed to save {path}: {e}")
+            return False
+
+    def append(self, path: Union[str, Path], obj: Any) -> bool:
+        key = self.key(path)
+        try:
+            with self.transaction():
+                kind = self._kind(key, path)
+                if kind == "doc":
+                    _, data = self.load(path)
+                    self._write(key, (data if isinstance(data, list) else [data]) + [obj])
+                    return True
+                self._conn.execute(
+                    "INSERT INTO rows (key, seq, body) "
+                    "SELECT ?, COALESCE(MAX(seq) + 1, 0), ? FROM rows WHERE key=?",
+                    (key, self._encode(obj), key),
+                )
+                self._conn.execute("INSERT OR REPLACE INTO known (key, kind) VALUES (?, 'rows')", (key,))
+            return True
+        except Exception as e:
+            log_model_issue(f"[sqlite_state] Failed to append to {path}: {e}")
+            return False
+
+    def tail(self, path: Union[str, Path], n: int) -> Tuple[bool, List[Any]]:
+        """Last `n` items of a list-shaped key without reading the rest."""
+        key = self.key(path)
+        with self._lock:
+            kind = self._kind(key, path)
+            if kind != "rows":
+                found, data = self.load(path)
+                return found, (data[-n:] if isinstance(data, list) and n > 0 else [])
+            cur = self._conn.execute(
+                "SELECT body FROM rows WHERE key=? ORDER BY seq DESC LIMIT ?", (key, max(0, int(n))))
+            return True, [json.loads(b) for (b,) in cur][::-1]
+
+    def query(self, path: Union[str, Path], field: str, value: Any, limit: Optional[int] = None) -> List[Any]:
+        """Rows of a list-shaped key whose top-level `field` equals `value` (expression-indexed)."""
+        if not _FIELD_RE.match(field):
+            raise ValueError(f"invalid field name: {field!r}")
+        key = self.key(path)
+        with self._lock:
+            self._kind(key, path)
+            if field not in self._indexed:
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS rows_by_{field} "
+                    f"ON rows (key, json_extract(body, '$.{field}'))")
+                self._indexed.add(field)
+            sql = f"SELECT body FROM rows WHERE key=? AND json_extract(body, '$.{field}')=? ORDER BY seq"
+            args: tuple = (key, value)
+            if limit is not None:
+                sql += " LIMIT ?"
+                args += (int(limit),)
+            return [json.loads(b) for (b,) in self._conn.execute(sql, args)]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
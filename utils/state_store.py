@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import os
+import threading
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Dict, List, Optional, Tuple, Union
+
+# ------------------------------
+# Process-wide parsed-state cache
+# ------------------------------
+# load_json/save_json in utils.json_utils sit on top of this store:
+#   - reads are served from memory while the file's (mtime, inode, size) is unchanged
+#   - with write-back enabled, saves are buffered and written once by flush()
+#   - callers always get a private copy, so mutating a loaded object never leaks into the cache
+
+Signature = Tuple[Any, ...]  # (mtime_ns, inode, size) for files
+
+_SCALAR_TYPES = frozenset({str, int, float, bool, type(None)})
+
+
+class NotJSONNative(TypeError):
+    """Raised by clone_json when a value would be changed by a JSON round trip."""
+
+
+def clone_json(obj: Any) -> Any:
+    """
+    Deep-copy a JSON-native structure (dict/list/tuple of str/int/float/bool/None).
+    Much cheaper than re-parsing; raises NotJSONNative for anything json.dump would coerce.
+    """
+    t = type(obj)
+    if t in _SCALAR_TYPES:
+        return obj
+    if t is dict:
+        out = {}
+        for k, v in obj.items():
+            if type(k) is not str:
+                raise NotJSONNative(f"non-string key {k!r}")
+            out[k] = v if type(v) in _SCALAR_TYPES else clone_json(v)
+        return out
+    if t is list or t is tuple:
+        return [v if type(v) in _SCALAR_TYPES else clone_json(v) for v in obj]
+    raise NotJSONNative(f"unsupported type {t.__name__}")
+
+
+def file_signature(path: Union[str, Path]) -> Optional[Signature]:
+    """(mtime_ns, inode, size) for an existing file, else None."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+
+class _Entry:
+    __slots__ = ("data", "signature", "dirty")
+
+    def __init__(self, data: Any, signature: Optional[Signature], dirty: bool = False) -> None:
+        self.data = data
+        self.signature = signature
+        self.dirty = dirty
+
+
+class StateStore:
+    """
+    In-memory cache of parsed JSON files keyed by absolute path.
+
+    `writer(path, data)` performs the real (atomic) write and is only called for
+    write-through saves and on flush(). `signer(path)` fingerprints the stored copy
+    (file_signature by default) so outside changes drop the cached entry.
+
+    Write-back belongs to the thread that turned it on: saves from other threads (e.g.
+    a background consolidation worker) are written through, so a discard() of that
+    thread's unit of work never drops them.
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[Path, Any], bool],
+        signer: Optional[Callable[[Union[str, Path]], Optional[Signature]]] = None,
+    ) -> None:
+        self._writer = writer
+        self._signer = signer or file_signature
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.RLock()
+        self.write_back_thread: Optional[int] = None   # thread id that buffers its saves
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "writes": 0, "deferred": 0, "flushes": 0}
+
+    @property
+    def write_back(self) -> bool:
+        """True if saves from the calling thread are buffered."""
+        owner = self.write_back_thread
+        return owner is not None and owner == threading.get_ident()
+
+    @write_back.setter
+    def write_back(self, enabled: bool) -> None:
+        """Buffer the calling thread's saves (True) or stop buffering (False)."""
+        self.write_back_thread = threading.get_ident() if enabled else None
+
+    @staticmethod
+    def key(path: Union[str, Path]) -> str:
+        return os.path.abspath(os.fspath(path))
+
+    # ---- reads ----
+    def lookup(self, path: Union[str, Path]) -> Tuple[bool, Any]:
+        """Return (hit, private_copy). Pending (unflushed) writes always win over disk."""
+        k = self.key(path)
+        with self._lock:
+            entry = self._entries.get(k)
+            if entry is None:
+                self.stats["misses"] += 1
+                return False, None
+            if not entry.dirty and entry.signature != self._signer(k):
+                # Someone else touched the file (or it was removed) → drop and re-read
+                del self._entries[k]
+                self.stats["misses"] += 1
+                return False, None
+            self.stats["hits"] += 1
+            return True, clone_json(entry.data)
+
+    def remember(self, path: Union[str, Path], data: Any, signature: Optional[Signature]) -> None:
+        """Cache freshly parsed data (owned by the store; callers get copies)."""
+        if signature is None:
+            return
+        with self._lock:
+            self._entries[self.key(path)] = _Entry(data, signature)
+
+    # ---- writes ----
+    def save(self, path: Union[str, Path], data: Any) -> bool:
+        """
+        Snapshot `data` and either buffer it (write-back) or write it through.
+        `data` must already be JSON-native (see clone_json). Returns the writer's result.
+        """
+        k = self.key(path)
+        with self._lock:
+            if self.write_back:
+                self._entries[k] = _Entry(data, None, dirty=True)
+                self.stats["deferred"] += 1
+                return True
+            ok = self._writer(Path(k), data)
+            self.stats["writes"] += 1
+            if ok:
+                self._entries[k] = _Entry(data, self._signer(k))
+            else:
+                self._entries.pop(k, None)
+            return ok
+
+    def append(self, path: Union[str, Path], item: Any, load: Callable[[], Any]) -> bool:
+        """
+        Append JSON-native `item` to the cached list at `path` in place (no copy of the
+        list). `load()` supplies freshly parsed data on a cache miss. Buffered under
+        write-back, written through otherwise. Returns False if the data is not a list.
+        """
+        k = self.key(path)
+        with self._lock:
+            entry = self._entries.get(k)
+            if entry is None or (not entry.dirty and entry.signature != self._signer(k)):
+                entry = _Entry(load(), None)
+            if not isinstance(entry.data, list):
+                return False
+            entry.data.append(item)
+            if self.write_back:
+                entry.dirty = True
+                entry.signature = None
+                self._entries[k] = entry
+                self.stats["deferred"] += 1
+                return True
+            ok = self._writer(Path(k), entry.data)
+            self.stats["writes"] += 1
+            if ok:
+                entry.dirty = False
+                entry.signature = self._signer(k)
+                self._entries[k] = entry
+            else:
+                self._entries.pop(k, None)
+            return ok
+
+    def invalidate(self, path: Union[str, Path, None] = None) -> None:
+        """Forget one cached path (or everything). Pending writes for it are discarded."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(self.key(path), None)
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(1 for e in self._entries.values() if e.dirty)
+
+    def discard(self) -> int:
+        """Drop every buffered write (disk keeps its last flushed content). Returns how many."""
+        with self._lock:
+            dirty = [k for k, e in self._entries.items() if e.dirty]
+            for k in dirty:
+                del self._entries[k]
+            return len(dirty)
+
+    def flush(
+        self,
+        batch: Callable[[], ContextManager] = nullcontext,
+        group_writer: Optional[Callable[[List[Tuple[Path, Any]]], List[bool]]] = None,
+    ) -> int:
+        """
+        Write every buffered file once. Returns the number of files written.
+        `batch()` wraps all the writes (e.g. one database transaction); `group_writer`
+        receives them all at once instead of one writer() call per file.
+        """
+        written = 0
+        with self._lock, batch():
+            dirty = [(k, e) for k, e in self._entries.items() if e.dirty]
+            if group_writer is not None:
+                results = group_writer([(Path(k), e.data) for k, e in dirty])
+            else:
+                results = [self._writer(Path(k), e.data) for k, e in dirty]
+            for (k, entry), ok in zip(dirty, results):
+                if ok:
+                    entry.signature = self._signer(k)
+                    entry.dirty = False
+                    written += 1
+                else:
+                    # keep the cache honest: disk still has the old content
+                    del self._entries[k]
+            self.stats["writes"] += written
+            self.stats["flushes"] += 1
+        return written
@@ -1,8 +1,9 @@
 # == Imports
 from __future__ import annotations
 
+from itertools import islice
 from typing import Optional, Dict, Any, List
-from utils.json_utils import load_json
+from memory.long_store import long_log_for
 from paths import LONG_MEMORY_FILE
 
 # == Functions
@@ -14,22 +15,16 @@ def summarize_recent_thoughts(n: int = 5, event_type_filter: Optional[str] = Non
     if not isinstance(n, int) or n <= 0:
         n = 5
 
-    long_memory: List[Dict[str, Any]] = load_json(LONG_MEMORY_FILE, default_type=list)
-    if not isinstance(long_memory, list) or not long_memory:
+    log = long_log_for(LONG_MEMORY_FILE)
+    if not len(log):
         return "No recent thoughts found."
 
-    # Filter to dict entries with content
-    if event_type_filter:
-        filtered = [m for m in long_memory if isinstance(m, dict) and m.get("event_type") == event_type_filter and "content" in m]
-    else:
-        filtered = [m for m in long_memory if isinstance(m, dict) and "content" in m]
-
-    if not filtered:
+    # Newest first, straight from the event_type index; reads only until n have content
+    matches = log.iter_query(batch=n, event_type=event_type_filter or None)
+    recent = list(islice((m for m in matches if "content" in m), n))
+    if not recent:
         return "No recent thoughts with content."
 
-    # Take last n (most recent), then reverse to show newest first
-    recent = list(reversed(filtered[-n:]))
-
     lines: List[str] = []
     for m in recent:
         content = m.get("content", "")